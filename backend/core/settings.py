@@ -207,3 +207,88 @@ DEFAULT_FROM_EMAIL = 'CBOE PITCH Data Processor <sunil.singh.programmer@gmail.co
 # But for direct access, we need the actual URL with port
 # Default to localhost for development
 FRONTEND_URL = os.environ.get('FRONTEND_URL', 'http://localhost:3000')
+
+# PITCH ingestion settings
+# Uploads at least this large (in bytes) are decoded column-wise with NumPy.
+# Set to 0 or to an empty value to always parse line by line.
+PITCH_VECTORIZED_MIN_SIZE = int(os.environ.get('PITCH_VECTORIZED_MIN_SIZE', 8 * 1024 * 1024) or 0) or None
+
+# Uploads are ingested in the background by this many worker processes.
+# Set to 0 to ingest inside the request instead.
+PITCH_INGEST_WORKERS = int(os.environ.get('PITCH_INGEST_WORKERS', 2))
+
+# Uploads stored on disk of at least this size are parsed by a pool of
+# PITCH_PARSE_WORKERS processes. Set the worker count to 1 to parse serially.
+# Every ingest worker starts a pool of its own, so up to PITCH_INGEST_WORKERS
+# times PITCH_PARSE_WORKERS processes parse at once; by default the CPUs are
+# shared out among the ingest workers.
+PITCH_PARSE_WORKERS = int(os.environ.get(
+    'PITCH_PARSE_WORKERS', max((os.cpu_count() or 1) // max(PITCH_INGEST_WORKERS, 1), 1)
+))
+PITCH_PARALLEL_MIN_SIZE = int(os.environ.get('PITCH_PARALLEL_MIN_SIZE', 64 * 1024 * 1024))
+
+# Uploads are parsed in blocks of this many bytes, and the decoded messages
+# are written to the database in batches of PITCH_INGEST_FLUSH_SIZE rows per
+# message table, so memory use does not grow with the size of the file.
+PITCH_PARSE_BLOCK_SIZE = int(os.environ.get('PITCH_PARSE_BLOCK_SIZE', 2 * 1024 * 1024))
+PITCH_INGEST_FLUSH_SIZE = int(os.environ.get('PITCH_INGEST_FLUSH_SIZE', 5000))
+
+# How message batches are inserted: 'copy' (PostgreSQL COPY), 'executemany'
+# or 'orm' (bulk_create). Empty to choose from the database vendor. On SQLite
+# executemany inserts about 5x faster than bulk_create at the default flush
+# size; larger flushes gain a little more for more memory (see the README).
+PITCH_BULK_LOADER = os.environ.get('PITCH_BULK_LOADER') or None
+
+# Keep the parsed messages of new uploads in per-file column files under
+# PITCH_COLUMN_STORE_DIR instead of the message tables
+PITCH_COLUMN_STORE = os.environ.get('PITCH_COLUMN_STORE', '').lower() in ('1', 'true', 'yes')
+PITCH_COLUMN_STORE_DIR = os.environ.get('PITCH_COLUMN_STORE_DIR', os.path.join(MEDIA_ROOT, 'pitch_columns'))
+
+# Unique order and execution IDs are counted 'exact'ly with sets, or with
+# 'hll' sketches of 2 ** PITCH_HLL_PRECISION bytes whose estimates have a
+# relative standard error of 1.04 / sqrt(2 ** PITCH_HLL_PRECISION), 0.81% at 14
+PITCH_DISTINCT_COUNT = os.environ.get('PITCH_DISTINCT_COUNT', 'exact')
+PITCH_HLL_PRECISION = int(os.environ.get('PITCH_HLL_PRECISION', 14))
+
+# Trades are aggregated into OHLCV bars of each of these lengths while a
+# file is ingested; a number followed by s, m or h
+PITCH_BAR_INTERVALS = os.environ.get('PITCH_BAR_INTERVALS', '1s,1m,5m').split(',')
+
+# Repeat uploads of identical bytes reuse the earlier ingest: 'user' only
+# among the uploader's own files, 'global' among everyone's, 'off' never
+PITCH_DEDUP_SCOPE = os.environ.get('PITCH_DEDUP_SCOPE', 'user')
+
+# Uploads are kept here until their ingest job has finished with them
+PITCH_UPLOAD_DIR = os.environ.get('PITCH_UPLOAD_DIR', os.path.join(MEDIA_ROOT, 'pitch_uploads'))
+
+# Responses about completely ingested files are cached for this many seconds,
+# in the memory of each process or, if set, in files under
+# PITCH_RESPONSE_CACHE_DIR shared by every process serving the API
+PITCH_RESPONSE_CACHE_DIR = os.environ.get('PITCH_RESPONSE_CACHE_DIR') or None
+PITCH_RESPONSE_CACHE_TIMEOUT = int(os.environ.get('PITCH_RESPONSE_CACHE_TIMEOUT', 24 * 3600))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'pitch_responses': {
+        'BACKEND': (
+            'django.core.cache.backends.filebased.FileBasedCache' if PITCH_RESPONSE_CACHE_DIR
+            else 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': PITCH_RESPONSE_CACHE_DIR or 'pitch-responses',
+        'TIMEOUT': PITCH_RESPONSE_CACHE_TIMEOUT,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+# Message exports read and render this many rows at a time
+PITCH_EXPORT_CHUNK_SIZE = int(os.environ.get('PITCH_EXPORT_CHUNK_SIZE', 10000))
+
+# Deleted files are purged in the background, deleting at most this many
+# rows of a message table per statement
+PITCH_PURGE_BATCH_SIZE = int(os.environ.get('PITCH_PURGE_BATCH_SIZE', 10000))
+
+# Chunked uploads: suggested and largest accepted chunk size in bytes
+PITCH_UPLOAD_CHUNK_SIZE = int(os.environ.get('PITCH_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))
+PITCH_UPLOAD_MAX_CHUNK_SIZE = int(os.environ.get('PITCH_UPLOAD_MAX_CHUNK_SIZE', 64 * 1024 * 1024))
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import PitchFile, MessageType, Symbol
+from .models import PitchFile, MessageType, Symbol, Ticker
 
 class MessageTypeInline(admin.TabularInline):
     model = MessageType
@@ -9,6 +9,7 @@ class SymbolInline(admin.TabularInline):
     model = Symbol
     extra = 0
     max_num = 20  # Limit the number of symbols displayed for performance
+    raw_id_fields = ('symbol',)
 
 @admin.register(PitchFile)
 class PitchFileAdmin(admin.ModelAdmin):
@@ -26,5 +27,10 @@ class MessageTypeAdmin(admin.ModelAdmin):
 @admin.register(Symbol)
 class SymbolAdmin(admin.ModelAdmin):
     list_display = ('symbol', 'pitch_file')
-    list_filter = ('symbol',)
+    list_select_related = ('symbol', 'pitch_file')
+    search_fields = ('symbol__symbol',)
+
+@admin.register(Ticker)
+class TickerAdmin(admin.ModelAdmin):
+    list_display = ('symbol', 'id')
     search_fields = ('symbol',) 
\ No newline at end of file
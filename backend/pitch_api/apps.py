@@ -3,4 +3,11 @@ from django.apps import AppConfig
 
 class PitchApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'pitch_api' 
\ No newline at end of file
+    name = 'pitch_api'
+
+    def ready(self):
+        from .parser import PitchParser
+        from .sketches import distinct_values
+
+        # The parser has no Django dependencies; count IDs the configured way
+        PitchParser.distinct = staticmethod(distinct_values)
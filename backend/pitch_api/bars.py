@@ -0,0 +1,215 @@
+"""
+OHLCV bars.
+
+Trades are aggregated into open/high/low/close/volume/VWAP bars per symbol
+once the messages of a file have been stored, at each of the
+``PITCH_BAR_INTERVALS``. Trade messages carry their own symbol and price;
+Order Executed messages are counted at the symbol and price of the order
+they executed, as resolved by ``lifecycle_records``. The bars are saved as
+``PriceBar`` rows, so charts read thousands of bars instead of every trade.
+"""
+import heapq
+import pickle
+import re
+import tempfile
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+
+from .bulk import load_batches
+from .columns import ColumnStore
+from .models import PRICE_SCALE, PitchFile, PriceBar, TradeMessage
+from .parser import MESSAGE_TYPES
+from .symbols import symbol_name
+
+# Trade messages, as opposed to executions of displayed orders
+TRADE_TYPES = {MESSAGE_TYPES['P'], MESSAGE_TYPES['r'], MESSAGE_TYPES['2']}
+
+# Nanoseconds per interval unit
+INTERVAL_UNITS = {'s': 10**9, 'm': 60 * 10**9, 'h': 3600 * 10**9}
+
+# Fields of a bar entry
+SYMBOL, START, OPEN, HIGH, LOW, CLOSE, VOLUME, NOTIONAL, TRADES = range(9)
+
+# Decimal places of a stored VWAP
+VWAP_QUANTUM = Decimal('1e-8')
+
+# Trade rows read from the database or decoded from the column store at a time
+FETCH_SIZE = 10000
+
+# Trades sorted in memory before they are spilled to a temporary file
+SPILL_SIZE = 100000
+
+# Trades written to or read back from a spilled run at a time
+SPILL_CHUNK_SIZE = 1000
+
+
+def _price(ticks):
+    return Decimal(ticks) / PRICE_SCALE
+
+
+def parse_interval(interval):
+    """Length in nanoseconds of an interval such as ``'1s'`` or ``'5m'``"""
+    match = re.fullmatch(r'([1-9][0-9]*)([smh])', interval)
+    if match is None:
+        raise ValueError(f"Invalid bar interval: {interval}")
+    return int(match.group(1)) * INTERVAL_UNITS[match.group(2)]
+
+
+def bar_intervals():
+    """The configured intervals, mapped to their length in nanoseconds"""
+    return {interval: parse_interval(interval) for interval in settings.PITCH_BAR_INTERVALS}
+
+
+def _database_trades(pitch_file):
+    """Trade messages read from the trade table"""
+    rows = TradeMessage.objects.filter(
+        pitch_file=pitch_file, message_type__in=TRADE_TYPES, symbol__isnull=False, price__isnull=False
+    ).order_by().values_list('symbol', 'timestamp', 'price', 'executed_shares', 'id').iterator(chunk_size=FETCH_SIZE)
+    for symbol, timestamp, price, shares, row in rows:
+        yield symbol_name(symbol), timestamp, price, shares, row
+
+
+def _column_trades(pitch_file):
+    """Trade messages read from the column store"""
+    table = ColumnStore(pitch_file.pk).table('trade')
+    if not table.rows:
+        return
+    mask = np.zeros(table.rows, dtype=bool)
+    for message_type in TRADE_TYPES:
+        mask |= table.mask([('message_type', 'exact', message_type)])
+    rows = np.flatnonzero(mask)
+    for start in range(0, len(rows), FETCH_SIZE):
+        for record in table.records(rows[start:start + FETCH_SIZE]):
+            if record['symbol'] is not None and record['price'] is not None:
+                yield record['symbol'], record['timestamp'], record['price'], record['executed_shares'], record['id']
+
+
+def stored_trades(pitch_file):
+    """Trade messages of a stored file as ``(symbol, timestamp, price, shares, row)``"""
+    if pitch_file.storage == PitchFile.STORAGE_COLUMNS:
+        return _column_trades(pitch_file)
+    return _database_trades(pitch_file)
+
+
+class SortedRuns:
+    """
+    Items sorted with bounded memory.
+
+    Items are kept in memory ``size`` at a time; each full run is sorted and
+    spilled to a temporary file, and iterating merges the runs back in order.
+    """
+
+    def __init__(self, size=SPILL_SIZE):
+        self.size = size
+        self.items = []
+        self.runs = []
+
+    def add(self, item):
+        self.items.append(item)
+        if len(self.items) >= self.size:
+            self._spill()
+
+    def _spill(self):
+        self.items.sort()
+        run = tempfile.TemporaryFile()
+        for start in range(0, len(self.items), SPILL_CHUNK_SIZE):
+            pickle.dump(self.items[start:start + SPILL_CHUNK_SIZE], run, pickle.HIGHEST_PROTOCOL)
+        run.seek(0)
+        self.runs.append(run)
+        self.items = []
+
+    @staticmethod
+    def _read(run):
+        with run:
+            while True:
+                try:
+                    items = pickle.load(run)
+                except EOFError:
+                    return
+                yield from items
+
+    def __iter__(self):
+        self.items.sort()
+        return heapq.merge(self.items, *map(self._read, self.runs))
+
+
+def _record(symbol, interval, start, bar):
+    volume = bar[VOLUME]
+    vwap = Decimal(bar[NOTIONAL]) / (volume * PRICE_SCALE) if volume else _price(bar[CLOSE])
+    return {
+        'symbol': symbol,
+        'interval': interval,
+        'start': start,
+        'open': _price(bar[OPEN]),
+        'high': _price(bar[HIGH]),
+        'low': _price(bar[LOW]),
+        'close': _price(bar[CLOSE]),
+        'volume': volume,
+        'vwap': vwap.quantize(VWAP_QUANTUM),
+        'trades': bar[TRADES],
+    }
+
+
+def bar_records(trades, intervals):
+    """
+    Bar records of ``(symbol, timestamp, row, price, shares)`` trades sorted
+    as tuples: the trades of a bar follow each other, so a bar is complete
+    as soon as a trade falls outside of it.
+    """
+    current = {interval: None for interval in intervals}
+    for symbol, timestamp, row, price, shares in trades:
+        for interval, length in intervals.items():
+            start = timestamp - timestamp % length
+            bar = current[interval]
+            if bar is not None and bar[START] == start and bar[SYMBOL] == symbol:
+                bar[CLOSE] = price
+                if price > bar[HIGH]:
+                    bar[HIGH] = price
+                elif price < bar[LOW]:
+                    bar[LOW] = price
+                bar[VOLUME] += shares
+                bar[NOTIONAL] += price * shares
+                bar[TRADES] += 1
+                continue
+            if bar is not None:
+                yield _record(bar[SYMBOL], interval, bar[START], bar)
+            current[interval] = [symbol, start, price, price, price, price, shares, price * shares, 1]
+    for interval, bar in current.items():
+        if bar is not None:
+            yield _record(bar[SYMBOL], interval, bar[START], bar)
+
+
+class PriceBars:
+    """
+    Bars of every symbol at every configured interval.
+
+    Trades are added in any order, as ``(symbol, timestamp, row, price,
+    shares)`` with prices in ticks, and sorted on disk once they outnumber
+    ``SPILL_SIZE``; bars are then built in one pass over the sorted trades,
+    so memory use stays flat however many trades and bars the file holds.
+    Trades and executions are both rows of the trade table, and its row
+    order breaks ties.
+    """
+
+    def __init__(self, intervals=None):
+        self.intervals = bar_intervals() if intervals is None else intervals
+        self.trades = SortedRuns()
+
+    def add(self, symbol, timestamp, price, shares, row):
+        self.trades.add((symbol, timestamp, row, price, shares))
+
+    def add_trades(self, pitch_file):
+        """Add the Trade messages of a stored file"""
+        for symbol, timestamp, price, shares, row in stored_trades(pitch_file):
+            if symbol:
+                self.add(symbol, timestamp, price, shares or 0, row)
+        return self
+
+    def records(self):
+        return bar_records(self.trades, self.intervals)
+
+    def save(self, pitch_file):
+        """Store the bars of a completely read file"""
+        load_batches(PriceBar, pitch_file, self.records())
@@ -0,0 +1,329 @@
+"""
+Decoder for Cboe binary PITCH captures.
+
+Binary captures are a sequence of Sequenced Units, each made of an 8 byte
+little-endian header (length, message count, unit, sequence) followed by
+length-prefixed messages. The framing is walked once to find every message;
+messages of the same type have a fixed ``struct`` layout, so each type is
+then gathered from the buffer and decoded in one pass through a NumPy
+structured dtype built from that layout.
+
+Records use the same kinds and field values as the ASCII layouts in
+``parser.LAYOUTS``. Order and execution IDs are the same integers the ASCII
+IDs decode to.
+"""
+import re
+import struct
+from itertools import repeat
+
+import numpy as np
+
+from .parser import MESSAGE_TYPES, PitchParser
+
+UNIT_HEADER = struct.Struct('<HBBI')
+
+# Sequenced units carry their own time reference in seconds since midnight
+TIME_MESSAGE = 0x20
+TIME = struct.Struct('<I')
+
+_CHARS = np.array([chr(code) for code in range(256)], dtype=object)
+
+# struct format characters and their NumPy equivalents
+_NUMPY_TYPES = {'B': 'u1', 'H': '<u2', 'I': '<u4', 'Q': '<u8'}
+
+
+def _id(values):
+    """Unsigned IDs are stored as signed 64-bit integers, as ``ids`` describes"""
+    return values.astype(np.int64).tolist()
+
+
+def _text(values):
+    return np.char.strip(np.char.decode(values, 'ascii', 'replace')).tolist()
+
+
+def _char(values):
+    return _CHARS[values].tolist()
+
+
+def _side(values):
+    return np.where(values == ord('S'), 'S', 'B').tolist()
+
+
+def _long_price(values):
+    """Long prices carry four implied decimal places, like stored prices"""
+    return values.astype(np.int64).tolist()
+
+
+def _short_price(values):
+    """Short prices carry two implied decimal places"""
+    return (values.astype(np.int64) * 100).tolist()
+
+
+def _raw(values):
+    return values.tolist()
+
+
+def _dtype(fmt, names):
+    """Build a structured dtype matching a little-endian struct format"""
+    fields = []
+    names = iter(names)
+    for count, code in re.findall(r'(\d*)([a-zA-Z])', fmt):
+        count = int(count or 1)
+        if code == 'x':
+            fields.append((f'_pad{len(fields)}', f'V{count}'))
+        elif code == 's':
+            fields.append((next(names), f'S{count}'))
+        else:
+            for _ in range(count):
+                fields.append((next(names), _NUMPY_TYPES[code]))
+    return np.dtype(fields)
+
+
+class BinaryLayout:
+    """Struct layout of a single binary PITCH message type"""
+
+    def __init__(self, code, name, kind, fmt, fields, constants=None, copy=None):
+        self.code = code
+        self.name = name
+        self.kind = kind
+        # Formats start after the length and type bytes of every message
+        self.struct = struct.Struct('<' + fmt)
+        self.length = self.struct.size + 2
+        self.fields = fields
+        self.dtype = _dtype(fmt, ['time_offset'] + [field for field, convert in fields])
+        self.constants = dict(constants or {}, message_type=name)
+        self.copy = tuple((copy or {}).items())
+
+    def decode(self, matrix, timestamps, tracked):
+        """
+        Decode a (messages x struct size) byte matrix into records.
+
+        ``tracked`` maps field names to sets that collect their values.
+        """
+        values = np.ascontiguousarray(matrix).view(self.dtype).ravel()
+        names = ['timestamp']
+        columns = [(timestamps + values['time_offset']).tolist()]
+        for name, convert in self.fields:
+            names.append(name)
+            columns.append((convert or _raw)(values[name]))
+            if name in tracked:
+                tracked[name].update(columns[-1])
+        for name, value in self.constants.items():
+            names.append(name)
+            columns.append(repeat(value))
+        for target, source in self.copy:
+            names.append(target)
+            columns.append(columns[names.index(source)])
+        return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+_ADD_ORDER = (
+    ('order_id', _id), ('side', _side), ('quantity', None),
+    ('symbol', _text), ('price', _long_price),
+)
+_ADD_ORDER_SHORT = (
+    ('order_id', _id), ('side', _side), ('quantity', None),
+    ('symbol', _text), ('price', _short_price),
+)
+_TRADE = (
+    ('order_id', _id), ('quantity', None), ('symbol', _text),
+    ('price', _long_price), ('trade_id', _id),
+)
+_TRADE_SHORT = (
+    ('order_id', _id), ('quantity', None), ('symbol', _text),
+    ('price', _short_price), ('trade_id', _id),
+)
+_TRADE_COPY = {'executed_shares': 'quantity'}
+
+# Formats exclude the two byte length/type prefix and start at the time offset.
+# Only the leading fields the models store are read; 'x' skips side indicators
+# on trades and other bytes in between.
+LAYOUTS = {
+    layout.code: layout for layout in (
+        BinaryLayout(0x21, MESSAGE_TYPES['d'], 'add_order', 'IQBI6sQ', _ADD_ORDER),
+        BinaryLayout(0x22, MESSAGE_TYPES['A'], 'add_order', 'IQBH6sH', _ADD_ORDER_SHORT),
+        BinaryLayout(0x2F, MESSAGE_TYPES['1'], 'add_order', 'IQBI8sQx4s', _ADD_ORDER + (('participant_id', _text),)),
+        BinaryLayout(0x23, MESSAGE_TYPES['E'], 'trade', 'IQIQ', (
+            ('order_id', _id), ('executed_shares', None), ('trade_id', _id),
+        )),
+        BinaryLayout(0x24, MESSAGE_TYPES['E'], 'trade', 'IQI4xQQ', (
+            ('order_id', _id), ('executed_shares', None), ('trade_id', _id),
+            ('price', _long_price),
+        )),
+        BinaryLayout(0x25, MESSAGE_TYPES['X'], 'cancel_order', 'IQI', (
+            ('order_id', _id), ('canceled_shares', None),
+        )),
+        BinaryLayout(0x26, MESSAGE_TYPES['X'], 'cancel_order', 'IQH', (
+            ('order_id', _id), ('canceled_shares', None),
+        )),
+        BinaryLayout(0x27, 'Modify Order (long)', 'modify_order', 'IQIQ', (
+            ('order_id', _id), ('modified_shares', None), ('price', _long_price),
+        )),
+        BinaryLayout(0x28, 'Modify Order (short)', 'modify_order', 'IQHH', (
+            ('order_id', _id), ('modified_shares', None), ('price', _short_price),
+        )),
+        BinaryLayout(0x29, 'Delete Order', 'delete_order', 'IQ', (
+            ('order_id', _id),
+        )),
+        BinaryLayout(0x2A, MESSAGE_TYPES['r'], 'trade', 'IQxI6sQQ', _TRADE, copy=_TRADE_COPY),
+        BinaryLayout(0x2B, MESSAGE_TYPES['P'], 'trade', 'IQxH6sHQ', _TRADE_SHORT, copy=_TRADE_COPY),
+        BinaryLayout(0x30, MESSAGE_TYPES['2'], 'trade', 'IQxI8sQQ', _TRADE, copy=_TRADE_COPY),
+        BinaryLayout(0x2C, MESSAGE_TYPES['B'], 'trade_break', 'IQ', (
+            ('trade_id', _id),
+        )),
+        BinaryLayout(0x2D, 'End of Session', 'system_event', 'I', (), constants={'event_code': 'C'}),
+        BinaryLayout(0x31, MESSAGE_TYPES['H'], 'system_event', 'I8sB', (
+            ('symbol', _text), ('event_code', _char),
+        )),
+        BinaryLayout(0x95, MESSAGE_TYPES['I'], 'auction', 'I8sBQ', (
+            ('symbol', _text), ('auction_type', _char), ('reference_price', _long_price),
+        )),
+        BinaryLayout(0x96, MESSAGE_TYPES['J'], 'auction', 'I8sBQ', (
+            ('symbol', _text), ('auction_type', _char), ('reference_price', _long_price),
+        )),
+        BinaryLayout(0x98, MESSAGE_TYPES['R'], 'system_event', 'I8sB', (
+            ('symbol', _text), ('event_code', _char),
+        )),
+    )
+}
+
+# Number of leading bytes inspected to tell binary captures from ASCII files
+SNIFF_SIZE = 4096
+
+# Message types that are counted but not stored
+COUNTED_TYPES = {
+    TIME_MESSAGE: 'Time',
+    0x97: 'Unit Clear',
+}
+
+
+def is_binary(head):
+    """
+    Check whether the first bytes of a file look like a binary capture.
+
+    ASCII PITCH is printable text, while a binary capture starts with a
+    Sequenced Unit Header whose length matches the messages that follow.
+    """
+    if len(head) < UNIT_HEADER.size + 2:
+        return False
+    if all(32 <= byte < 127 or byte in (9, 10, 13) for byte in head[:64]):
+        return False
+    length, count, unit, sequence = UNIT_HEADER.unpack_from(head, 0)
+    if length < UNIT_HEADER.size or count == 0:
+        return False
+    offset = UNIT_HEADER.size
+    for _ in range(count):
+        if offset >= len(head):
+            # The unit extends past the sample; the messages seen so far fit
+            return length > len(head)
+        message_length = head[offset]
+        if message_length < 2:
+            return False
+        offset += message_length
+    return offset == length
+
+
+def complete_length(buf):
+    """Number of leading bytes of ``buf`` made of whole sequenced units"""
+    size = len(buf)
+    offset = 0
+    while offset + UNIT_HEADER.size <= size:
+        length = UNIT_HEADER.unpack_from(buf, offset)[0]
+        if length < UNIT_HEADER.size or offset + length > size:
+            break
+        offset += length
+    return offset
+
+
+def _frame(buf, seconds):
+    """
+    Walk the sequenced units of a capture.
+
+    Returns the offset of every message and the time reference, in
+    nanoseconds, of the unit it was sent on. ``seconds`` holds the latest
+    time reference of each unit and is updated in place.
+    """
+    size = len(buf)
+    header = UNIT_HEADER.unpack_from
+    time = TIME.unpack_from
+    positions = []
+    bases = []
+    offset = 0
+    while offset + UNIT_HEADER.size <= size:
+        length, count, unit, sequence = header(buf, offset)
+        if length < UNIT_HEADER.size:
+            break
+        end = min(offset + length, size)
+        position = offset + UNIT_HEADER.size
+        base = seconds.get(unit, 0)
+        for _ in range(count):
+            if position + 2 > end:
+                break
+            message_length = buf[position]
+            if message_length < 2 or position + message_length > end:
+                break
+            if buf[position + 1] == TIME_MESSAGE and message_length >= 6:
+                base = seconds[unit] = time(buf, position + 2)[0] * 1_000_000_000
+            positions.append(position)
+            bases.append(base)
+            position += message_length
+        offset += length
+    return np.array(positions, dtype=np.int64), np.array(bases, dtype=np.int64)
+
+
+def parse_binary(data, seconds=None):
+    """
+    Decode a binary PITCH capture held in any buffer-protocol object.
+
+    Returns a populated ``PitchParser``; ``line_count`` is the number of
+    messages decoded. When a capture is decoded in consecutive pieces, pass
+    the same ``seconds`` dict to every call so units keep their time
+    reference across pieces.
+    """
+    if seconds is None:
+        seconds = {}
+    parser = PitchParser()
+    parser.format = 'binary'
+    buf = np.frombuffer(data, dtype=np.uint8)
+    view = memoryview(data).cast('B')
+    try:
+        positions, bases = _frame(view, seconds)
+    finally:
+        view.release()
+    parser.line_count = len(positions)
+    lengths = buf[positions]
+    types = buf[positions + 1]
+
+    counts = {}
+    first_seen = {}
+    chunks = {}
+    tracked = {'order_id': parser.order_ids, 'symbol': parser.symbols, 'trade_id': parser.execution_ids}
+
+    def count(name, rows):
+        counts[name] = counts.get(name, 0) + len(rows)
+        first_seen[name] = min(first_seen.get(name, len(types)), int(rows[0]))
+
+    for code in np.unique(types).tolist():
+        rows = np.flatnonzero(types == code)
+        layout = LAYOUTS.get(code)
+        if layout is not None:
+            decodable = lengths[rows] >= layout.length
+            if decodable.any():
+                decoded = rows[decodable]
+                matrix = buf[positions[decoded, None] + 2 + np.arange(layout.struct.size)]
+                chunks.setdefault(layout.kind, []).append((decoded, layout.decode(matrix, bases[decoded], tracked)))
+                count(layout.name, decoded)
+            rows = rows[~decodable]
+        if len(rows):
+            # Counted-only types and messages too short for their layout
+            count(COUNTED_TYPES.get(code, f"Uncategorized (0x{code:02X})"), rows)
+
+    # Present counts and records in capture order
+    parser.message_counts = {name: counts[name] for name in sorted(counts, key=first_seen.get)}
+    for kind, parts in chunks.items():
+        rows = np.concatenate([part[0] for part in parts])
+        records = [record for part in parts for record in part[1]]
+        parser.records[kind] = [records[i] for i in np.argsort(rows, kind='stable').tolist()]
+    for values in tracked.values():
+        values.discard('')
+    return parser
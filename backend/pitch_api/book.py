@@ -0,0 +1,275 @@
+"""
+Limit order book reconstruction.
+
+The book of a symbol is rebuilt by replaying the messages that change it in
+timestamp order: Add Order messages place orders, Order Executed and Order
+Cancel messages take shares off them, Modify Order messages replace their
+size and price and Delete Order messages remove them. Executions, cancels,
+modifies and deletes carry no symbol; they find their order through the
+order ID map of the replay.
+
+Prices are integer ticks of 1/``PRICE_SCALE``, as they are stored. Each
+side of a book keeps its price levels in a sorted list next to a dict of
+the shares and order count resting at every level, so levels are found in
+O(1) and only new or emptied levels touch the sorted list.
+"""
+import heapq
+from bisect import bisect_left, insort
+from decimal import Decimal
+
+import numpy as np
+
+from .columns import ColumnStore
+from .models import (
+    PRICE_SCALE, PitchFile, AddOrderMessage, ModifyOrderMessage, CancelOrderMessage,
+    DeleteOrderMessage, TradeMessage,
+)
+from .parser import MESSAGE_TYPES
+from .symbols import symbol_id
+
+ORDER_EXECUTED = MESSAGE_TYPES['E']
+
+# Replay actions, in the order they are applied within a timestamp
+ADD, MODIFY, EXECUTE, CANCEL, DELETE = range(5)
+
+
+def format_price(ticks):
+    """Render integer ticks as a decimal string"""
+    return format(Decimal(ticks) / PRICE_SCALE, f'.{len(str(PRICE_SCALE)) - 1}f')
+
+
+class PriceLevels:
+    """The price levels of one side of a book"""
+
+    def __init__(self, descending):
+        self.descending = descending
+        self.prices = []
+        self.shares = {}
+        self.orders = {}
+
+    def add(self, price, shares):
+        if price in self.shares:
+            self.shares[price] += shares
+            self.orders[price] += 1
+        else:
+            insort(self.prices, price)
+            self.shares[price] = shares
+            self.orders[price] = 1
+
+    def reduce(self, price, shares, removed=False):
+        """Take shares off a level; ``removed`` if an order left it"""
+        self.shares[price] -= shares
+        if removed:
+            self.orders[price] -= 1
+            if not self.orders[price]:
+                del self.prices[bisect_left(self.prices, price)]
+                del self.shares[price]
+                del self.orders[price]
+
+    def levels(self, depth):
+        """The best ``depth`` levels as ``(price, shares, orders)``"""
+        prices = self.prices[:-depth - 1:-1] if self.descending else self.prices[:depth]
+        return [(price, self.shares[price], self.orders[price]) for price in prices]
+
+
+class OrderBook:
+    """The resting orders of a single symbol, aggregated by price"""
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.bids = PriceLevels(descending=True)
+        self.asks = PriceLevels(descending=False)
+
+    def side(self, side):
+        return self.asks if side == 'S' else self.bids
+
+    def snapshot(self, depth):
+        """Best bid and offer plus ``depth`` levels per side"""
+        bids = [_level(*level) for level in self.bids.levels(depth)]
+        asks = [_level(*level) for level in self.asks.levels(depth)]
+        return {
+            'symbol': self.symbol,
+            'best_bid': bids[0] if bids else None,
+            'best_ask': asks[0] if asks else None,
+            'bids': bids,
+            'asks': asks,
+        }
+
+
+def _level(price, shares, orders):
+    return {'price': format_price(price), 'shares': shares, 'orders': orders}
+
+
+class BookReplay:
+    """
+    Replays order messages into the books of every symbol they touch.
+
+    ``orders`` maps order IDs to ``[book side, price, remaining shares]``.
+    Messages for orders the replay has not seen are ignored.
+    """
+
+    def __init__(self):
+        self.books = {}
+        self.orders = {}
+        self.applied = 0
+        self.timestamp = None
+
+    def book(self, symbol):
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = OrderBook(symbol)
+        return book
+
+    def add(self, order_id, symbol, side, price, shares):
+        if order_id in self.orders:
+            # A reused order ID replaces the order it referred to
+            self.delete(order_id)
+        levels = self.book(symbol).side(side)
+        levels.add(price, shares)
+        self.orders[order_id] = [levels, price, shares]
+
+    def take(self, order_id, shares):
+        """Take shares off an order, removing it once none are left"""
+        order = self.orders.get(order_id)
+        if order is None:
+            return
+        levels, price, remaining = order
+        shares = min(shares, remaining)
+        order[2] = remaining - shares
+        levels.reduce(price, shares, removed=not order[2])
+        if not order[2]:
+            del self.orders[order_id]
+
+    def modify(self, order_id, shares, price):
+        order = self.orders.get(order_id)
+        if order is None:
+            return
+        levels, old_price, remaining = order
+        levels.reduce(old_price, remaining, removed=True)
+        price = old_price if price is None else price
+        if shares > 0:
+            levels.add(price, shares)
+            order[1:] = [price, shares]
+        else:
+            del self.orders[order_id]
+
+    def delete(self, order_id):
+        order = self.orders.pop(order_id, None)
+        if order is not None:
+            levels, price, remaining = order
+            levels.reduce(price, remaining, removed=True)
+
+    def apply(self, events):
+        """Apply ``(timestamp, action, order_id, *values)`` events in order"""
+        for event in events:
+            timestamp, action, order_id = event[:3]
+            if action == ADD:
+                self.add(order_id, *event[3:])
+            elif action == MODIFY:
+                self.modify(order_id, *event[3:])
+            elif action == DELETE:
+                self.delete(order_id)
+            else:
+                self.take(order_id, event[3])
+            self.timestamp = timestamp
+            self.applied += 1
+
+
+def _tagged(rows, action, convert=None):
+    for row in rows:
+        if convert is not None:
+            row = convert(row)
+        yield (row[0], action) + tuple(row[1:])
+
+
+def _database_events(pitch_file, symbol, until):
+    """Order events of ``symbol`` read from the message tables"""
+    def messages(model, *fields, **filters):
+        queryset = model.objects.filter(pitch_file=pitch_file, **filters)
+        if until is not None:
+            queryset = queryset.filter(timestamp__lte=until)
+        return queryset.order_by('timestamp', 'id').values_list('timestamp', 'order_id', *fields).iterator(chunk_size=10000)
+
+    ticker = symbol_id(symbol)
+    if ticker is None:
+        return []
+    order_ids = AddOrderMessage.objects.filter(pitch_file=pitch_file, symbol_id=ticker).values('order_id')
+    adds = messages(AddOrderMessage, 'side', 'price', 'quantity', symbol_id=ticker)
+    return [
+        _tagged(adds, ADD, lambda row: (row[0], row[1], symbol, row[2], row[3] or 0, row[4] or 0)),
+        _tagged(messages(ModifyOrderMessage, 'modified_shares', 'price', order_id__in=order_ids), MODIFY),
+        _tagged(messages(TradeMessage, 'executed_shares', order_id__in=order_ids, message_type=ORDER_EXECUTED), EXECUTE),
+        _tagged(messages(CancelOrderMessage, 'canceled_shares', order_id__in=order_ids), CANCEL),
+        _tagged(messages(DeleteOrderMessage, order_id__in=order_ids), DELETE),
+    ]
+
+
+def _column_events(pitch_file, symbol, until):
+    """Order events of ``symbol`` read from the column store"""
+    store = ColumnStore(pitch_file.pk)
+
+    def select(table, mask):
+        if until is not None:
+            mask &= table.column('timestamp') <= until
+        rows = np.flatnonzero(mask)
+        # Rows are stored in file order; a stable sort keeps it within a timestamp
+        return rows[np.argsort(table.column('timestamp')[rows], kind='stable')]
+
+    def values(table, name, rows):
+        column = table.column(name)
+        if name == 'side':
+            return table.dictionary(name).decode(column[rows])
+        null = np.iinfo(column.dtype).min
+        return [None if value == null else value for value in column[rows].tolist()]
+
+    adds = store.table('add_order')
+    code = adds.dictionary('symbol').code(symbol) if adds.rows else None
+    if code is None:
+        return []
+    rows = select(adds, adds.column('symbol') == code)
+    order_ids = values(adds, 'order_id', rows)
+    known = adds.column('order_id')[rows]
+    known = known[known != np.iinfo(known.dtype).min]
+    streams = [zip(
+        values(adds, 'timestamp', rows), [ADD] * len(rows), order_ids, [symbol] * len(rows),
+        values(adds, 'side', rows),
+        [price or 0 for price in values(adds, 'price', rows)],
+        [shares or 0 for shares in values(adds, 'quantity', rows)],
+    )]
+
+    def related(kind, action, names, message_type=None):
+        table = store.table(kind)
+        if not table.rows:
+            return []
+        mask = np.isin(table.column('order_id'), known)
+        if message_type is not None:
+            mask &= table.column('message_type') == table.dictionary('message_type').code(message_type)
+        rows = select(table, mask)
+        return zip(
+            values(table, 'timestamp', rows), [action] * len(rows), values(table, 'order_id', rows),
+            *(values(table, name, rows) for name in names)
+        )
+
+    streams.append(related('modify_order', MODIFY, ['modified_shares', 'price']))
+    streams.append(related('trade', EXECUTE, ['executed_shares'], message_type=ORDER_EXECUTED))
+    streams.append(related('cancel_order', CANCEL, ['canceled_shares']))
+    streams.append(related('delete_order', DELETE, []))
+    return streams
+
+
+def replay_book(pitch_file, symbol, until=None):
+    """
+    Replay the order messages of ``symbol`` up to timestamp ``until``.
+
+    Returns the ``BookReplay``; its book of ``symbol`` holds the orders that
+    were resting at ``until``, or at the end of the file if it is None.
+    """
+    source = pitch_file.message_source
+    if source.storage == PitchFile.STORAGE_COLUMNS:
+        streams = _column_events(source, symbol, until)
+    else:
+        streams = _database_events(source, symbol, until)
+    replay = BookReplay()
+    replay.book(symbol)
+    replay.apply(heapq.merge(*streams, key=lambda event: event[:2]))
+    return replay
@@ -0,0 +1,170 @@
+"""
+Bulk loading of decoded messages into the message tables.
+
+``bulk_create`` builds a model instance and runs every field's conversion for
+each row. The loaders here write the record dicts produced by the parser
+straight through the database's own bulk path instead:
+
+* ``copy`` streams rows to PostgreSQL with ``COPY ... FROM STDIN``.
+* ``executemany`` runs one prepared ``INSERT`` over all rows in a single
+  transaction; this is the default on SQLite and works on any backend.
+* ``orm`` falls back to ``bulk_create``.
+
+``PITCH_BULK_LOADER`` selects a loader by name; by default it is chosen from
+the vendor of the database connection.
+
+Records carry symbols as strings; the loaders store the IDs the symbol
+dictionary gives them.
+"""
+import io
+import itertools
+import operator
+
+from django.conf import settings
+from django.db import connections, router, transaction
+
+from .models import Ticker
+from .symbols import symbol_ids
+
+# Rows per bulk_create statement of the ORM loader
+ORM_BATCH_SIZE = 1000
+
+
+class TableLayout:
+    """Column order and per-column defaults of a message table"""
+
+    def __init__(self, model):
+        self.model = model
+        self.table = model._meta.db_table
+        fields = [
+            field for field in model._meta.concrete_fields
+            if not field.primary_key and field.name != 'pitch_file'
+        ]
+        self.columns = ['pitch_file_id'] + [field.column for field in fields]
+        # Missing values get the same defaults bulk_create would give them
+        self.defaults = {'pitch_file_id': None}
+        self.defaults.update((field.attname, field.get_default()) for field in fields)
+        self.values = operator.itemgetter(*self.defaults)
+        self.symbols = [
+            (field.name, field.attname) for field in fields
+            if field.is_relation and field.related_model is Ticker
+        ]
+
+    def encode_symbols(self, rows):
+        """Replace the symbols of row dicts by their dictionary IDs, in place"""
+        for name, attname in self.symbols:
+            ids = symbol_ids({row.get(name) for row in rows})
+            for row in rows:
+                row[attname] = ids.get(row.pop(name, None))
+        return rows
+
+    def rows(self, pitch_file_id, records):
+        """Return the column values of every record, in column order"""
+        defaults = dict(self.defaults, pitch_file_id=pitch_file_id)
+        rows = self.encode_symbols([{**defaults, **record} for record in records])
+        return list(map(self.values, rows))
+
+
+_layouts = {}
+
+
+def table_layout(model):
+    layout = _layouts.get(model)
+    if layout is None:
+        layout = _layouts[model] = TableLayout(model)
+    return layout
+
+
+def load_orm(connection, model, pitch_file, records):
+    rows = table_layout(model).encode_symbols([dict(record) for record in records])
+    model.objects.using(connection.alias).bulk_create([
+        model(pitch_file=pitch_file, **row)
+        for row in rows
+    ], batch_size=ORM_BATCH_SIZE)
+
+
+def load_executemany(connection, model, pitch_file, records):
+    layout = table_layout(model)
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(layout.table),
+        ', '.join(quote(column) for column in layout.columns),
+        ', '.join(['%s'] * len(layout.columns)),
+    )
+    rows = layout.rows(pitch_file.pk, records)
+    with transaction.atomic(using=connection.alias, savepoint=False):
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+
+# Characters with a special meaning in COPY's text format
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, str):
+        return value.translate(_COPY_ESCAPES)
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return str(value)
+
+
+def load_copy(connection, model, pitch_file, records):
+    layout = table_layout(model)
+    quote = connection.ops.quote_name
+    buffer = io.StringIO()
+    for row in layout.rows(pitch_file.pk, records):
+        buffer.write('\t'.join(map(_copy_value, row)))
+        buffer.write('\n')
+    sql = 'COPY {} ({}) FROM STDIN'.format(
+        quote(layout.table), ', '.join(quote(column) for column in layout.columns)
+    )
+    with transaction.atomic(using=connection.alias, savepoint=False):
+        with connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, 'copy_expert'):
+                # psycopg2
+                buffer.seek(0)
+                raw.copy_expert(sql, buffer)
+            else:
+                # psycopg 3
+                with raw.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+
+
+LOADERS = {
+    'copy': load_copy,
+    'executemany': load_executemany,
+    'orm': load_orm,
+}
+
+# Loader used for each database vendor unless PITCH_BULK_LOADER is set
+VENDOR_LOADERS = {
+    'postgresql': 'copy',
+}
+
+
+def get_loader(connection):
+    name = settings.PITCH_BULK_LOADER or VENDOR_LOADERS.get(connection.vendor, 'executemany')
+    try:
+        return LOADERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown bulk loader: {name}")
+
+
+def load_records(model, pitch_file, records):
+    """Insert the record dicts of one message table in a single transaction"""
+    connection = connections[router.db_for_write(model)]
+    get_loader(connection)(connection, model, pitch_file, records)
+
+
+def load_batches(model, pitch_file, records):
+    """Insert an iterable of record dicts in batches of ``PITCH_INGEST_FLUSH_SIZE``"""
+    records = iter(records)
+    while True:
+        batch = list(itertools.islice(records, settings.PITCH_INGEST_FLUSH_SIZE))
+        if not batch:
+            return
+        load_records(model, pitch_file, batch)
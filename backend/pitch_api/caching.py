@@ -0,0 +1,85 @@
+"""
+Response cache.
+
+A file never changes once it has been ingested, and neither do the
+responses about it, so the views of completed files are cached in the
+``pitch_responses`` cache and sent with a strong ETag: clients that send
+it back in ``If-None-Match`` get ``304 Not Modified``. Entries are keyed by
+file, user, endpoint and query parameters, and versioned by a token per
+file. Deleting a file drops its token, which orphans every entry of the
+file at once; they expire on their own.
+
+The default backend keeps entries in the memory of each process. With
+several processes serving the API, point ``PITCH_RESPONSE_CACHE_DIR`` at a
+shared directory so a deletion reaches all of them.
+"""
+import hashlib
+import json
+import uuid
+from functools import wraps
+
+from django.core.cache import caches
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import PitchFile
+
+CACHE_ALIAS = 'pitch_responses'
+
+
+def _version_key(file_id):
+    return f'pitch-file:{file_id}:version'
+
+
+def _entry_key(request, file_id, token):
+    # Pagination links are absolute, so the host is part of the key
+    query = sorted(request.query_params.lists())
+    digest = hashlib.sha256(json.dumps([request.build_absolute_uri(request.path), query]).encode()).hexdigest()
+    return f'pitch-file:{file_id}:{token}:{request.user.pk or 0}:{digest}'
+
+
+def _etag(data):
+    content = json.dumps(data, cls=JSONEncoder, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(content.encode()).hexdigest()[:32]
+
+
+def invalidate_responses(file_ids):
+    """Forget the cached responses of the given files"""
+    caches[CACHE_ALIAS].delete_many([_version_key(file_id) for file_id in file_ids])
+
+
+def cached_file_response(method):
+    """
+    Cache the successful responses of a view method about the file
+    ``file_id``, once the file has been completely ingested.
+    """
+    @wraps(method)
+    def wrapper(view, request, file_id, *args, **kwargs):
+        cache = caches[CACHE_ALIAS]
+        token = cache.get(_version_key(file_id))
+        entry = cache.get(_entry_key(request, file_id, token)) if token else None
+        if entry is None:
+            response = method(view, request, file_id, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            if not PitchFile.objects.visible().filter(pk=file_id, status=PitchFile.STATUS_COMPLETED).exists():
+                return response
+            cache.add(_version_key(file_id), uuid.uuid4().hex, timeout=None)
+            token = cache.get(_version_key(file_id))
+            entry = (_etag(response.data), response.data)
+            if token:
+                cache.set(_entry_key(request, file_id, token), entry)
+        etag, data = entry
+        etag = quote_etag(etag)
+        if_none_match = request.headers.get('If-None-Match', '')
+        if if_none_match.strip() == '*' or etag in parse_etags(if_none_match):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(data)
+        response['ETag'] = etag
+        # Responses depend on the user; have clients revalidate every time
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+    return wrapper
@@ -0,0 +1,190 @@
+"""
+Resumable chunked uploads.
+
+A client opens an upload with the size of its file, sends the file as
+numbered chunks in order and commits it once every byte has arrived. Chunks
+are appended to the spooled file of the upload's ``IngestJob``, so a dropped
+transfer resumes from the next chunk the job reports.
+
+While the transfer is running, worker processes parse the complete lines
+received so far and store their messages, carrying the partial last line
+over to the next chunk. The counts and IDs collected from every parsed block
+are kept next to the spooled file and merged when the upload is committed,
+once order lifecycles and bars are built from the stored messages.
+Compressed and binary files cannot be split on line boundaries and are only
+parsed once committed, as are all uploads while ``PITCH_COLUMN_STORE`` is
+enabled, since column files are written in one pass.
+"""
+import fcntl
+import os
+import pickle
+import shutil
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .binary import SNIFF_SIZE, is_binary
+from .compressed import detect_compression
+from .ingest import delete_messages, ingest_file, save_aggregates, store_records, store_summary
+from .models import IngestJob
+from .parser import PitchParser
+from .vectorized import parse_buffer
+
+# Size of the pieces copied from a request body to the spooled file
+COPY_SIZE = 1024 * 1024
+
+
+def _parts_dir(path):
+    return path + '.parts'
+
+
+def _lock_path(path):
+    return path + '.lock'
+
+
+@contextmanager
+def _locked(path, blocking=True):
+    """Hold the parse lock of an upload; yields False if it is busy"""
+    with open(_lock_path(path), 'a') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def open_upload(job):
+    """Create the empty spooled file of a chunked upload"""
+    os.makedirs(os.path.dirname(job.upload_path), exist_ok=True)
+    open(job.upload_path, 'wb').close()
+
+
+def write_chunk(job, stream, length):
+    """
+    Write the next chunk of an upload from ``stream``.
+
+    The chunk is written at the end of the bytes acknowledged so far, so a
+    chunk that was interrupted is simply written again. Returns the number
+    of bytes read from the stream.
+    """
+    written = 0
+    with open(job.upload_path, 'r+b') as file:
+        file.seek(job.received_bytes)
+        while written < length:
+            data = stream.read(min(COPY_SIZE, length - written))
+            if not data:
+                break
+            file.write(data)
+            written += len(data)
+        file.truncate()
+    return written
+
+
+def _incremental(path, received, final):
+    """
+    Whether an upload can be parsed while it is received.
+
+    Returns None until enough bytes have arrived to tell.
+    """
+    if settings.PITCH_COLUMN_STORE:
+        return False
+    if received < SNIFF_SIZE and not final:
+        return None
+    with open(path, 'rb') as file:
+        head = file.read(min(received, SNIFF_SIZE))
+    return detect_compression(head) is None and not is_binary(head)
+
+
+def parse_received(job_id, final=False):
+    """
+    Parse and store the complete lines an upload has received so far.
+
+    Only one process parses an upload at a time; others return at once
+    unless ``final`` is set, in which case the remaining bytes, including a
+    last line without a line ending, are parsed as well.
+    """
+    job = IngestJob.objects.select_related('pitch_file').filter(pk=job_id).first()
+    if job is None or not os.path.exists(job.upload_path):
+        # The upload has been dropped in the meantime
+        return
+    path = job.upload_path
+    with _locked(path, blocking=final) as locked:
+        if not locked or not IngestJob.objects.filter(pk=job_id).exists():
+            return
+        while True:
+            job.refresh_from_db(fields=['received_bytes', 'processed_bytes', 'lines_processed', 'records_written'])
+            start, end = job.processed_bytes, job.received_bytes
+            if start >= end or not _incremental(path, end, final):
+                return
+            with open(path, 'rb') as file:
+                file.seek(start)
+                data = file.read(min(end - start, settings.PITCH_PARSE_BLOCK_SIZE))
+                if start + len(data) < end and b'\n' not in data:
+                    # A single line longer than a block
+                    data += file.read(end - start - len(data))
+            if final and start + len(data) == end:
+                cut = len(data)
+            else:
+                cut = data.rfind(b'\n') + 1
+                if not cut:
+                    return
+            parser = parse_buffer(data[:cut])
+            # Rows and progress are saved together, so a block that fails
+            # half way is parsed again from the same offset
+            with transaction.atomic():
+                written = store_records(job.pitch_file, parser.records, written=job.records_written)
+                parser.drop_records()
+                os.makedirs(_parts_dir(path), exist_ok=True)
+                with open(os.path.join(_parts_dir(path), f'{start:020d}.pickle'), 'wb') as part:
+                    pickle.dump(parser, part, pickle.HIGHEST_PROTOCOL)
+                IngestJob.objects.filter(pk=job_id, started_at__isnull=True).update(started_at=timezone.now())
+                IngestJob.objects.filter(pk=job_id).update(
+                    processed_bytes=start + cut,
+                    lines_processed=job.lines_processed + parser.line_count,
+                    records_written=written,
+                )
+
+
+def finish_upload(pitch_file, job, progress=None):
+    """Parse what is left of a committed upload and store its summary"""
+    path = job.upload_path
+    if not _incremental(path, job.received_bytes, True):
+        return ingest_file(pitch_file, path, progress)
+    parse_received(job.pk, final=True)
+    parser = PitchParser()
+    parts = _parts_dir(path)
+    for name in sorted(os.listdir(parts)) if os.path.isdir(parts) else ():
+        with open(os.path.join(parts, name), 'rb') as part:
+            parser.merge(pickle.load(part))
+    save_aggregates(pitch_file)
+    job.refresh_from_db(fields=['records_written'])
+    IngestJob.objects.filter(pk=job.pk).update(total_records=job.records_written)
+    return store_summary(pitch_file, parser, path)
+
+
+def upload_lock(job):
+    """Hold the parse lock of a chunked upload, waiting for a parse in progress"""
+    return _locked(job.upload_path)
+
+
+def drop_upload(job):
+    """Delete a chunked upload, its file and whatever was parsed from it"""
+    with _locked(job.upload_path):
+        delete_messages(job.pitch_file)
+        job.pitch_file.delete()
+    discard_upload(job)
+
+
+def discard_upload(job):
+    """Remove the spooled file of a job and everything kept alongside it"""
+    path = job.upload_path
+    shutil.rmtree(_parts_dir(path), ignore_errors=True)
+    for name in (path, _lock_path(path)):
+        if os.path.exists(name):
+            os.remove(name)
@@ -0,0 +1,396 @@
+"""
+Columnar storage of parsed messages.
+
+With ``PITCH_COLUMN_STORE`` enabled the messages of a file are not inserted
+into the message tables but written to a directory per file under
+``PITCH_COLUMN_STORE_DIR``, with one ``.npy`` file per column and message
+table::
+
+    <file id>/<kind>/<column>.npy
+
+Columns follow the fields of the message models:
+
+* integer fields are stored as integers, timestamps in nanoseconds and
+  prices in ticks of 1/``PRICE_SCALE``, as in the message tables;
+* text fields as codes into a dictionary of the column's distinct values,
+  kept as a UTF-8 blob (``<column>.strings``) with the offset of every value
+  (``<column>.offsets.npy``).
+
+Every column uses the smallest signed integer type that holds its values,
+and the smallest value of that type marks a missing one.
+
+Rows are appended as the file is parsed and the array headers are written
+once the row count is known, so writing needs memory for the dictionaries
+only. Tables whose messages are not in time order get ``by_time.npy`` with
+their row numbers newest first, for the message endpoints.
+"""
+import json
+import mmap
+import os
+import shutil
+import struct
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+from django.conf import settings
+from django.db import models
+
+from .models import MESSAGE_MODELS
+
+# Marks a missing value while columns are written; once a column has been
+# narrowed the smallest value of its type does
+NULL = np.iinfo(np.int64).min
+
+# Every column file starts with an .npy header padded to this size, so the
+# header can be rewritten in place once all rows have been appended
+HEADER_SIZE = 128
+
+# Rows converted at a time when a column is narrowed
+NARROW_ROWS = 1 << 20
+
+INTEGER = 'integer'
+TEXT = 'text'
+
+_NARROW_DTYPES = [np.dtype(name) for name in ('<i1', '<i2', '<i4', '<i8')]
+
+
+def store_path(pitch_file_id):
+    return os.path.join(settings.PITCH_COLUMN_STORE_DIR, str(pitch_file_id))
+
+
+def discard_columns(pitch_file_id):
+    """Remove the column store of a file, if it has one"""
+    shutil.rmtree(store_path(pitch_file_id), ignore_errors=True)
+
+
+def _encoding(field):
+    if isinstance(field, models.IntegerField):
+        return INTEGER
+    return TEXT
+
+
+def column_layout(model):
+    """``(name, encoding, default)`` of every stored column of a message model"""
+    return [
+        (field.name, _encoding(field), field.get_default())
+        for field in model._meta.concrete_fields
+        if not field.primary_key and field.name != 'pitch_file'
+    ]
+
+
+def _npy_header(dtype, rows):
+    text = repr({
+        'descr': np.lib.format.dtype_to_descr(dtype),
+        'fortran_order': False,
+        'shape': (rows,),
+    }).encode('latin1')
+    prefix = np.lib.format.MAGIC_PREFIX + b'\x01\x00'
+    length = HEADER_SIZE - len(prefix) - 2
+    return prefix + struct.pack('<H', length) + text.ljust(length - 1) + b'\n'
+
+
+class _ColumnFile:
+    """
+    An .npy file of a single column that rows are appended to.
+
+    Values are written as int64; ``close`` rewrites the column with the
+    smallest integer type that holds all of them.
+    """
+
+    def __init__(self, path, dtype=np.dtype('<i8')):
+        self.path = path
+        self.dtype = dtype
+        self.rows = 0
+        self.low = self.high = None
+        self.file = open(path, 'wb')
+        self.file.write(_npy_header(dtype, 0))
+
+    def append(self, values):
+        array = np.asarray(values, dtype=self.dtype)
+        self.file.write(array.tobytes())
+        self.rows += len(array)
+        present = array[array != NULL]
+        if len(present):
+            low, high = int(present.min()), int(present.max())
+            self.low = low if self.low is None else min(self.low, low)
+            self.high = high if self.high is None else max(self.high, high)
+
+    def close(self):
+        self.file.seek(0)
+        self.file.write(_npy_header(self.dtype, self.rows))
+        self.file.close()
+        dtype = next(
+            dtype for dtype in _NARROW_DTYPES
+            if self.low is None or np.iinfo(dtype).min < self.low and self.high <= np.iinfo(dtype).max
+        )
+        if dtype != self.dtype:
+            self._narrow(dtype)
+
+    def _narrow(self, dtype):
+        narrowed = _ColumnFile(self.path + '.narrow', dtype)
+        null = np.iinfo(dtype).min
+        with open(self.path, 'rb') as source:
+            source.seek(HEADER_SIZE)
+            while True:
+                array = np.frombuffer(source.read(NARROW_ROWS * self.dtype.itemsize), dtype=self.dtype)
+                if not len(array):
+                    break
+                narrowed.append(np.where(array == NULL, null, array).astype(dtype))
+        narrowed.file.seek(0)
+        narrowed.file.write(_npy_header(dtype, narrowed.rows))
+        narrowed.file.close()
+        os.replace(narrowed.path, self.path)
+
+
+def _write_dictionary(path, values):
+    blobs = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+    np.cumsum([len(blob) for blob in blobs], out=offsets[1:])
+    np.save(path + '.offsets.npy', offsets)
+    with open(path + '.strings', 'wb') as strings:
+        strings.write(b''.join(blobs))
+
+
+class _TableWriter:
+    def __init__(self, directory, model):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.layout = column_layout(model)
+        self.files = {
+            name: _ColumnFile(os.path.join(directory, name + '.npy'))
+            for name, encoding, default in self.layout
+        }
+        self.dictionaries = {name: {} for name, encoding, default in self.layout if encoding == TEXT}
+        self.last_timestamp = None
+        self.in_time_order = True
+
+    def write(self, records):
+        for name, encoding, default in self.layout:
+            values = [record.get(name, default) for record in records]
+            if encoding == TEXT:
+                codes = self.dictionaries[name]
+                values = [NULL if value is None else codes.setdefault(value, len(codes)) for value in values]
+            else:
+                values = [NULL if value is None else value for value in values]
+            if name == 'timestamp':
+                self._check_order(values)
+            self.files[name].append(values)
+
+    def _check_order(self, timestamps):
+        if self.in_time_order and timestamps:
+            if self.last_timestamp is not None and timestamps[0] < self.last_timestamp:
+                self.in_time_order = False
+            elif len(timestamps) > 1 and not (np.diff(timestamps) >= 0).all():
+                self.in_time_order = False
+            self.last_timestamp = timestamps[-1]
+
+    @property
+    def rows(self):
+        return self.files['timestamp'].rows
+
+    def close(self):
+        for column in self.files.values():
+            column.close()
+        for name, codes in self.dictionaries.items():
+            _write_dictionary(os.path.join(self.directory, name), codes)
+        if not self.in_time_order:
+            # Only tables whose messages are out of time order need an index
+            timestamps = np.load(os.path.join(self.directory, 'timestamp.npy'))
+            by_time = np.argsort(timestamps, kind='stable')[::-1]
+            np.save(os.path.join(self.directory, 'by_time.npy'), by_time.astype(np.int64))
+
+
+class ColumnWriter:
+    """Appends decoded records to the column store of a file"""
+
+    def __init__(self, pitch_file_id):
+        self.directory = store_path(pitch_file_id)
+        self.tables = {}
+
+    def write(self, kind, records):
+        table = self.tables.get(kind)
+        if table is None:
+            table = self.tables[kind] = _TableWriter(
+                os.path.join(self.directory, kind), MESSAGE_MODELS[kind]
+            )
+        table.write(records)
+
+    def close(self):
+        """Finish every column file; tables without rows get none"""
+        for table in self.tables.values():
+            table.close()
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, 'tables.json'), 'w') as index:
+            json.dump({
+                kind: {'rows': table.rows, 'in_time_order': table.in_time_order}
+                for kind, table in self.tables.items()
+            }, index)
+
+
+class _Dictionary:
+    def __init__(self, path):
+        self.offsets = np.load(path + '.offsets.npy')
+        with open(path + '.strings', 'rb') as strings:
+            size = os.fstat(strings.fileno()).st_size
+            self.strings = mmap.mmap(strings.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self._codes = None
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def decode(self, codes):
+        """The values of a sequence of codes; negative codes decode to None"""
+        codes = np.asarray(codes, dtype=np.int64)
+        if not len(self):
+            # Columns without values hold missing ones only
+            return [None] * len(codes)
+        found = np.maximum(codes, 0)
+        starts = self.offsets[found].tolist()
+        ends = self.offsets[found + 1].tolist()
+        strings = self.strings
+        return [
+            strings[start:end].decode('utf-8') if code >= 0 else None
+            for code, start, end in zip(codes.tolist(), starts, ends)
+        ]
+
+    def code(self, value):
+        """The code of ``value``, or None if the column never holds it"""
+        if self._codes is None:
+            self._codes = dict(zip(self.decode(np.arange(len(self))), range(len(self))))
+        return self._codes.get(value)
+
+
+class ColumnTable:
+    """
+    The messages of one table of a file's column store.
+
+    Behaves as a read-only sequence of message dicts, ordered newest first,
+    so it can be paginated like a queryset. ``filter`` and ``select`` narrow
+    it down to the rows matching some conditions.
+    """
+
+    def __init__(self, directory, model, rows=0, in_time_order=True):
+        self.directory = directory
+        self.model = model
+        self.layout = column_layout(model)
+        self.rows = rows
+        self.in_time_order = in_time_order
+        # Row numbers of the selected rows, newest first, once filtered
+        self.selected = None
+        self._columns = {}
+        self._dictionaries = {}
+
+    def column(self, name):
+        """The stored values of a column, memory mapped"""
+        if name not in self._columns:
+            path = os.path.join(self.directory, name + '.npy')
+            self._columns[name] = np.load(path, mmap_mode='r') if self.rows else np.zeros(0, np.int64)
+        return self._columns[name]
+
+    def dictionary(self, name):
+        if name not in self._dictionaries:
+            self._dictionaries[name] = _Dictionary(os.path.join(self.directory, name))
+        return self._dictionaries[name]
+
+    def records(self, indices):
+        """Decode the rows at ``indices`` into message dicts"""
+        indices = np.asarray(indices, dtype=np.int64)
+        records = [{'id': int(index) + 1} for index in indices]
+        for name, encoding, default in self.layout:
+            column = self.column(name)
+            null = np.iinfo(column.dtype).min
+            if encoding == TEXT:
+                values = self.dictionary(name).decode(column[indices])
+            else:
+                values = [None if value == null else value for value in column[indices].tolist()]
+            for record, value in zip(records, values):
+                record[name] = value
+        return records
+
+    def mask(self, conditions):
+        """
+        Mask of the rows matching every ``(name, lookup, value)`` condition.
+        Lookups are ``exact``, ``gte``, ``lte`` and, for integer columns,
+        ``in`` with an array of values. Text columns are compared by value
+        and, as in the database, missing values never match.
+        """
+        encodings = {name: encoding for name, encoding, default in self.layout}
+        mask = np.ones(self.rows, dtype=bool)
+        for name, lookup, value in conditions:
+            column = self.column(name)
+            if encodings[name] == TEXT:
+                value = self.dictionary(name).code(value) if self.rows else None
+                if value is None:
+                    mask[:] = False
+                    continue
+            mask &= column != np.iinfo(column.dtype).min
+            if lookup == 'exact':
+                mask &= column == value
+            elif lookup == 'in':
+                mask &= np.isin(column, value)
+            elif lookup == 'gte':
+                mask &= column >= value
+            else:
+                mask &= column <= value
+        return mask
+
+    def select(self, mask):
+        """The selected rows that are set in ``mask``, as a table of their own"""
+        table = ColumnTable(self.directory, self.model, self.rows, self.in_time_order)
+        table._columns = self._columns
+        table._dictionaries = self._dictionaries
+        if self.selected is None and self.in_time_order:
+            table.selected = np.flatnonzero(mask)[::-1]
+        else:
+            order = np.asarray(self.newest_first(slice(None)))
+            table.selected = order[mask[order]]
+        return table
+
+    def filter(self, conditions):
+        """The rows matching every condition of ``mask``, as a table of their own"""
+        return self.select(self.mask(conditions))
+
+    def newest_first(self, key):
+        """Row numbers of the rows at ``key`` (an index or slice), newest first"""
+        if self.selected is not None:
+            return self.selected[key]
+        if self.in_time_order:
+            return range(self.rows - 1, -1, -1)[key]
+        return self.column('by_time')[key]
+
+    def position(self, timestamp, pk, inclusive=False):
+        """
+        Number of rows newer than the row keyed ``(timestamp, pk)``, found by
+        binary search over the newest first order. With ``inclusive`` the
+        row itself counts as newer.
+        """
+        timestamps = self.column('timestamp')
+
+        def key(position):
+            row = int(self.newest_first(position))
+            return -int(timestamps[row]), -(row + 1)
+
+        search = bisect_right if inclusive else bisect_left
+        return search(range(len(self)), (-timestamp, -pk), key=key)
+
+    def __len__(self):
+        return self.rows if self.selected is None else len(self.selected)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.records(self.newest_first(key))
+        return self.records([self.newest_first(key)])[0]
+
+
+class ColumnStore:
+    """Read access to the column store of a file"""
+
+    def __init__(self, pitch_file_id):
+        self.directory = store_path(pitch_file_id)
+        with open(os.path.join(self.directory, 'tables.json')) as index:
+            self.tables = json.load(index)
+
+    def table(self, kind):
+        return ColumnTable(
+            os.path.join(self.directory, kind), MESSAGE_MODELS[kind], **self.tables.get(kind, {})
+        )
@@ -0,0 +1,49 @@
+"""
+Streaming decompression of compressed PITCH uploads.
+
+gzip, bzip2 and xz archives are read with the standard library; Zstandard
+archives need the optional ``zstandard`` package. Archives are opened as
+file-like readers of decompressed bytes, which ``streaming.parse_stream``
+consumes block by block, so the decompressed file is never held in memory or
+written to disk as a whole.
+"""
+import bz2
+import gzip
+import lzma
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Leading bytes of every supported archive format
+COMPRESSION_MAGIC = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+)
+
+
+def detect_compression(head):
+    """Return the compression format of a file from its first bytes, or None"""
+    for magic, compression in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def open_decompressed(fileobj, compression):
+    """Wrap a binary file object in a reader returning decompressed bytes"""
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=fileobj, mode='rb')
+    if compression == 'bz2':
+        return bz2.BZ2File(fileobj, mode='rb')
+    if compression == 'xz':
+        return lzma.LZMAFile(fileobj, mode='rb')
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ValueError("Zstandard uploads require the zstandard package")
+        return zstandard.ZstdDecompressor().stream_reader(fileobj, read_across_frames=True)
+    raise ValueError(f"Unsupported compression format: {compression}")
+
@@ -0,0 +1,111 @@
+"""
+Deduplication of repeat uploads.
+
+Every upload is identified by the SHA-256 digest of its bytes. When the
+uploader has already ingested identical bytes, the job of that earlier
+upload is returned instead of parsing the file again. With
+``PITCH_DEDUP_SCOPE`` set to ``'global'``, identical bytes ingested by
+another user are reused too: the upload becomes an alias, a ``PitchFile``
+of its own with copies of the summary rows that shares the stored messages
+of the earlier file. ``'off'`` disables deduplication. Deleting the earlier
+file leaves its messages in place for as long as aliases share them.
+"""
+import hashlib
+
+from django.db import transaction
+from django.conf import settings
+from django.utils import timezone
+
+from .models import PitchFile, IngestJob, MessageType, Symbol, DistinctSketch
+
+# Bytes read at a time when hashing a file on disk
+DIGEST_BLOCK_SIZE = 1024 * 1024
+
+
+def content_digest(chunks):
+    """SHA-256 hex digest of the concatenated ``chunks``"""
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_digest(path):
+    with open(path, 'rb') as file:
+        return content_digest(iter(lambda: file.read(DIGEST_BLOCK_SIZE), b''))
+
+
+def find_duplicate(user, digest, size):
+    """Return an ingested file with the given content visible to ``user``"""
+    scope = settings.PITCH_DEDUP_SCOPE
+    if scope == 'off':
+        return None
+    files = PitchFile.objects.visible().filter(
+        content_sha256=digest, file_size=size, status=PitchFile.STATUS_COMPLETED
+    ).order_by('pk')
+    duplicate = files.filter(uploaded_by=user).first()
+    if duplicate is None and scope == 'global':
+        duplicate = files.first()
+    return duplicate
+
+
+@transaction.atomic
+def create_alias(source, user, file_name):
+    """Create a completed upload of ``user`` sharing the messages of ``source``"""
+    source = source.message_source
+    alias = PitchFile.objects.create(
+        file_name=file_name,
+        uploaded_by=user,
+        file_size=source.file_size,
+        total_lines=source.total_lines,
+        unique_symbols_count=source.unique_symbols_count,
+        unique_order_ids_count=source.unique_order_ids_count,
+        unique_execution_ids_count=source.unique_execution_ids_count,
+        status=PitchFile.STATUS_COMPLETED,
+        storage=source.storage,
+        content_sha256=source.content_sha256,
+        alias_of=source,
+        message_table_counts=source.message_table_counts,
+    )
+    MessageType.objects.bulk_create([
+        MessageType(pitch_file=alias, message_type=message_type.message_type, count=message_type.count)
+        for message_type in source.message_types.all()
+    ])
+    Symbol.objects.bulk_create([
+        Symbol(pitch_file=alias, symbol_id=symbol.symbol_id)
+        for symbol in source.symbols.all()
+    ])
+    DistinctSketch.objects.bulk_create([
+        DistinctSketch(pitch_file=alias, field=sketch.field, precision=sketch.precision, registers=sketch.registers)
+        for sketch in source.sketches.all()
+    ])
+    source_job = IngestJob.objects.filter(pitch_file=source).first()
+    now = timezone.now()
+    return IngestJob.objects.create(
+        pitch_file=alias,
+        total_bytes=source.file_size,
+        received_bytes=source.file_size,
+        processed_bytes=source.file_size,
+        lines_processed=source.total_lines,
+        total_records=source_job.total_records if source_job else 0,
+        records_written=source_job.records_written if source_job else 0,
+        result=source_job.result if source_job else None,
+        started_at=now,
+        finished_at=now,
+    )
+
+
+def reuse_upload(user, digest, size, file_name):
+    """
+    Return the ingest job serving an upload of already ingested bytes.
+
+    Returns None if the bytes are new to ``user``, in which case the upload
+    has to be ingested.
+    """
+    duplicate = find_duplicate(user, digest, size)
+    if duplicate is None:
+        return None
+    if duplicate.uploaded_by_id == user.pk:
+        return IngestJob.objects.select_related('pitch_file').get(pitch_file=duplicate)
+    return create_alias(duplicate, user, file_name)
+
@@ -0,0 +1,135 @@
+"""
+Bulk export of message tables.
+
+The messages of one table of a file are streamed oldest first, as CSV or as
+newline-delimited JSON, and optionally gzip-compressed on the fly. Rows are
+read ``PITCH_EXPORT_CHUNK_SIZE`` at a time, with
+``values_list().iterator()`` from the message tables or by row number from
+the column store, and rendered without serializers: symbols, IDs and prices
+are converted a chunk at a time, the way the API renders them. Memory use is
+bounded by a chunk, however many rows the table holds.
+"""
+import csv
+import io
+import json
+import zlib
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
+
+from .columns import ColumnTable
+from .ids import format_ids
+from .serializers import IdField, PriceField, SymbolField
+from .symbols import symbol_name
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Compression level of gzipped exports, favouring speed over size
+GZIP_LEVEL = 1
+
+# Kinds of exported columns that are converted before they are rendered
+SYMBOL, ID, PRICE = 'symbol', 'id', 'price'
+
+
+def _ids(values):
+    present = np.array([0 if value is None else value for value in values], dtype=np.int64)
+    return [None if value is None else text for value, text in zip(values, format_ids(present).tolist())]
+
+
+def _prices(values):
+    render = PriceField().to_representation
+    return [None if value is None else render(value) for value in values]
+
+
+_CONVERTERS = {ID: _ids, PRICE: _prices}
+
+
+def export_columns(serializer):
+    """
+    ``(name, kind)`` of every column of an export, following the fields of
+    the serializer of the message endpoint.
+    """
+    columns = []
+    for name, field in serializer.fields.items():
+        if isinstance(field, SymbolField):
+            columns.append((name, SYMBOL))
+        elif isinstance(field, IdField):
+            columns.append((name, ID))
+        elif isinstance(field, PriceField):
+            columns.append((name, PRICE))
+        else:
+            columns.append((name, None))
+    return columns
+
+
+def _database_chunks(messages, columns, size):
+    """Chunks of rows of a queryset, as lists of column values"""
+    fields = [f'{name}_id' if kind == SYMBOL else name for name, kind in columns]
+    rows = messages.order_by('timestamp', 'id').values_list(*fields).iterator(chunk_size=size)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield [
+            [symbol_name(value) for value in values] if kind == SYMBOL else list(values)
+            for values, (name, kind) in zip(zip(*chunk), columns)
+        ]
+
+
+def _column_chunks(table, columns, size):
+    """Chunks of rows of a column store table, as lists of column values"""
+    order = table.newest_first(slice(None))[::-1]
+    for start in range(0, len(order), size):
+        records = table.records(order[start:start + size])
+        yield [[record[name] for record in records] for name, kind in columns]
+
+
+def _csv(columns, chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, kind in columns])
+    yield buffer.getvalue()
+    for chunk in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(zip(*chunk))
+        yield buffer.getvalue()
+
+
+def _ndjson(columns, chunks):
+    names = [name for name, kind in columns]
+    encode = json.JSONEncoder(separators=(',', ':')).encode
+    for chunk in chunks:
+        yield ''.join(encode(dict(zip(names, values))) + '\n' for values in zip(*chunk))
+
+
+def _gzip(blocks):
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_messages(messages, columns, export_format, compress=False):
+    """
+    Stream the rows of ``messages``, a queryset or a column store table, as
+    blocks of bytes in ``export_format``, gzip-compressed if ``compress``.
+    """
+    size = settings.PITCH_EXPORT_CHUNK_SIZE
+    if isinstance(messages, ColumnTable):
+        chunks = _column_chunks(messages, columns, size)
+    else:
+        chunks = _database_chunks(messages, columns, size)
+    chunks = (
+        [_CONVERTERS[kind](values) if kind in _CONVERTERS else values for values, (name, kind) in zip(chunk, columns)]
+        for chunk in chunks
+    )
+    render = _csv if export_format == 'csv' else _ndjson
+    blocks = (text.encode('utf-8') for text in render(columns, chunks))
+    return _gzip(blocks) if compress else blocks
@@ -0,0 +1,60 @@
+"""
+Order and execution IDs.
+
+PITCH IDs are base-36 numbers: 12 characters in the ASCII feed and unsigned
+64-bit integers in binary captures. They are decoded into integers and
+stored in BIGINT columns. IDs of 2 ** 63 and above, which only binary
+captures can carry, wrap around to negative values so that every ID fits a
+signed 64-bit column; ``format_id`` undoes the wrap and renders IDs the way
+the feed does, as at least 12 uppercase base-36 digits. The module has no
+Django dependencies, like the parsers that use it.
+"""
+import numpy as np
+
+# Digits of an ID in the ASCII feed
+ID_WIDTH = 12
+
+_DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+_DIGIT_BYTES = np.frombuffer(_DIGITS.encode(), dtype=np.uint8)
+_RANGE = 1 << 64
+_SIGNED_LIMIT = 1 << 63
+
+
+def parse_id(text):
+    """The stored integer of a base-36 ID, or None if ``text`` is not one"""
+    if not text or not text.isascii() or not text.isalnum():
+        return None
+    value = int(text, 36)
+    if value >= _RANGE:
+        return None
+    return value - _RANGE if value >= _SIGNED_LIMIT else value
+
+
+def format_id(value):
+    """Render a stored ID as base-36 digits, zero-padded to ``ID_WIDTH``"""
+    if value is None:
+        return None
+    value %= _RANGE
+    digits = ''
+    while value or len(digits) < ID_WIDTH:
+        value, digit = divmod(value, 36)
+        digits = _DIGITS[digit] + digits
+    return digits
+
+
+def format_ids(values):
+    """``format_id`` of every stored ID of an integer array, as a string array"""
+    values = np.asarray(values, dtype=np.int64).view(np.uint64)
+    digits = np.empty((len(values), ID_WIDTH), dtype=np.uint8)
+    remaining = values.copy()
+    for position in range(ID_WIDTH - 1, -1, -1):
+        digits[:, position] = _DIGIT_BYTES[remaining % np.uint64(36)]
+        remaining //= np.uint64(36)
+    column = digits.view(f'S{ID_WIDTH}').ravel().astype(f'U{ID_WIDTH}')
+    longer = np.flatnonzero(remaining)
+    if len(longer):
+        # Only binary IDs of 36 ** 12 and above take a 13th digit
+        column = column.astype(f'U{ID_WIDTH + 1}')
+        for index in longer.tolist():
+            column[index] = format_id(int(values[index]))
+    return column
@@ -0,0 +1,286 @@
+"""
+Parsing and storage of uploaded PITCH files.
+
+Uploads are spooled to disk before they are ingested and are streamed from
+there in blocks of ``PITCH_PARSE_BLOCK_SIZE`` bytes. The records of every
+block go through fixed-size per-table buffers that are written as soon as
+they fill, so memory use stays flat however large the file is; only the
+counts and unique IDs of the whole file are kept until the end.
+"""
+import logging
+import math
+import os
+import resource
+
+from django.conf import settings
+
+from .parser import PitchParser, extract_fallback_order_ids
+from .parallel import iter_parallel
+from .binary import SNIFF_SIZE, is_binary
+from .bulk import load_records
+from .columns import ColumnWriter, discard_columns
+from .bars import PriceBars
+from .lifecycle import save_lifecycles
+from .compressed import detect_compression, open_decompressed
+from .streaming import parse_stream
+from .vectorized import parse_buffer
+from .models import PitchFile, MessageType, Symbol, DistinctSketch, MESSAGE_MODELS, DERIVED_MODELS
+from .sketches import HyperLogLog
+from .symbols import symbol_ids
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_lines(data):
+    return PitchParser().feed_lines(data.splitlines())
+
+
+def parse_blocks(path):
+    """
+    Parse a PITCH file on disk block by block.
+
+    Yields ``(position, parser)`` for every block in file order, where
+    ``position`` is the number of bytes of the file consumed so far.
+
+    Compressed files (gzip, bzip2, xz, Zstandard) are recognised by their
+    magic bytes and decompressed incrementally; binary captures are detected
+    from their first bytes. Uncompressed ASCII files of at least
+    ``PITCH_PARALLEL_MIN_SIZE`` bytes are parsed by ``PITCH_PARSE_WORKERS``
+    processes, a few blocks ahead of the consumer. Other ASCII blocks are
+    decoded column-wise if the file has at least ``PITCH_VECTORIZED_MIN_SIZE``
+    bytes, or line by line if it is smaller.
+    """
+    size = os.path.getsize(path)
+    block_size = settings.PITCH_PARSE_BLOCK_SIZE
+    with open(path, 'rb') as file:
+        head = file.read(SNIFF_SIZE)
+        file.seek(0)
+        compression = detect_compression(head)
+
+        workers = settings.PITCH_PARSE_WORKERS
+        if (compression is None and not is_binary(head)
+                and workers > 1 and size >= settings.PITCH_PARALLEL_MIN_SIZE):
+            count = max(workers, math.ceil(size / block_size))
+            yield from iter_parallel(path, workers, count)
+            return
+
+        threshold = settings.PITCH_VECTORIZED_MIN_SIZE
+        decode = parse_buffer if threshold and size >= threshold else _parse_lines
+        if compression is None:
+            stream = file
+        else:
+            stream = open_decompressed(file, compression)
+            # Compressed files are small next to what they decode to
+            decode = parse_buffer
+        with stream:
+            for parser in parse_stream(stream, block_size, decode):
+                yield file.tell(), parser
+
+
+def path_lines(path):
+    """Iterate over the raw lines of a file, decompressing if needed"""
+    with open(path, 'rb') as file:
+        compression = detect_compression(file.read(SNIFF_SIZE))
+        file.seek(0)
+        lines = file if compression is None else open_decompressed(file, compression)
+        yield from lines
+
+
+class RecordBuffer:
+    """
+    Fixed-size buffers of decoded records, one per message table.
+
+    A buffer is written as soon as it holds ``flush_size`` records, with the
+    configured bulk loader or, if given, by calling ``writer(kind, records)``.
+    ``progress`` is called as ``progress(written=count)`` after every write.
+    """
+
+    def __init__(self, pitch_file, flush_size, progress=None, written=0, writer=None):
+        self.pitch_file = pitch_file
+        self.flush_size = flush_size
+        self.progress = progress
+        self.written = written
+        self.writer = writer
+        self.buffers = {kind: [] for kind in MESSAGE_MODELS}
+
+    def extend(self, kind, records):
+        buffer = self.buffers[kind]
+        buffer.extend(records)
+        if len(buffer) >= self.flush_size:
+            full = len(buffer) - len(buffer) % self.flush_size
+            for i in range(0, full, self.flush_size):
+                self._write(kind, buffer[i:i + self.flush_size])
+            del buffer[:full]
+
+    def flush(self):
+        """Write whatever the buffers still hold"""
+        for kind, buffer in self.buffers.items():
+            if buffer:
+                self._write(kind, buffer)
+                buffer.clear()
+
+    def _write(self, kind, records):
+        if self.writer is not None:
+            self.writer(kind, records)
+        else:
+            load_records(MESSAGE_MODELS[kind], self.pitch_file, records)
+        self.written += len(records)
+        if self.progress is not None:
+            self.progress(written=self.written)
+
+
+def save_aggregates(pitch_file):
+    """
+    Build and store the order lifecycles and bars of a file whose messages
+    have all been stored, reading them back from the file's storage.
+    """
+    bars = PriceBars().add_trades(pitch_file)
+    save_lifecycles(pitch_file, bars.add)
+    bars.save(pitch_file)
+
+
+def store_records(pitch_file, records, progress=None, written=0):
+    """
+    Bulk create the decoded records of ``pitch_file``.
+
+    ``records`` maps record kinds to lists of records. Returns the number of
+    rows written in total, counting from ``written``.
+    """
+    buffer = RecordBuffer(pitch_file, settings.PITCH_INGEST_FLUSH_SIZE, progress, written)
+    for kind, kind_records in records.items():
+        buffer.extend(kind, kind_records)
+    buffer.flush()
+    return buffer.written
+
+
+def delete_messages(pitch_file):
+    """Delete the stored messages of ``pitch_file``, wherever they are kept"""
+    for model in [*MESSAGE_MODELS.values(), *DERIVED_MODELS]:
+        model.objects.filter(pitch_file=pitch_file).delete()
+    discard_columns(pitch_file.pk)
+
+
+def store_summary(pitch_file, parser, path):
+    """
+    Save the counts, unique IDs and symbols collected by ``parser``.
+
+    Returns the result reported to clients: message counts, summary and a
+    sample of symbols. Sketches of the symbols and IDs are saved as well, in
+    either counting mode.
+    """
+    message_counts = parser.message_counts
+    order_ids = parser.order_ids
+    symbols_seen = parser.symbols
+
+    # If no messages were processed, add at least one category
+    if not message_counts:
+        message_counts["No PITCH Messages Found"] = 1
+
+    # If we have order IDs but they weren't properly detected during processing,
+    # make a special attempt to extract them
+    if len(order_ids) == 0 and parser.line_count > 0 and parser.format == 'ascii':
+        order_ids.update(extract_fallback_order_ids(path_lines(path)))
+
+    # Add summary information
+    summary = parser.summary()
+    logger.info(f"Processed {pitch_file.file_name}: {summary}")
+
+    # Update the PitchFile record with final counts
+    pitch_file.total_lines = parser.line_count
+    pitch_file.unique_symbols_count = len(symbols_seen)
+    pitch_file.unique_order_ids_count = len(order_ids)
+    pitch_file.unique_execution_ids_count = len(parser.execution_ids)
+    pitch_file.message_table_counts = parser.record_counts
+    # Only the summary, so that a deletion during the ingest is kept
+    pitch_file.save(update_fields=[
+        'total_lines', 'unique_symbols_count', 'unique_order_ids_count',
+        'unique_execution_ids_count', 'message_table_counts',
+    ])
+
+    # Save message types and counts
+    MessageType.objects.bulk_create([
+        MessageType(pitch_file=pitch_file, message_type=message_type, count=count)
+        for message_type, count in message_counts.items()
+    ])
+
+    # Save sketches of the distinct values, so they can be counted across files
+    DistinctSketch.objects.bulk_create([
+        DistinctSketch(pitch_file=pitch_file, field=field, precision=sketch.precision, registers=sketch.to_bytes())
+        for field, sketch in (
+            (DistinctSketch.FIELD_SYMBOL, HyperLogLog.of(symbols_seen)),
+            (DistinctSketch.FIELD_ORDER_ID, HyperLogLog.of(order_ids)),
+            (DistinctSketch.FIELD_EXECUTION_ID, HyperLogLog.of(parser.execution_ids)),
+        )
+    ])
+
+    # Save every symbol of the file, as its ID in the symbol dictionary
+    ids = symbol_ids(symbols_seen)
+    Symbol.objects.bulk_create([
+        Symbol(pitch_file=pitch_file, symbol_id=ids[symbol])
+        for symbol in symbols_seen
+    ])
+
+    return {
+        'message_counts': message_counts,
+        'summary': summary,
+        'symbols': list(symbols_seen)[:100]  # Include up to 100 symbols
+    }
+
+
+def ingest_file(pitch_file, path, progress=None):
+    """
+    Parse the file at ``path`` and store its messages under ``pitch_file``.
+
+    ``progress`` is called as ``progress(lines, position)`` after every block,
+    with ``progress(written=count)`` whenever rows are written and with the
+    total number of rows at the end. Returns the result of ``store_summary``.
+
+    With ``PITCH_COLUMN_STORE`` enabled the messages go to the file's column
+    store instead of the message tables. Order lifecycles and bars are always
+    saved to their tables.
+    """
+    columns = ColumnWriter(pitch_file.pk) if settings.PITCH_COLUMN_STORE else None
+    buffer = RecordBuffer(
+        pitch_file, settings.PITCH_INGEST_FLUSH_SIZE, progress,
+        writer=columns.write if columns is not None else None
+    )
+    parser = PitchParser()
+    for index, (position, block) in enumerate(parse_blocks(path)):
+        for kind, records in block.records.items():
+            buffer.extend(kind, records)
+        # Only the counts and IDs of a block outlive it
+        block.drop_records()
+        parser = block if index == 0 else parser.merge(block)
+        if progress is not None:
+            progress(parser.line_count, position)
+    buffer.flush()
+    if columns is not None:
+        columns.close()
+        pitch_file.storage = PitchFile.STORAGE_COLUMNS
+        PitchFile.objects.filter(pk=pitch_file.pk).update(storage=pitch_file.storage)
+    save_aggregates(pitch_file)
+    if progress is not None:
+        progress(total=buffer.written)
+    return store_summary(pitch_file, parser, path)
+
+
+def reset_peak_memory():
+    """Start measuring peak memory of this process afresh, where supported"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+    except OSError:
+        pass
+
+
+def peak_memory():
+    """Peak resident set size of this process in bytes"""
+    try:
+        with open('/proc/self/status') as process_status:
+            for line in process_status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # Without /proc this is the peak over the lifetime of the process
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
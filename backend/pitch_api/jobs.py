@@ -0,0 +1,173 @@
+"""
+Background execution of PITCH ingest jobs.
+
+Uploads are spooled to ``PITCH_UPLOAD_DIR`` and ingested by a pool of
+``PITCH_INGEST_WORKERS`` processes, so the web worker that accepted an upload
+is free again as soon as the file is on disk. Workers report progress on the
+``IngestJob`` row, which ``/api/jobs/<id>/`` reads.
+"""
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.db import connections
+from django.utils import timezone
+
+from .chunked import discard_upload, finish_upload, parse_received
+from .ingest import delete_messages, ingest_file, peak_memory, reset_peak_memory
+from .models import IngestJob, PitchFile
+from .purge import purge_deleted_files
+
+logger = logging.getLogger(__name__)
+
+# Minimum number of seconds between two progress updates of a job
+PROGRESS_INTERVAL = 0.5
+
+_executor = None
+
+
+class JobProgress:
+    """Collects progress callbacks of an ingest and saves them periodically"""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.fields = {}
+        self.saved_at = 0.0
+
+    def __call__(self, lines=None, position=None, written=None, total=None):
+        for name, value in (
+            ('lines_processed', lines), ('processed_bytes', position),
+            ('records_written', written), ('total_records', total),
+        ):
+            if value is not None:
+                self.fields[name] = value
+        if time.monotonic() - self.saved_at >= PROGRESS_INTERVAL:
+            self.save()
+
+    def save(self):
+        if self.fields:
+            IngestJob.objects.filter(pk=self.job_id).update(**self.fields)
+            self.fields = {}
+        self.saved_at = time.monotonic()
+
+
+def spool_upload(uploaded_file, path):
+    """Store an upload at ``path`` so it outlives the request"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if hasattr(uploaded_file, 'temporary_file_path'):
+        # Large uploads are already on disk; move them instead of copying
+        file_move_safe(uploaded_file.temporary_file_path(), path)
+        return
+    with open(path, 'wb') as destination:
+        for chunk in uploaded_file.chunks():
+            destination.write(chunk)
+
+
+def run_job(job_id):
+    """Ingest the spooled upload of a job and record the outcome"""
+    job = IngestJob.objects.select_related('pitch_file').get(pk=job_id)
+    pitch_file = job.pitch_file
+    pitch_file.status = PitchFile.STATUS_PROCESSING
+    PitchFile.objects.filter(pk=pitch_file.pk).update(status=pitch_file.status)
+    IngestJob.objects.filter(pk=job_id, started_at__isnull=True).update(started_at=timezone.now())
+
+    progress = JobProgress(job_id)
+    reset_peak_memory()
+    try:
+        if job.chunked:
+            result = finish_upload(pitch_file, job, progress)
+        else:
+            result = ingest_file(pitch_file, job.upload_path, progress)
+    except Exception as e:
+        logger.exception(f"Error processing file {pitch_file.file_name}: {str(e)}")
+        progress.save()
+        IngestJob.objects.filter(pk=job_id).update(
+            error=f'Error processing file: {str(e)}', finished_at=timezone.now(),
+            peak_memory_bytes=peak_memory()
+        )
+        PitchFile.objects.filter(pk=pitch_file.pk).update(status=PitchFile.STATUS_FAILED)
+        # Leave no partial data behind
+        delete_messages(pitch_file)
+        _purge_if_deleted(pitch_file)
+        return
+    finally:
+        discard_upload(job)
+
+    progress.save()
+    memory = peak_memory()
+    logger.info(f"Ingested {pitch_file.file_name} with a peak memory use of {memory / 2**20:.1f} MB")
+    IngestJob.objects.filter(pk=job_id).update(
+        result=result, processed_bytes=job.total_bytes, finished_at=timezone.now(),
+        peak_memory_bytes=memory
+    )
+    PitchFile.objects.filter(pk=pitch_file.pk).update(status=PitchFile.STATUS_COMPLETED)
+    _purge_if_deleted(pitch_file)
+
+
+def _purge_if_deleted(pitch_file):
+    """Purge a file that was deleted while it was being ingested"""
+    if PitchFile.objects.filter(pk=pitch_file.pk, deleted_at__isnull=False).exists():
+        purge_deleted_files()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # Forked workers inherit the configured Django project
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.PITCH_INGEST_WORKERS,
+            mp_context=multiprocessing.get_context('fork'),
+        )
+    return _executor
+
+
+def _submit(function, *args):
+    """Run ``function`` on the worker pool, or right away without one"""
+    global _executor
+    if settings.PITCH_INGEST_WORKERS < 1:
+        function(*args)
+        return
+    # Workers are forked on demand and must not share our database connection
+    connections.close_all()
+    try:
+        _get_executor().submit(function, *args)
+    except BrokenProcessPool:
+        logger.warning("Ingest worker pool was broken, starting a new one")
+        _executor = None
+        _get_executor().submit(function, *args)
+
+
+def submit(job):
+    """Queue the ingest of a job's spooled upload"""
+    _submit(run_job, job.pk)
+
+
+def submit_chunks(job):
+    """Queue parsing of the chunks a chunked upload has received so far"""
+    _submit(_parse_chunks, job.pk)
+
+
+def submit_purge():
+    """Queue the purge of deleted files"""
+    _submit(_purge)
+
+
+def _purge():
+    try:
+        purge_deleted_files()
+    except Exception as e:
+        # Whatever is left is purged along with the next deleted file
+        logger.exception(f"Error purging deleted files: {str(e)}")
+
+
+def _parse_chunks(job_id):
+    try:
+        parse_received(job_id)
+    except Exception as e:
+        # The chunks are parsed again when the upload is committed
+        logger.exception(f"Error parsing chunks of job {job_id}: {str(e)}")
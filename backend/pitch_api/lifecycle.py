@@ -0,0 +1,192 @@
+"""
+Order lifecycles.
+
+The lifecycle of an order sums up what a file says about it: the symbol,
+side and size of its Add Order message, the shares executed and canceled
+since, the shares still resting at the end of the file and the timestamps
+of its first and last messages. Lifecycles are built once the messages of a
+file have been stored, by reading its order messages back sorted by order
+ID: one order is followed at a time, so memory use stays flat however many
+orders the file holds. They are saved as ``OrderLifecycle`` rows, so
+following an order takes a single indexed lookup.
+
+The same pass resolves Order Executed messages, which carry neither symbol
+nor price, to the symbol and price of the order they executed.
+"""
+import heapq
+
+import numpy as np
+from django.db import connection
+
+from .book import ADD, MODIFY, EXECUTE, CANCEL, DELETE, ORDER_EXECUTED
+from .bulk import load_batches
+from .columns import ColumnStore
+from .models import (
+    PitchFile, Ticker, AddOrderMessage, ModifyOrderMessage, CancelOrderMessage, DeleteOrderMessage,
+    TradeMessage, OrderLifecycle,
+)
+
+# Fields of a lifecycle entry
+SYMBOL, SIDE, QUANTITY, EXECUTED, CANCELED, BASE, TAKEN, FIRST, LAST, PRICE = range(10)
+
+# Rows read from the database or decoded from the column store at a time
+FETCH_SIZE = 10000
+
+
+def _database_events(pitch_file):
+    """Order events read from the message tables"""
+    quote = connection.ops.quote_name
+
+    def messages(model, action, *fields, message_type=None):
+        # Rows come out of the database shaped as events, so they are merged
+        # as plain tuples
+        table = quote(model._meta.db_table)
+        columns = [f'{table}.{quote(model._meta.get_field(name).column)}' for name in fields]
+        joins = ''
+        if 'symbol' in fields:
+            ticker = quote(Ticker._meta.db_table)
+            columns[fields.index('symbol')] = f'{ticker}.{quote("symbol")}'
+            joins = f' LEFT JOIN {ticker} ON {ticker}.{quote("id")} = {table}.{quote("symbol_id")}'
+        order_id, timestamp, pk = (f'{table}.{quote(name)}' for name in ('order_id', 'timestamp', 'id'))
+        sql = (
+            f'SELECT {", ".join([order_id, timestamp, str(action), pk, *columns])} FROM {table}{joins}'
+            f' WHERE {table}.{quote("pitch_file_id")} = %s AND {order_id} IS NOT NULL'
+        )
+        params = [pitch_file.pk]
+        if message_type is not None:
+            sql += f' AND {table}.{quote("message_type")} = %s'
+            params.append(message_type)
+        # A server-side cursor where the database has them, as for iterator()
+        with connection.chunked_cursor() as cursor:
+            cursor.execute(sql + f' ORDER BY {order_id}, {timestamp}, {pk}', params)
+            while True:
+                rows = cursor.fetchmany(FETCH_SIZE)
+                if not rows:
+                    return
+                yield from rows
+
+    return [
+        messages(AddOrderMessage, ADD, 'symbol', 'side', 'quantity', 'price'),
+        messages(ModifyOrderMessage, MODIFY, 'modified_shares', 'price'),
+        messages(TradeMessage, EXECUTE, 'executed_shares', 'price', message_type=ORDER_EXECUTED),
+        messages(CancelOrderMessage, CANCEL, 'canceled_shares'),
+        messages(DeleteOrderMessage, DELETE),
+    ]
+
+
+def _column_events(pitch_file):
+    """Order events read from the column store"""
+    store = ColumnStore(pitch_file.pk)
+
+    def messages(kind, action, names, message_type=None):
+        table = store.table(kind)
+        if not table.rows:
+            return
+        order_ids = table.column('order_id')
+        mask = order_ids != np.iinfo(order_ids.dtype).min
+        if message_type is not None:
+            mask &= table.mask([('message_type', 'exact', message_type)])
+        rows = np.flatnonzero(mask)
+        rows = rows[np.lexsort((rows, table.column('timestamp')[rows], order_ids[rows]))]
+        fields = ['order_id', 'timestamp', 'id', *names]
+        for start in range(0, len(rows), FETCH_SIZE):
+            for record in table.records(rows[start:start + FETCH_SIZE]):
+                order_id, timestamp, pk, *values = map(record.get, fields)
+                yield (order_id, timestamp, action, pk, *values)
+
+    return [
+        messages('add_order', ADD, ['symbol', 'side', 'quantity', 'price']),
+        messages('modify_order', MODIFY, ['modified_shares', 'price']),
+        messages('trade', EXECUTE, ['executed_shares', 'price'], message_type=ORDER_EXECUTED),
+        messages('cancel_order', CANCEL, ['canceled_shares']),
+        messages('delete_order', DELETE, []),
+    ]
+
+
+def order_events(pitch_file):
+    """
+    Order events of a stored file, sorted by order ID and timestamp.
+
+    Events are tuples of ``(order_id, timestamp, action, row)`` followed by
+    the symbol, side, size and price of Add Orders, the new size and price
+    of Modify Orders, the shares and price of Order Executed messages and
+    the shares of Order Cancels. Events of one timestamp follow the order
+    of the actions, then that of their rows. Messages without an order ID
+    are left out.
+    """
+    if pitch_file.storage == PitchFile.STORAGE_COLUMNS:
+        streams = _column_events(pitch_file)
+    else:
+        streams = _database_events(pitch_file)
+    # Rows are unique within a table, so tuples never compare past them
+    return heapq.merge(*streams)
+
+
+def _record(order_id, order):
+    return {
+        'order_id': order_id,
+        'symbol': order[SYMBOL],
+        'side': order[SIDE],
+        'quantity': order[QUANTITY],
+        'executed_shares': order[EXECUTED],
+        'canceled_shares': order[CANCELED],
+        'remaining_shares': max(order[BASE] - order[TAKEN], 0),
+        'first_timestamp': order[FIRST],
+        'last_timestamp': order[LAST],
+    }
+
+
+def lifecycle_records(events, execution=None):
+    """
+    Lifecycle records of the orders whose Add Order message is among
+    ``events``, as sorted by ``order_events``.
+
+    ``BASE`` is the size the last Add, Modify or Delete Order message set an
+    order to and ``TAKEN`` counts the shares executed or canceled after it.
+    Every execution resolved to a symbol and price is passed on as
+    ``execution(symbol, timestamp, price, shares, row)``, with the price in
+    ticks; executions of orders added before the file are dropped.
+    """
+    order_id = order = None
+    for event in events:
+        event_order_id, timestamp, action, row = event[:4]
+        if event_order_id != order_id:
+            if order is not None and order[QUANTITY] is not None:
+                yield _record(order_id, order)
+            order_id, order = event_order_id, None
+        if action == ADD:
+            symbol, side, quantity, price = event[4:]
+            quantity = quantity or 0
+            # A reused order ID starts a new order
+            order = [symbol, side, quantity, 0, 0, quantity, 0, timestamp, timestamp, price]
+            continue
+        if order is None:
+            # Added before the file
+            order = [None, None, None, 0, 0, None, 0, timestamp, timestamp, None]
+        if action == EXECUTE:
+            shares, price = event[4:]
+            order[EXECUTED] += shares
+            order[TAKEN] += shares
+            if price is None:
+                price = order[PRICE]
+            if execution is not None and order[SYMBOL] and price is not None:
+                execution(order[SYMBOL], timestamp, price, shares, row)
+        elif action == CANCEL:
+            order[CANCELED] += event[4]
+            order[TAKEN] += event[4]
+        elif action == MODIFY:
+            shares, price = event[4:]
+            order[BASE] = shares or 0
+            order[TAKEN] = 0
+            if price is not None:
+                order[PRICE] = price
+        else:
+            order[BASE] = order[TAKEN] = 0
+        order[LAST] = timestamp
+    if order is not None and order[QUANTITY] is not None:
+        yield _record(order_id, order)
+
+
+def save_lifecycles(pitch_file, execution=None):
+    """Store the lifecycles of a file whose messages have all been stored"""
+    load_batches(OrderLifecycle, pitch_file, lifecycle_records(order_events(pitch_file), execution))
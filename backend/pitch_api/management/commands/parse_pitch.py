@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from pitch_api.parser import parse_file
+from pitch_api.mapped import parse_mapped
+from pitch_api.parallel import parse_parallel
+
+
+class Command(BaseCommand):
+    help = 'Parse a PITCH data file without storing it and report message counts and throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the PITCH data file')
+        parser.add_argument(
+            '--vectorized', action='store_true',
+            help='Memory-map the file and decode it column-wise with NumPy'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Number of worker processes to split the file across'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['workers'] > 1:
+            parser = parse_parallel(options['path'], options['workers'])
+        elif options['vectorized']:
+            parser = parse_mapped(options['path'])
+        else:
+            parser = parse_file(options['path'])
+        elapsed = time.perf_counter() - started
+
+        for message_type, count in sorted(parser.message_counts.items()):
+            self.stdout.write(f'  {message_type}: {count}')
+        for key, value in parser.summary().items():
+            self.stdout.write(f'{key}: {value}')
+
+        rate = parser.line_count / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Parsed {parser.line_count} lines in {elapsed:.3f}s ({rate:,.0f} lines/s)'
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from pitch_api.purge import purge_deleted_files
+
+
+class Command(BaseCommand):
+    help = 'Purge the rows of deleted PITCH files that no alias or running ingest still needs'
+
+    def handle(self, *args, **options):
+        purged = purge_deleted_files()
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} deleted files'))
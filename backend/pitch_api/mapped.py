@@ -0,0 +1,41 @@
+"""
+Memory-mapped, zero-copy access to PITCH files stored on disk.
+
+Large uploads arrive as temporary files. Mapping them lets the vectorized
+decoder read fields straight from the page cache instead of copying the file
+into Python ``bytes`` or decoding every line into a ``str`` first; Python
+objects are only created for the values that end up in records.
+"""
+import mmap
+import os
+from contextlib import contextmanager
+
+from .vectorized import parse_buffer
+
+
+@contextmanager
+def mapped_file(path):
+    """Map a file read-only and yield a memoryview over its contents"""
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            # Empty files cannot be mapped
+            yield memoryview(b'')
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+            if hasattr(mapping, 'madvise'):
+                mapping.madvise(mmap.MADV_SEQUENTIAL)
+            view = memoryview(mapping)
+            try:
+                yield view
+            finally:
+                view.release()
+
+
+def parse_mapped(path, start=0, end=None):
+    """Decode ``[start, end)`` of a file on disk without reading it into memory"""
+    with mapped_file(path) as view:
+        section = view[start:end]
+        try:
+            return parse_buffer(section)
+        finally:
+            section.release()
@@ -1,44 +1,318 @@
+import os
+from base64 import b64decode, b64encode
+from decimal import Decimal, ROUND_CEILING, ROUND_FLOOR
+from urllib.parse import parse_qs, urlencode
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.pagination import PageNumberPagination
-from rest_framework.permissions import AllowAny
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.pagination import BasePagination
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.settings import APISettings
+from rest_framework.utils.urls import replace_query_param
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.http import content_disposition_header
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
 
+from .book import replay_book
+from .caching import cached_file_response
+from .columns import ColumnStore, ColumnTable
+from .export import FORMATS, export_columns, export_messages
 from .models import (
-    PitchFile, AddOrderMessage, TradeMessage, CancelOrderMessage,
-    AuctionMessage, SystemEventMessage
+    PRICE_SCALE, PitchFile, AddOrderMessage, TradeMessage, CancelOrderMessage,
+    AuctionMessage, SystemEventMessage, OrderLifecycle, PriceBar
 )
+from .ids import parse_id
+from .symbols import symbol_id
 from .serializers import (
     AddOrderMessageSerializer, TradeMessageSerializer, CancelOrderMessageSerializer,
-    AuctionMessageSerializer, SystemEventMessageSerializer
+    AuctionMessageSerializer, SystemEventMessageSerializer, OrderLifecycleSerializer,
+    PriceBarSerializer, MESSAGE_SERIALIZERS
 )
+from .timeline import timeline_page
+
+class InvalidCursor(Exception):
+    """A cursor parameter that no page link holds"""
+
+class InvalidFilter(Exception):
+    """A filter parameter the endpoint cannot apply"""
+
+# Filter query parameters of the message endpoints: parameter -> (filter, lookup)
+FILTER_PARAMETERS = {
+    'symbol': ('symbol', 'exact'),
+    'side': ('side', 'exact'),
+    'order_id': ('order_id', 'exact'),
+    'min_timestamp': ('timestamp', 'gte'),
+    'max_timestamp': ('timestamp', 'lte'),
+    'min_price': ('price', 'gte'),
+    'max_price': ('price', 'lte'),
+    'min_quantity': ('quantity', 'gte'),
+}
+
+# Swagger parameters of the filters
+FILTER_SWAGGER_PARAMETERS = [
+    openapi.Parameter('symbol', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      description="Only messages about this symbol"),
+    openapi.Parameter('side', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      description="Only orders on this side, 'B' or 'S'"),
+    openapi.Parameter('order_id', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      description="Only messages about this order"),
+    openapi.Parameter('min_timestamp', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                      description="Only messages at or after this timestamp (nanoseconds)"),
+    openapi.Parameter('max_timestamp', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                      description="Only messages at or before this timestamp (nanoseconds)"),
+    openapi.Parameter('min_price', openapi.IN_QUERY, type=openapi.TYPE_NUMBER,
+                      description="Only messages at or above this price"),
+    openapi.Parameter('max_price', openapi.IN_QUERY, type=openapi.TYPE_NUMBER,
+                      description="Only messages at or below this price"),
+    openapi.Parameter('min_quantity', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                      description="Only messages of at least this many shares"),
+]
+
+def parse_filter(parameter, text):
+    """The stored value a filter parameter compares against"""
+    name, lookup = FILTER_PARAMETERS[parameter]
+    text = text.strip()
+    if name == 'symbol':
+        if not text:
+            raise InvalidFilter('symbol must not be empty')
+        return text
+    if name == 'side':
+        if text.upper() not in ('B', 'S'):
+            raise InvalidFilter("side must be 'B' or 'S'")
+        return text.upper()
+    if name == 'order_id':
+        value = parse_id(text)
+        if value is None:
+            raise InvalidFilter('order_id must be a base-36 ID')
+        return value
+    if name == 'price':
+        try:
+            price = Decimal(text) * PRICE_SCALE
+        except ArithmeticError:
+            price = None
+        if price is None or not price.is_finite():
+            raise InvalidFilter(f'{parameter} must be a decimal number')
+        if abs(price) >= 1 << 63:
+            raise InvalidFilter(f'{parameter} is out of range')
+        # Round towards the range so that it only holds prices in ticks
+        return int(price.to_integral_value(ROUND_CEILING if lookup == 'gte' else ROUND_FLOOR))
+    try:
+        value = int(text)
+    except ValueError:
+        raise InvalidFilter(f'{parameter} must be an integer')
+    if abs(value) >= 1 << 63:
+        raise InvalidFilter(f'{parameter} is out of range')
+    return value
 
 # Pagination class for message data
-class StandardResultsSetPagination(PageNumberPagination):
+class MessageCursorPagination(BasePagination):
+    """
+    Keyset pagination of messages, newest first.
+
+    Messages are ordered by (timestamp, id) descending, and the cursors of
+    the next and previous pages hold the key of the row they continue from.
+    Every page is thus found with a seek on the (pitch_file, timestamp, id)
+    index, or a binary search in the column store, however deep it is. The
+    total count is the one stored when the file was ingested; filtered
+    queries are not counted and report a null count.
+    """
     page_size = 50
     page_size_query_param = 'limit'
     max_page_size = 1000
+    cursor_query_param = 'cursor'
+    # Fields of the row key held by a cursor
+    cursor_fields = ('t', 'i')
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def decode_cursor(self, request):
+        """``(reverse, *key)`` of the cursor of a request, or None"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            fields = parse_qs(b64decode(encoded.encode('ascii')).decode('ascii'), strict_parsing=True)
+            return (fields.get('r') == ['1'], *(int(fields[name][0]) for name in self.cursor_fields))
+        except (ValueError, KeyError, UnicodeError):
+            raise InvalidCursor('Invalid cursor')
+
+    def row_key(self, row):
+        """The ``(timestamp, id)`` key of a row"""
+        return (row['timestamp'], row['id']) if isinstance(row, dict) else (row.timestamp, row.pk)
+
+    def encode_cursor(self, reverse, row):
+        fields = dict(zip(self.cursor_fields, self.row_key(row)))
+        if reverse:
+            fields['r'] = 1
+        cursor = b64encode(urlencode(fields).encode('ascii')).decode('ascii')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def paginate_queryset(self, messages, request, view=None, count=None):
+        """
+        The page of ``messages``, a queryset or a column store table, that
+        the request's cursor points at.
+        """
+        self.request = request
+        size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        if isinstance(messages, ColumnTable):
+            self.count = len(messages)
+            page, more = self._column_page(messages, cursor, size)
+        else:
+            self.count = count
+            page, more = self._queryset_page(messages, cursor, size)
+        self.set_links(page, cursor, more)
+        return page
+
+    def set_links(self, page, cursor, more):
+        """Links to the pages around ``page``; ``more`` if rows follow it"""
+        reverse = cursor is not None and cursor[0]
+        self.next = self.previous = None
+        if page:
+            # A cursor is the key of a row just past one end of its page
+            following, preceding = (True, more) if reverse else (more, cursor is not None)
+            if following:
+                self.next = self.encode_cursor(False, page[-1])
+            if preceding:
+                self.previous = self.encode_cursor(True, page[0])
+
+    def _queryset_page(self, queryset, cursor, size):
+        if cursor is None:
+            page = list(queryset.order_by('-timestamp', '-id')[:size + 1])
+            return page[:size], len(page) > size
+        reverse, timestamp, pk = cursor
+        if reverse:
+            queryset = queryset.filter(timestamp__gte=timestamp).exclude(timestamp=timestamp, id__lte=pk)
+            page = list(queryset.order_by('timestamp', 'id')[:size + 1])
+            return page[:size][::-1], len(page) > size
+        queryset = queryset.filter(timestamp__lte=timestamp).exclude(timestamp=timestamp, id__gte=pk)
+        page = list(queryset.order_by('-timestamp', '-id')[:size + 1])
+        return page[:size], len(page) > size
+
+    def _column_page(self, table, cursor, size):
+        if cursor is None:
+            return table[:size], size < len(table)
+        reverse, timestamp, pk = cursor
+        if reverse:
+            end = table.position(timestamp, pk)
+            start = max(end - size, 0)
+            return table[start:end], start > 0
+        start = table.position(timestamp, pk, inclusive=True)
+        return table[start:start + size], start + size < len(table)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'next': self.next,
+            'previous': self.previous,
+            'results': data,
+        })
+
+class TimelineCursorPagination(MessageCursorPagination):
+    """
+    Keyset pagination of the timeline of a file, oldest first.
+
+    Cursors hold the (timestamp, table, id) key of the event they continue
+    from, and every page is merged from the rows each message table holds
+    past that key. The count is that of all stored messages, and null when
+    filtered by symbol.
+    """
+    cursor_fields = ('t', 'k', 'i')
+
+    def row_key(self, event):
+        return event[:3]
+
+    def paginate_timeline(self, pitch_file, symbol, request, count=None):
+        """The page of the timeline of a file that the request's cursor points at"""
+        self.request = request
+        self.count = count
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor[0]
+        page, more = timeline_page(pitch_file, symbol, cursor and cursor[1:], self.get_page_size(request), reverse)
+        self.set_links(page, cursor, more)
+        return page
 
 # Base view for message-specific endpoints
 class MessageBaseView(APIView):
     """
     Base view for message-specific endpoints.
     This should be subclassed for each message type, not used directly.
+    Messages of files kept in the column store are read from there, newest
+    first like the database queries.
+
+    Messages can be filtered by timestamp range and by the filters in
+    ``filter_fields``, which maps them to the model field they compare. Symbol
+    and order ID filters are served by (pitch_file, symbol, timestamp, id) and
+    (pitch_file, order_id, timestamp, id) indexes, which hold the rows in page
+    order; the other filters narrow down the rows those and the timestamp
+    index lead to.
     """
     permission_classes = [AllowAny]
-    pagination_class = StandardResultsSetPagination
+    pagination_class = MessageCursorPagination
+    message_kind = None
+    filter_fields = {}
     
-    def get_paginated_response(self, data):
+    def get_paginated_response(self, data, count=None):
         paginator = self.pagination_class()
-        page = paginator.paginate_queryset(data, self.request)
+        page = paginator.paginate_queryset(data, self.request, count=count)
         serialized_data = self.get_serializer(page, many=True).data
         return paginator.get_paginated_response(serialized_data)
+
+    def get_filters(self, request):
+        """``(field, lookup, value)`` of every filter parameter of a request"""
+        fields = dict(self.filter_fields, timestamp='timestamp')
+        conditions = []
+        for parameter, (name, lookup) in FILTER_PARAMETERS.items():
+            if parameter not in request.query_params:
+                continue
+            if name not in fields:
+                raise InvalidFilter(f'{parameter} is not supported by this endpoint')
+            conditions.append((fields[name], lookup, parse_filter(parameter, request.query_params[parameter])))
+        return conditions
+
+    def filter_messages(self, messages, conditions):
+        """Apply filter conditions to a queryset of messages"""
+        lookups = {}
+        for field, lookup, value in conditions:
+            if field == 'symbol':
+                field, value = 'symbol_id', symbol_id(value)
+                if value is None:
+                    return messages.none()
+            lookups[f'{field}__{lookup}'] = value
+        return messages.filter(**lookups)
     
+    @swagger_auto_schema(
+        operation_description="Get the messages of a file, newest first, one page at a time. "
+                              "Filters the endpoint does not support are rejected.",
+        manual_parameters=[
+            openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                              description="Messages per page (default 50, at most 1000)"),
+            openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="Cursor of the page, from the next and previous links"),
+            *FILTER_SWAGGER_PARAMETERS,
+        ],
+        responses={
+            400: "Invalid cursor or filter",
+            403: "Permission denied",
+            404: "File not found",
+        },
+        tags=['PITCH Files']
+    )
+    @cached_file_response
     def get(self, request, file_id, *args, **kwargs):
         try:
             # Get the PitchFile instance
-            pitch_file = get_object_or_404(PitchFile, id=file_id)
+            pitch_file = get_object_or_404(PitchFile.objects.visible(), id=file_id)
             
             # Check if user has access to this file
             if request.user.is_authenticated and pitch_file.uploaded_by != request.user:
@@ -48,12 +322,29 @@ class MessageBaseView(APIView):
                         status=status.HTTP_403_FORBIDDEN
                     )
             
-            # Get messages for this file - to be implemented by subclasses
-            messages = self.get_messages(pitch_file)
+            # Get messages for this file - to be implemented by subclasses.
+            # Aliases of an earlier upload of the same bytes share its messages.
+            conditions = self.get_filters(request)
+            source = pitch_file.message_source
+            count = None
+            if source.storage == PitchFile.STORAGE_COLUMNS:
+                messages = ColumnStore(source.pk).table(self.message_kind)
+                if conditions:
+                    messages = messages.filter(conditions)
+            elif conditions:
+                messages = self.filter_messages(self.get_messages(source), conditions)
+            else:
+                messages = self.get_messages(source)
+                # Files still being ingested are counted
+                count = source.message_table_counts.get(self.message_kind)
+                if count is None:
+                    count = messages.count()
             
             # Paginate the results
-            return self.get_paginated_response(messages)
+            return self.get_paginated_response(messages, count)
             
+        except (InvalidCursor, InvalidFilter) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response(
                 {'error': f'Error retrieving message data: {str(e)}'}, 
@@ -77,8 +368,11 @@ class AddOrderMessageView(MessageBaseView):
     """
     API endpoint for retrieving Add Order messages for a specific PITCH file.
     """
+    message_kind = 'add_order'
+    filter_fields = {'symbol': 'symbol', 'side': 'side', 'order_id': 'order_id', 'price': 'price', 'quantity': 'quantity'}
+
     def get_messages(self, pitch_file):
-        return AddOrderMessage.objects.filter(pitch_file=pitch_file).order_by('-timestamp')
+        return AddOrderMessage.objects.filter(pitch_file=pitch_file).order_by('-timestamp', '-id')
     
     def get_serializer(self, *args, **kwargs):
         return AddOrderMessageSerializer(*args, **kwargs)
@@ -87,8 +381,11 @@ class TradeMessageView(MessageBaseView):
     """
     API endpoint for retrieving Trade messages for a specific PITCH file.
     """
+    message_kind = 'trade'
+    filter_fields = {'symbol': 'symbol', 'order_id': 'order_id', 'price': 'price', 'quantity': 'executed_shares'}
+
     def get_messages(self, pitch_file):
-        return TradeMessage.objects.filter(pitch_file=pitch_file).order_by('-timestamp')
+        return TradeMessage.objects.filter(pitch_file=pitch_file).order_by('-timestamp', '-id')
     
     def get_serializer(self, *args, **kwargs):
         return TradeMessageSerializer(*args, **kwargs)
@@ -97,8 +394,11 @@ class CancelOrderMessageView(MessageBaseView):
     """
     API endpoint for retrieving Cancel Order messages for a specific PITCH file.
     """
+    message_kind = 'cancel_order'
+    filter_fields = {'order_id': 'order_id', 'quantity': 'canceled_shares'}
+
     def get_messages(self, pitch_file):
-        return CancelOrderMessage.objects.filter(pitch_file=pitch_file).order_by('-timestamp')
+        return CancelOrderMessage.objects.filter(pitch_file=pitch_file).order_by('-timestamp', '-id')
     
     def get_serializer(self, *args, **kwargs):
         return CancelOrderMessageSerializer(*args, **kwargs)
@@ -107,8 +407,11 @@ class AuctionMessageView(MessageBaseView):
     """
     API endpoint for retrieving Auction messages for a specific PITCH file.
     """
+    message_kind = 'auction'
+    filter_fields = {'symbol': 'symbol', 'price': 'reference_price'}
+
     def get_messages(self, pitch_file):
-        return AuctionMessage.objects.filter(pitch_file=pitch_file).order_by('-timestamp')
+        return AuctionMessage.objects.filter(pitch_file=pitch_file).order_by('-timestamp', '-id')
     
     def get_serializer(self, *args, **kwargs):
         return AuctionMessageSerializer(*args, **kwargs)
@@ -117,8 +420,294 @@ class SystemEventMessageView(MessageBaseView):
     """
     API endpoint for retrieving System Event messages for a specific PITCH file.
     """
+    message_kind = 'system_event'
+    filter_fields = {'symbol': 'symbol'}
+
     def get_messages(self, pitch_file):
-        return SystemEventMessage.objects.filter(pitch_file=pitch_file).order_by('-timestamp')
+        return SystemEventMessage.objects.filter(pitch_file=pitch_file).order_by('-timestamp', '-id')
     
     def get_serializer(self, *args, **kwargs):
-        return SystemEventMessageSerializer(*args, **kwargs) 
\ No newline at end of file
+        return SystemEventMessageSerializer(*args, **kwargs) 
+
+class ExportContentNegotiation(DefaultContentNegotiation):
+    """Leaves the format query parameter to the export view"""
+    settings = APISettings({'URL_FORMAT_OVERRIDE': None})
+
+class MessageExportView(APIView):
+    """
+    API endpoint for downloading every message of one type of a PITCH file.
+
+    Rows are streamed oldest first as they are read from the database or the
+    column store, without serializers, so the response can be of any size.
+    The message endpoint view in ``message_view`` provides the columns and
+    the filters.
+    """
+    permission_classes = [IsAuthenticated]
+    content_negotiation_class = ExportContentNegotiation
+    message_view = None
+
+    @swagger_auto_schema(
+        operation_description="Download the messages of a file, oldest first, as CSV or newline-delimited JSON. "
+                              "Takes the filters of the message endpoint.",
+        manual_parameters=[
+            openapi.Parameter('format', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True,
+                              description="'csv' or 'ndjson'"),
+            openapi.Parameter('compression', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="'gzip' to compress the download"),
+            *FILTER_SWAGGER_PARAMETERS,
+        ],
+        responses={
+            200: "Messages",
+            400: "Invalid format or filter",
+            403: "Permission denied",
+            404: "File not found",
+        },
+        tags=['PITCH Files']
+    )
+    def get(self, request, file_id, *args, **kwargs):
+        pitch_file = get_object_or_404(PitchFile.objects.visible(), id=file_id)
+        if pitch_file.uploaded_by != request.user and not request.user.is_staff:
+            return Response(
+                {'error': 'You do not have permission to view this data'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        export_format = request.query_params.get('format')
+        if export_format not in FORMATS:
+            return Response({'error': "format must be 'csv' or 'ndjson'"}, status=status.HTTP_400_BAD_REQUEST)
+        compression = request.query_params.get('compression')
+        if compression not in (None, 'gzip'):
+            return Response({'error': "compression must be 'gzip'"}, status=status.HTTP_400_BAD_REQUEST)
+
+        view = self.message_view()
+        try:
+            conditions = view.get_filters(request)
+        except InvalidFilter as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        source = pitch_file.message_source
+        if source.storage == PitchFile.STORAGE_COLUMNS:
+            messages = ColumnStore(source.pk).table(view.message_kind)
+            if conditions:
+                messages = messages.filter(conditions)
+        else:
+            messages = view.filter_messages(view.get_messages(source), conditions)
+
+        compress = compression == 'gzip'
+        filename = f'{os.path.splitext(os.path.basename(pitch_file.file_name))[0]}-{view.message_kind}.{export_format}'
+        response = StreamingHttpResponse(
+            export_messages(messages, export_columns(view.get_serializer()), export_format, compress),
+            content_type='application/gzip' if compress else FORMATS[export_format],
+        )
+        response['Content-Disposition'] = content_disposition_header(True, filename + '.gz' if compress else filename)
+        return response
+
+class OrderBookView(APIView):
+    """
+    API endpoint reconstructing the order book of a symbol at a point in time.
+    """
+    permission_classes = [IsAuthenticated]
+    default_depth = 10
+    max_depth = 100
+
+    @swagger_auto_schema(
+        operation_description="Get the best bid and offer and the top price levels of a symbol's "
+                              "order book, replayed up to a timestamp",
+        manual_parameters=[
+            openapi.Parameter('symbol', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True,
+                              description="Symbol of the book"),
+            openapi.Parameter('timestamp', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                              description="Replay messages up to and including this timestamp (nanoseconds); "
+                                          "defaults to the end of the file"),
+            openapi.Parameter('depth', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                              description="Price levels per side (default 10, at most 100)"),
+        ],
+        responses={
+            200: "Order book",
+            400: "Invalid parameters",
+            403: "Permission denied",
+            404: "File not found",
+        },
+        tags=['PITCH Files']
+    )
+    def get(self, request, file_id, *args, **kwargs):
+        pitch_file = get_object_or_404(PitchFile.objects.visible(), id=file_id)
+        if pitch_file.uploaded_by != request.user and not request.user.is_staff:
+            return Response(
+                {'error': 'You do not have permission to view this data'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        symbol = request.query_params.get('symbol', '').strip()
+        if not symbol:
+            return Response({'error': 'The symbol parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            timestamp = request.query_params.get('timestamp')
+            timestamp = int(timestamp) if timestamp not in (None, '') else None
+            depth = int(request.query_params.get('depth', self.default_depth))
+        except ValueError:
+            return Response({'error': 'timestamp and depth must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= depth <= self.max_depth:
+            return Response(
+                {'error': f'depth must be between 1 and {self.max_depth}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            replay = replay_book(pitch_file, symbol, timestamp)
+            book = replay.books[symbol].snapshot(depth)
+            book.update({
+                'timestamp': timestamp,
+                'last_message_timestamp': replay.timestamp,
+                'messages_replayed': replay.applied,
+                'resting_orders': len(replay.orders),
+            })
+            return Response(book, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response(
+                {'error': f'Error reconstructing order book: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+class OrderLifecycleView(APIView):
+    """
+    API endpoint for retrieving the lifecycle of a single order.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Get the symbol, side, size, executed, canceled and remaining shares "
+                              "and the first and last timestamps of an order",
+        responses={
+            200: OrderLifecycleSerializer,
+            403: "Permission denied",
+            404: "File or order not found",
+        },
+        tags=['PITCH Files']
+    )
+    def get(self, request, file_id, order_id, *args, **kwargs):
+        pitch_file = get_object_or_404(PitchFile.objects.visible(), id=file_id)
+        if pitch_file.uploaded_by != request.user and not request.user.is_staff:
+            return Response(
+                {'error': 'You do not have permission to view this data'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        lifecycle = OrderLifecycle.objects.filter(pitch_file=pitch_file.message_source, order_id=parse_id(order_id)).first()
+        if lifecycle is None:
+            return Response({'error': 'Order not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(OrderLifecycleSerializer(lifecycle).data, status=status.HTTP_200_OK)
+
+class PriceBarView(APIView):
+    """
+    API endpoint for retrieving the OHLCV bars of a symbol.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Get the open, high, low, close, volume and VWAP bars of a symbol's "
+                              "trades, oldest first",
+        manual_parameters=[
+            openapi.Parameter('symbol', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True,
+                              description="Symbol of the bars"),
+            openapi.Parameter('interval', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="Length of the bars, one of the configured intervals "
+                                          "(by default 1s, 1m or 5m); defaults to the first"),
+        ],
+        responses={
+            200: PriceBarSerializer(many=True),
+            400: "Invalid parameters",
+            403: "Permission denied",
+            404: "File not found",
+        },
+        tags=['PITCH Files']
+    )
+    def get(self, request, file_id, *args, **kwargs):
+        pitch_file = get_object_or_404(PitchFile.objects.visible(), id=file_id)
+        if pitch_file.uploaded_by != request.user and not request.user.is_staff:
+            return Response(
+                {'error': 'You do not have permission to view this data'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        symbol = request.query_params.get('symbol', '').strip()
+        if not symbol:
+            return Response({'error': 'The symbol parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+        intervals = settings.PITCH_BAR_INTERVALS
+        interval = request.query_params.get('interval') or intervals[0]
+        if interval not in intervals:
+            return Response(
+                {'error': f'interval must be one of {", ".join(intervals)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        bars = PriceBar.objects.filter(
+            pitch_file=pitch_file.message_source, symbol_id=symbol_id(symbol), interval=interval
+        ).order_by('start')
+        return Response({
+            'symbol': symbol,
+            'interval': interval,
+            'bars': PriceBarSerializer(bars, many=True).data,
+        }, status=status.HTTP_200_OK)
+
+class TimelineView(APIView):
+    """
+    API endpoint for retrieving the messages of every type of a file as a
+    single sequence.
+    """
+    permission_classes = [IsAuthenticated]
+    pagination_class = TimelineCursorPagination
+
+    @swagger_auto_schema(
+        operation_description="Get the messages of every type of a file merged in time order, "
+                              "oldest first, one page at a time. Each message names its record kind.",
+        manual_parameters=[
+            openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                              description="Messages per page (default 50, at most 1000)"),
+            openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="Cursor of the page, from the next and previous links"),
+            openapi.Parameter('symbol', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="Only messages about this symbol, including the executions, "
+                                          "modifies, cancels and deletes of its orders"),
+        ],
+        responses={
+            200: "Timeline page",
+            400: "Invalid cursor or symbol",
+            403: "Permission denied",
+            404: "File not found",
+        },
+        tags=['PITCH Files']
+    )
+    @cached_file_response
+    def get(self, request, file_id, *args, **kwargs):
+        pitch_file = get_object_or_404(PitchFile.objects.visible(), id=file_id)
+        if pitch_file.uploaded_by != request.user and not request.user.is_staff:
+            return Response(
+                {'error': 'You do not have permission to view this data'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        try:
+            symbol = request.query_params.get('symbol')
+            if symbol is not None:
+                symbol = parse_filter('symbol', symbol)
+            counts = pitch_file.message_source.message_table_counts
+            paginator = self.pagination_class()
+            events = paginator.paginate_timeline(
+                pitch_file, symbol, request, count=sum(counts.values()) if counts and symbol is None else None
+            )
+            # One serializer per kind, so that its fields are built once
+            serializers = {kind: serializer() for kind, serializer in MESSAGE_SERIALIZERS.items()}
+            results = [
+                {'kind': kind, **serializers[kind].to_representation(message)}
+                for timestamp, table, pk, kind, message in events
+            ]
+            return paginator.get_paginated_response(results)
+
+        except (InvalidCursor, InvalidFilter) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response(
+                {'error': f'Error retrieving timeline: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
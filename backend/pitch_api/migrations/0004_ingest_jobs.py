@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+def mark_existing_files_completed(apps, schema_editor):
+    # Files uploaded before ingest jobs existed were processed in the request
+    PitchFile = apps.get_model('pitch_api', 'PitchFile')
+    PitchFile.objects.update(status='completed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pitch_api', '0003_remove_addordermessage_pitch_api_a_pitch_f_04e451_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pitchfile',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', help_text='Processing state of the upload', max_length=16),
+        ),
+        migrations.RunPython(mark_existing_files_completed, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='IngestJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('total_bytes', models.BigIntegerField(default=0, help_text='Size of the uploaded file in bytes')),
+                ('processed_bytes', models.BigIntegerField(default=0, help_text='Bytes of the file parsed so far')),
+                ('lines_processed', models.BigIntegerField(default=0)),
+                ('total_records', models.BigIntegerField(default=0, help_text='Messages to store once parsing has finished')),
+                ('records_written', models.BigIntegerField(default=0)),
+                ('result', models.JSONField(blank=True, help_text='Message counts, summary and symbols of the finished ingest', null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('pitch_file', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='job', to='pitch_api.pitchfile')),
+            ],
+        ),
+    ]
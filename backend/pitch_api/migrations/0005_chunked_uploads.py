@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pitch_api', '0004_ingest_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestjob',
+            name='chunked',
+            field=models.BooleanField(default=False, help_text='Whether the file is sent in numbered chunks'),
+        ),
+        migrations.AddField(
+            model_name='ingestjob',
+            name='received_bytes',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='ingestjob',
+            name='received_chunks',
+            field=models.IntegerField(default=0, help_text='Chunks of a chunked upload acknowledged so far'),
+        ),
+        migrations.AlterField(
+            model_name='pitchfile',
+            name='status',
+            field=models.CharField(choices=[('uploading', 'Uploading'), ('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', help_text='Processing state of the upload', max_length=16),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pitch_api', '0005_chunked_uploads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestjob',
+            name='peak_memory_bytes',
+            field=models.BigIntegerField(blank=True, help_text='Peak resident memory of the worker during the ingest', null=True),
+        ),
+    ]
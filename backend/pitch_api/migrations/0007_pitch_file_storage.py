@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pitch_api', '0006_ingest_peak_memory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pitchfile',
+            name='storage',
+            field=models.CharField(choices=[('database', 'Message tables'), ('columns', 'Column store')], default='database', help_text='Where the parsed messages are kept', max_length=16),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pitch_api', '0007_pitch_file_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pitchfile',
+            name='alias_of',
+            field=models.ForeignKey(blank=True, help_text='Earlier upload of the same bytes whose stored messages this file shares', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='aliases', to='pitch_api.pitchfile'),
+        ),
+        migrations.AddField(
+            model_name='pitchfile',
+            name='content_sha256',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='SHA-256 digest of the uploaded bytes', max_length=64),
+        ),
+    ]
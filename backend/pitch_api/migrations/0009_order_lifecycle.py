@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pitch_api', '0008_content_dedup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderLifecycle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_id', models.CharField(max_length=50)),
+                ('symbol', models.CharField(max_length=16)),
+                ('side', models.CharField(choices=[('B', 'Buy'), ('S', 'Sell')], default='B', help_text="'B' = Buy, 'S' = Sell", max_length=1)),
+                ('quantity', models.IntegerField(default=0, help_text='Shares the order was added with')),
+                ('executed_shares', models.IntegerField(default=0, help_text='Shares executed in total')),
+                ('canceled_shares', models.IntegerField(default=0, help_text='Shares canceled in total')),
+                ('remaining_shares', models.IntegerField(default=0, help_text='Shares still resting at the end of the file')),
+                ('first_timestamp', models.BigIntegerField(default=0, help_text='Timestamp of the Add Order message (nanoseconds)')),
+                ('last_timestamp', models.BigIntegerField(default=0, help_text='Timestamp of the last message about the order (nanoseconds)')),
+                ('pitch_file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='order_lifecycles', to='pitch_api.pitchfile')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='orderlifecycle',
+            constraint=models.UniqueConstraint(fields=('pitch_file', 'order_id'), name='unique_order_lifecycle'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pitch_api', '0009_order_lifecycle'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceBar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=16)),
+                ('interval', models.CharField(help_text="Length of the bar, e.g. '1s', '1m' or '5m'", max_length=8)),
+                ('start', models.BigIntegerField(help_text='Timestamp the bar starts at (nanoseconds)')),
+                ('open', models.DecimalField(decimal_places=8, max_digits=19)),
+                ('high', models.DecimalField(decimal_places=8, max_digits=19)),
+                ('low', models.DecimalField(decimal_places=8, max_digits=19)),
+                ('close', models.DecimalField(decimal_places=8, max_digits=19)),
+                ('volume', models.BigIntegerField(default=0, help_text='Shares traded')),
+                ('vwap', models.DecimalField(decimal_places=8, help_text='Volume-weighted average price', max_digits=19)),
+                ('trades', models.IntegerField(default=0, help_text='Number of trades and executions')),
+                ('pitch_file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_bars', to='pitch_api.pitchfile')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='pricebar',
+            constraint=models.UniqueConstraint(fields=('pitch_file', 'symbol', 'interval', 'start'), name='unique_price_bar'),
+        ),
+    ]
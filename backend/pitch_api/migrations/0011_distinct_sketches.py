@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pitch_api', '0010_price_bars'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DistinctSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('symbol', 'Symbols'), ('order_id', 'Order IDs'), ('execution_id', 'Execution IDs')], max_length=16)),
+                ('precision', models.PositiveSmallIntegerField(help_text='The sketch has 2 ** precision registers')),
+                ('registers', models.BinaryField(help_text='One byte per register')),
+                ('pitch_file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sketches', to='pitch_api.pitchfile')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='distinctsketch',
+            constraint=models.UniqueConstraint(fields=('pitch_file', 'field'), name='unique_distinct_sketch'),
+        ),
+    ]
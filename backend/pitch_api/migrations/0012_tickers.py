@@ -0,0 +1,129 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:30
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+# Models whose symbol moves into the Ticker dictionary
+SYMBOL_MODELS = [
+    'addordermessage',
+    'modifyordermessage',
+    'cancelordermessage',
+    'deleteordermessage',
+    'trademessage',
+    'tradebreakmessage',
+    'auctionmessage',
+    'systemeventmessage',
+    'orderlifecycle',
+    'pricebar',
+    'symbol',
+]
+
+
+def fill_tickers(apps, schema_editor):
+    """Add every stored symbol to the dictionary and point its rows at it"""
+    Ticker = apps.get_model('pitch_api', 'Ticker')
+    symbol_models = [apps.get_model('pitch_api', name) for name in SYMBOL_MODELS]
+    symbols = set()
+    for model in symbol_models:
+        symbols.update(model.objects.exclude(symbol=None).values_list('symbol', flat=True).distinct())
+    Ticker.objects.bulk_create([Ticker(symbol=symbol) for symbol in sorted(symbols)], batch_size=1000)
+    tickers = Ticker.objects.filter(symbol=OuterRef('symbol')).values('pk')[:1]
+    for model in symbol_models:
+        model.objects.exclude(symbol=None).update(ticker=Subquery(tickers))
+
+
+def fill_symbols(apps, schema_editor):
+    Ticker = apps.get_model('pitch_api', 'Ticker')
+    symbols = Ticker.objects.filter(pk=OuterRef('ticker')).values('symbol')[:1]
+    for name in SYMBOL_MODELS:
+        apps.get_model('pitch_api', name).objects.exclude(ticker=None).update(symbol=Subquery(symbols))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pitch_api', '0011_distinct_sketches'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ticker',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('symbol', models.CharField(max_length=16, unique=True)),
+            ],
+        ),
+        # Nullable until the keys replace them, so reverting can add them back
+        migrations.AlterField(
+            model_name='orderlifecycle',
+            name='symbol',
+            field=models.CharField(max_length=16, null=True),
+        ),
+        migrations.AlterField(
+            model_name='pricebar',
+            name='symbol',
+            field=models.CharField(max_length=16, null=True),
+        ),
+        migrations.AlterField(
+            model_name='symbol',
+            name='symbol',
+            field=models.CharField(max_length=16, null=True),
+        ),
+        migrations.AddField(
+            model_name='addordermessage',
+            name='ticker',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='pitch_api.ticker'),
+        ),
+        migrations.AddField(
+            model_name='modifyordermessage',
+            name='ticker',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='pitch_api.ticker'),
+        ),
+        migrations.AddField(
+            model_name='cancelordermessage',
+            name='ticker',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='pitch_api.ticker'),
+        ),
+        migrations.AddField(
+            model_name='deleteordermessage',
+            name='ticker',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='pitch_api.ticker'),
+        ),
+        migrations.AddField(
+            model_name='trademessage',
+            name='ticker',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='pitch_api.ticker'),
+        ),
+        migrations.AddField(
+            model_name='tradebreakmessage',
+            name='ticker',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='pitch_api.ticker'),
+        ),
+        migrations.AddField(
+            model_name='auctionmessage',
+            name='ticker',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='pitch_api.ticker'),
+        ),
+        migrations.AddField(
+            model_name='systemeventmessage',
+            name='ticker',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='pitch_api.ticker'),
+        ),
+        migrations.AddField(
+            model_name='orderlifecycle',
+            name='ticker',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='pitch_api.ticker'),
+        ),
+        migrations.AddField(
+            model_name='pricebar',
+            name='ticker',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='pitch_api.ticker'),
+        ),
+        migrations.AddField(
+            model_name='symbol',
+            name='ticker',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='pitch_api.ticker'),
+        ),
+        migrations.RunPython(fill_tickers, fill_symbols),
+    ]
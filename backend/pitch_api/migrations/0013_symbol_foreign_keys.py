@@ -0,0 +1,192 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pitch_api', '0012_tickers'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='addordermessage',
+            name='pitch_api_a_pitch_f_602310_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='auctionmessage',
+            name='pitch_api_a_pitch_f_0e96a5_idx',
+        ),
+        migrations.RemoveConstraint(
+            model_name='pricebar',
+            name='unique_price_bar',
+        ),
+        migrations.RemoveField(
+            model_name='addordermessage',
+            name='symbol',
+        ),
+        migrations.RenameField(
+            model_name='addordermessage',
+            old_name='ticker',
+            new_name='symbol',
+        ),
+        migrations.RemoveField(
+            model_name='modifyordermessage',
+            name='symbol',
+        ),
+        migrations.RenameField(
+            model_name='modifyordermessage',
+            old_name='ticker',
+            new_name='symbol',
+        ),
+        migrations.RemoveField(
+            model_name='cancelordermessage',
+            name='symbol',
+        ),
+        migrations.RenameField(
+            model_name='cancelordermessage',
+            old_name='ticker',
+            new_name='symbol',
+        ),
+        migrations.RemoveField(
+            model_name='deleteordermessage',
+            name='symbol',
+        ),
+        migrations.RenameField(
+            model_name='deleteordermessage',
+            old_name='ticker',
+            new_name='symbol',
+        ),
+        migrations.RemoveField(
+            model_name='trademessage',
+            name='symbol',
+        ),
+        migrations.RenameField(
+            model_name='trademessage',
+            old_name='ticker',
+            new_name='symbol',
+        ),
+        migrations.RemoveField(
+            model_name='tradebreakmessage',
+            name='symbol',
+        ),
+        migrations.RenameField(
+            model_name='tradebreakmessage',
+            old_name='ticker',
+            new_name='symbol',
+        ),
+        migrations.RemoveField(
+            model_name='auctionmessage',
+            name='symbol',
+        ),
+        migrations.RenameField(
+            model_name='auctionmessage',
+            old_name='ticker',
+            new_name='symbol',
+        ),
+        migrations.RemoveField(
+            model_name='systemeventmessage',
+            name='symbol',
+        ),
+        migrations.RenameField(
+            model_name='systemeventmessage',
+            old_name='ticker',
+            new_name='symbol',
+        ),
+        migrations.RemoveField(
+            model_name='orderlifecycle',
+            name='symbol',
+        ),
+        migrations.RenameField(
+            model_name='orderlifecycle',
+            old_name='ticker',
+            new_name='symbol',
+        ),
+        migrations.RemoveField(
+            model_name='pricebar',
+            name='symbol',
+        ),
+        migrations.RenameField(
+            model_name='pricebar',
+            old_name='ticker',
+            new_name='symbol',
+        ),
+        migrations.RemoveField(
+            model_name='symbol',
+            name='symbol',
+        ),
+        migrations.RenameField(
+            model_name='symbol',
+            old_name='ticker',
+            new_name='symbol',
+        ),
+        migrations.AlterField(
+            model_name='addordermessage',
+            name='symbol',
+            field=models.ForeignKey(blank=True, db_index=False, help_text='Stock symbol (if applicable)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='pitch_api.ticker'),
+        ),
+        migrations.AlterField(
+            model_name='modifyordermessage',
+            name='symbol',
+            field=models.ForeignKey(blank=True, db_index=False, help_text='Stock symbol (if applicable)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='pitch_api.ticker'),
+        ),
+        migrations.AlterField(
+            model_name='cancelordermessage',
+            name='symbol',
+            field=models.ForeignKey(blank=True, db_index=False, help_text='Stock symbol (if applicable)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='pitch_api.ticker'),
+        ),
+        migrations.AlterField(
+            model_name='deleteordermessage',
+            name='symbol',
+            field=models.ForeignKey(blank=True, db_index=False, help_text='Stock symbol (if applicable)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='pitch_api.ticker'),
+        ),
+        migrations.AlterField(
+            model_name='trademessage',
+            name='symbol',
+            field=models.ForeignKey(blank=True, db_index=False, help_text='Stock symbol (if applicable)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='pitch_api.ticker'),
+        ),
+        migrations.AlterField(
+            model_name='tradebreakmessage',
+            name='symbol',
+            field=models.ForeignKey(blank=True, db_index=False, help_text='Stock symbol (if applicable)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='pitch_api.ticker'),
+        ),
+        migrations.AlterField(
+            model_name='auctionmessage',
+            name='symbol',
+            field=models.ForeignKey(blank=True, db_index=False, help_text='Stock symbol (if applicable)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='pitch_api.ticker'),
+        ),
+        migrations.AlterField(
+            model_name='systemeventmessage',
+            name='symbol',
+            field=models.ForeignKey(blank=True, db_index=False, help_text='Stock symbol (if applicable)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='pitch_api.ticker'),
+        ),
+        migrations.AlterField(
+            model_name='orderlifecycle',
+            name='symbol',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='pitch_api.ticker'),
+        ),
+        migrations.AlterField(
+            model_name='pricebar',
+            name='symbol',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='pitch_api.ticker'),
+        ),
+        migrations.AlterField(
+            model_name='symbol',
+            name='symbol',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='pitch_api.ticker'),
+        ),
+        migrations.AddIndex(
+            model_name='addordermessage',
+            index=models.Index(fields=['pitch_file', 'symbol'], name='pitch_api_a_pitch_f_ededeb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auctionmessage',
+            index=models.Index(fields=['pitch_file', 'symbol'], name='pitch_api_a_pitch_f_a5a1d4_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='pricebar',
+            constraint=models.UniqueConstraint(fields=('pitch_file', 'symbol', 'interval', 'start'), name='unique_price_bar'),
+        ),
+    ]
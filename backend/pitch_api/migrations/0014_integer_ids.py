@@ -0,0 +1,134 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:10
+
+import glob
+import os
+
+import numpy as np
+from django.conf import settings
+from django.db import migrations, models
+
+from pitch_api.ids import parse_id, format_id
+
+# (model, field) of every ID column
+ID_FIELDS = [
+    ('addordermessage', 'order_id'),
+    ('modifyordermessage', 'order_id'),
+    ('cancelordermessage', 'order_id'),
+    ('deleteordermessage', 'order_id'),
+    ('trademessage', 'order_id'),
+    ('tradebreakmessage', 'order_id'),
+    ('auctionmessage', 'order_id'),
+    ('systemeventmessage', 'order_id'),
+    ('trademessage', 'trade_id'),
+    ('tradebreakmessage', 'trade_id'),
+    ('orderlifecycle', 'order_id'),
+]
+
+BATCH_SIZE = 10000
+
+# Missing values of column store columns before they are narrowed
+NULL = np.iinfo(np.int64).min
+
+
+def _convert_rows(apps, schema_editor, convert):
+    """Rewrite every ID with ``convert``, a batch of rows at a time"""
+    connection = schema_editor.connection
+    quote = connection.ops.quote_name
+    for model_name, field in ID_FIELDS:
+        model = apps.get_model('pitch_api', model_name)
+        sql = 'UPDATE {} SET {} = %s WHERE id = %s'.format(quote(model._meta.db_table), quote(field))
+        last = 0
+        while True:
+            rows = list(model.objects.filter(pk__gt=last).order_by('pk').values_list('pk', field)[:BATCH_SIZE])
+            if not rows:
+                break
+            last = rows[-1][0]
+            with connection.cursor() as cursor:
+                cursor.executemany(sql, [(convert(value), pk) for pk, value in rows])
+
+
+def _decimal_id(text):
+    value = parse_id(text)
+    return None if value is None else str(value)
+
+
+def ids_to_numbers(apps, schema_editor):
+    """Replace base-36 IDs by the decimal text of their integers"""
+    _convert_rows(apps, schema_editor, _decimal_id)
+    # Lifecycles are looked up by order ID; those without a valid one cannot be
+    apps.get_model('pitch_api', 'orderlifecycle').objects.filter(order_id=None).delete()
+    _convert_column_stores(_encode_ids)
+
+
+def numbers_to_ids(apps, schema_editor):
+    _convert_rows(apps, schema_editor, lambda value: None if value is None else format_id(int(value)))
+    for model_name in ('trademessage', 'tradebreakmessage'):
+        apps.get_model('pitch_api', model_name).objects.filter(trade_id=None).update(trade_id='')
+    _convert_column_stores(_decode_ids)
+
+
+def _convert_column_stores(convert):
+    for directory in glob.glob(os.path.join(settings.PITCH_COLUMN_STORE_DIR, '*', '*')):
+        for name in ('order_id', 'trade_id'):
+            path = os.path.join(directory, name)
+            if os.path.exists(path + '.npy'):
+                convert(path, name)
+
+
+def _encode_ids(path, name):
+    """Turn a dictionary-encoded ID column into a column of integers"""
+    if not os.path.exists(path + '.strings'):
+        return
+    offsets = np.load(path + '.offsets.npy').tolist()
+    with open(path + '.strings', 'rb') as strings:
+        blob = strings.read()
+    values = [parse_id(blob[start:end].decode('utf-8')) for start, end in zip(offsets, offsets[1:])]
+    # The last entry decodes missing values
+    values = np.array([NULL if value is None else value for value in values] + [NULL], dtype=np.int64)
+    codes = np.load(path + '.npy').astype(np.int64)
+    codes[codes < 0] = len(values) - 1
+    np.save(path + '.npy', values[codes])
+    os.remove(path + '.strings')
+    os.remove(path + '.offsets.npy')
+
+
+def _decode_ids(path, name):
+    if os.path.exists(path + '.strings'):
+        return
+    stored = np.load(path + '.npy')
+    present = stored != NULL
+    values, codes = np.unique(stored[present], return_inverse=True)
+    blobs = [format_id(value).encode('utf-8') for value in values.tolist()]
+    # Execution IDs were empty rather than missing, like in the tables
+    missing = -1
+    if name == 'trade_id':
+        missing = len(blobs)
+        blobs.append(b'')
+    column = np.full(len(stored), missing, dtype=np.int64)
+    column[present] = codes
+    np.save(path + '.npy', column)
+    np.save(path + '.offsets.npy', np.concatenate(([0], np.cumsum([len(blob) for blob in blobs]))).astype(np.int64))
+    with open(path + '.strings', 'wb') as strings:
+        strings.write(b''.join(blobs))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pitch_api', '0013_symbol_foreign_keys'),
+    ]
+
+    operations = [
+        # Invalid execution IDs become NULL
+        migrations.AlterField(
+            model_name='trademessage',
+            name='trade_id',
+            field=models.CharField(default='', help_text='Unique trade ID', max_length=50, null=True),
+        ),
+        migrations.AlterField(
+            model_name='tradebreakmessage',
+            name='trade_id',
+            field=models.CharField(default='', help_text='ID of the trade being broken', max_length=50, null=True),
+        ),
+        migrations.RunPython(ids_to_numbers, numbers_to_ids),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pitch_api', '0014_integer_ids'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='addordermessage',
+            name='order_id',
+            field=models.BigIntegerField(blank=True, help_text='Unique ID for orders (if applicable), decoded from base 36', null=True),
+        ),
+        migrations.AlterField(
+            model_name='modifyordermessage',
+            name='order_id',
+            field=models.BigIntegerField(blank=True, help_text='Unique ID for orders (if applicable), decoded from base 36', null=True),
+        ),
+        migrations.AlterField(
+            model_name='cancelordermessage',
+            name='order_id',
+            field=models.BigIntegerField(blank=True, help_text='Unique ID for orders (if applicable), decoded from base 36', null=True),
+        ),
+        migrations.AlterField(
+            model_name='deleteordermessage',
+            name='order_id',
+            field=models.BigIntegerField(blank=True, help_text='Unique ID for orders (if applicable), decoded from base 36', null=True),
+        ),
+        migrations.AlterField(
+            model_name='trademessage',
+            name='order_id',
+            field=models.BigIntegerField(blank=True, help_text='Unique ID for orders (if applicable), decoded from base 36', null=True),
+        ),
+        migrations.AlterField(
+            model_name='tradebreakmessage',
+            name='order_id',
+            field=models.BigIntegerField(blank=True, help_text='Unique ID for orders (if applicable), decoded from base 36', null=True),
+        ),
+        migrations.AlterField(
+            model_name='auctionmessage',
+            name='order_id',
+            field=models.BigIntegerField(blank=True, help_text='Unique ID for orders (if applicable), decoded from base 36', null=True),
+        ),
+        migrations.AlterField(
+            model_name='systemeventmessage',
+            name='order_id',
+            field=models.BigIntegerField(blank=True, help_text='Unique ID for orders (if applicable), decoded from base 36', null=True),
+        ),
+        migrations.AlterField(
+            model_name='trademessage',
+            name='trade_id',
+            field=models.BigIntegerField(blank=True, help_text='Unique trade ID, decoded from base 36', null=True),
+        ),
+        migrations.AlterField(
+            model_name='tradebreakmessage',
+            name='trade_id',
+            field=models.BigIntegerField(blank=True, help_text='ID of the trade being broken, decoded from base 36', null=True),
+        ),
+        migrations.AlterField(
+            model_name='orderlifecycle',
+            name='order_id',
+            field=models.BigIntegerField(help_text='Order ID, decoded from base 36'),
+        ),
+    ]
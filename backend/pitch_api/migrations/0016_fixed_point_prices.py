@@ -0,0 +1,92 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:45
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, Value
+from django.db.models.functions import Round
+
+# (model, field) of every price column
+PRICE_FIELDS = [
+    ('addordermessage', 'price'),
+    ('modifyordermessage', 'price'),
+    ('cancelordermessage', 'price'),
+    ('deleteordermessage', 'price'),
+    ('trademessage', 'price'),
+    ('tradebreakmessage', 'price'),
+    ('auctionmessage', 'price'),
+    ('auctionmessage', 'reference_price'),
+    ('systemeventmessage', 'price'),
+]
+
+# Prices are stored in ticks of 1/PRICE_SCALE
+PRICE_SCALE = 10000
+
+
+def prices_to_ticks(apps, schema_editor):
+    # Rounded, since SQLite keeps decimals as floating point numbers
+    for model_name, field in PRICE_FIELDS:
+        model = apps.get_model('pitch_api', model_name)
+        model.objects.update(**{field: Round(F(field) * PRICE_SCALE)})
+
+
+def ticks_to_prices(apps, schema_editor):
+    for model_name, field in PRICE_FIELDS:
+        model = apps.get_model('pitch_api', model_name)
+        model.objects.update(**{field: F(field) * Value(Decimal(1) / PRICE_SCALE)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pitch_api', '0015_integer_id_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(prices_to_ticks, ticks_to_prices),
+        migrations.AlterField(
+            model_name='addordermessage',
+            name='price',
+            field=models.BigIntegerField(blank=True, help_text='Price of the order or trade, in 1/10,000ths', null=True),
+        ),
+        migrations.AlterField(
+            model_name='auctionmessage',
+            name='price',
+            field=models.BigIntegerField(blank=True, help_text='Price of the order or trade, in 1/10,000ths', null=True),
+        ),
+        migrations.AlterField(
+            model_name='auctionmessage',
+            name='reference_price',
+            field=models.BigIntegerField(default=0, help_text='Reference price of the auction, in 1/10,000ths'),
+        ),
+        migrations.AlterField(
+            model_name='cancelordermessage',
+            name='price',
+            field=models.BigIntegerField(blank=True, help_text='Price of the order or trade, in 1/10,000ths', null=True),
+        ),
+        migrations.AlterField(
+            model_name='deleteordermessage',
+            name='price',
+            field=models.BigIntegerField(blank=True, help_text='Price of the order or trade, in 1/10,000ths', null=True),
+        ),
+        migrations.AlterField(
+            model_name='modifyordermessage',
+            name='price',
+            field=models.BigIntegerField(blank=True, help_text='Price of the order or trade, in 1/10,000ths', null=True),
+        ),
+        migrations.AlterField(
+            model_name='systemeventmessage',
+            name='price',
+            field=models.BigIntegerField(blank=True, help_text='Price of the order or trade, in 1/10,000ths', null=True),
+        ),
+        migrations.AlterField(
+            model_name='tradebreakmessage',
+            name='price',
+            field=models.BigIntegerField(blank=True, help_text='Price of the order or trade, in 1/10,000ths', null=True),
+        ),
+        migrations.AlterField(
+            model_name='trademessage',
+            name='price',
+            field=models.BigIntegerField(blank=True, help_text='Price of the order or trade, in 1/10,000ths', null=True),
+        ),
+    ]
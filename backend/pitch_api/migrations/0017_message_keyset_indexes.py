@@ -0,0 +1,79 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:52
+
+from django.db import migrations, models
+from django.db.models import Count
+
+# Message table of every record kind
+MESSAGE_TABLES = {
+    'add_order': 'addordermessage',
+    'modify_order': 'modifyordermessage',
+    'cancel_order': 'cancelordermessage',
+    'delete_order': 'deleteordermessage',
+    'trade': 'trademessage',
+    'trade_break': 'tradebreakmessage',
+    'auction': 'auctionmessage',
+    'system_event': 'systemeventmessage',
+}
+
+
+def count_messages(apps, schema_editor):
+    """Store the table counts of completed files kept in the message tables"""
+    PitchFile = apps.get_model('pitch_api', 'PitchFile')
+    counts = {}
+    for kind, model_name in MESSAGE_TABLES.items():
+        model = apps.get_model('pitch_api', model_name)
+        for pitch_file, count in model.objects.values_list('pitch_file').annotate(Count('id')).order_by():
+            counts.setdefault(pitch_file, {})[kind] = count
+    files = PitchFile.objects.filter(status='completed', storage='database')
+    for pitch_file in files.only('pk', 'alias_of_id'):
+        found = counts.get(pitch_file.alias_of_id or pitch_file.pk, {})
+        pitch_file.message_table_counts = {kind: found.get(kind, 0) for kind in MESSAGE_TABLES}
+        pitch_file.save(update_fields=['message_table_counts'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pitch_api', '0016_fixed_point_prices'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pitchfile',
+            name='message_table_counts',
+            field=models.JSONField(blank=True, default=dict, help_text='Messages stored per message table, counted during the ingest'),
+        ),
+        migrations.RunPython(count_messages, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='addordermessage',
+            index=models.Index(fields=['pitch_file', 'timestamp', 'id'], name='pitch_api_a_pitch_f_c2b496_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auctionmessage',
+            index=models.Index(fields=['pitch_file', 'timestamp', 'id'], name='pitch_api_a_pitch_f_2d1a95_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cancelordermessage',
+            index=models.Index(fields=['pitch_file', 'timestamp', 'id'], name='pitch_api_c_pitch_f_d01dae_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deleteordermessage',
+            index=models.Index(fields=['pitch_file', 'timestamp', 'id'], name='pitch_api_d_pitch_f_2f5b4e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='modifyordermessage',
+            index=models.Index(fields=['pitch_file', 'timestamp', 'id'], name='pitch_api_m_pitch_f_ca6129_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='systemeventmessage',
+            index=models.Index(fields=['pitch_file', 'timestamp', 'id'], name='pitch_api_s_pitch_f_b1ff47_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tradebreakmessage',
+            index=models.Index(fields=['pitch_file', 'timestamp', 'id'], name='pitch_api_t_pitch_f_7bb1e5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trademessage',
+            index=models.Index(fields=['pitch_file', 'timestamp', 'id'], name='pitch_api_t_pitch_f_2fe6d7_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pitch_api', '0017_message_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='addordermessage',
+            name='pitch_api_a_pitch_f_f5047f_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='addordermessage',
+            name='pitch_api_a_pitch_f_ededeb_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='auctionmessage',
+            name='pitch_api_a_pitch_f_a5a1d4_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='cancelordermessage',
+            name='pitch_api_c_pitch_f_4ca484_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='trademessage',
+            name='pitch_api_t_pitch_f_f10025_idx',
+        ),
+        migrations.AddIndex(
+            model_name='addordermessage',
+            index=models.Index(fields=['pitch_file', 'order_id', 'timestamp', 'id'], name='pitch_api_a_pitch_f_570a8c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='addordermessage',
+            index=models.Index(fields=['pitch_file', 'symbol', 'timestamp', 'id'], name='pitch_api_a_pitch_f_711332_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auctionmessage',
+            index=models.Index(fields=['pitch_file', 'symbol', 'timestamp', 'id'], name='pitch_api_a_pitch_f_d9426e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cancelordermessage',
+            index=models.Index(fields=['pitch_file', 'order_id', 'timestamp', 'id'], name='pitch_api_c_pitch_f_a020a2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trademessage',
+            index=models.Index(fields=['pitch_file', 'order_id', 'timestamp', 'id'], name='pitch_api_t_pitch_f_7cc83a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trademessage',
+            index=models.Index(fields=['pitch_file', 'symbol', 'timestamp', 'id'], name='pitch_api_t_pitch_f_b0afd6_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pitch_api', '0018_message_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pitchfile',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='When the file was deleted; its rows are purged in the background', null=True),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:30
+
+import glob
+import os
+
+import numpy as np
+from django.conf import settings
+from django.db import migrations
+from django.db.models import F
+
+# Every message table has a timestamp column
+MESSAGE_MODELS = [
+    'addordermessage',
+    'modifyordermessage',
+    'cancelordermessage',
+    'deleteordermessage',
+    'trademessage',
+    'tradebreakmessage',
+    'auctionmessage',
+    'systemeventmessage',
+]
+
+# ASCII timestamps were stored in milliseconds; binary ones in nanoseconds
+TIMESTAMP_SCALE = 1_000_000
+
+# Message types only binary captures hold
+BINARY_TYPES = ['Time', 'Unit Clear']
+
+
+def _ascii_files(apps):
+    """IDs of the files whose messages were parsed from ASCII, and of their aliases"""
+    PitchFile = apps.get_model('pitch_api', 'pitchfile')
+    MessageType = apps.get_model('pitch_api', 'messagetype')
+    binary = MessageType.objects.filter(message_type__in=BINARY_TYPES).values('pitch_file_id')
+    sources = list(PitchFile.objects.filter(alias_of__isnull=True).exclude(pk__in=binary).values_list('pk', flat=True))
+    aliases = list(PitchFile.objects.filter(alias_of__in=sources).values_list('pk', flat=True))
+    return sources, aliases
+
+
+def _convert_columns(pitch_file_id, convert):
+    for path in glob.glob(os.path.join(settings.PITCH_COLUMN_STORE_DIR, str(pitch_file_id), '*', 'timestamp.npy')):
+        # Millisecond columns were narrowed to types too small for nanoseconds
+        np.save(path, convert(np.load(path).astype(np.int64)))
+
+
+def _convert(apps, convert, convert_column):
+    """
+    Rewrite the timestamps of ASCII files, in the message tables with the
+    expression ``convert`` and in the column store with ``convert_column``,
+    and rebuild what derives from them.
+    """
+    from pitch_api.caching import invalidate_responses
+    from pitch_api.ingest import save_aggregates
+    from pitch_api.models import PitchFile
+
+    sources, aliases = _ascii_files(apps)
+    if not sources:
+        return
+    for model_name in MESSAGE_MODELS:
+        model = apps.get_model('pitch_api', model_name)
+        model.objects.filter(pitch_file_id__in=sources).update(timestamp=convert(F('timestamp')))
+    # Bars were cut at nanosecond intervals out of millisecond timestamps, so
+    # lifecycles and bars are built again the way an ingest ends
+    for model_name in ('orderlifecycle', 'pricebar'):
+        apps.get_model('pitch_api', model_name).objects.filter(pitch_file_id__in=sources).delete()
+    for pitch_file in PitchFile.objects.filter(pk__in=sources):
+        if pitch_file.storage == PitchFile.STORAGE_COLUMNS:
+            _convert_columns(pitch_file.pk, convert_column)
+        save_aggregates(pitch_file)
+    invalidate_responses(sources + aliases)
+
+
+def milliseconds_to_nanoseconds(apps, schema_editor):
+    scale = lambda timestamps: timestamps * TIMESTAMP_SCALE
+    _convert(apps, scale, scale)
+
+
+def nanoseconds_to_milliseconds(apps, schema_editor):
+    # Integer columns divide to integers in SQL
+    _convert(apps, lambda timestamps: timestamps / TIMESTAMP_SCALE, lambda timestamps: timestamps // TIMESTAMP_SCALE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pitch_api', '0019_pitch_file_deleted_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(milliseconds_to_nanoseconds, nanoseconds_to_milliseconds),
+    ]
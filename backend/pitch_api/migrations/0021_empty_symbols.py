@@ -0,0 +1,67 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Models whose rows may point at the empty symbol
+MESSAGE_MODELS = [
+    'addordermessage',
+    'modifyordermessage',
+    'cancelordermessage',
+    'deleteordermessage',
+    'trademessage',
+    'tradebreakmessage',
+    'auctionmessage',
+    'systemeventmessage',
+    'orderlifecycle',
+]
+
+
+def clear_empty_symbol(apps, schema_editor):
+    """Store messages without a symbol with no symbol ID, and drop the empty ticker"""
+    from pitch_api.caching import invalidate_responses
+
+    Ticker = apps.get_model('pitch_api', 'Ticker')
+    ticker = Ticker.objects.filter(symbol='').first()
+    if ticker is None:
+        return
+    files = set()
+    for name in MESSAGE_MODELS:
+        rows = apps.get_model('pitch_api', name).objects.filter(symbol=ticker)
+        files.update(rows.values_list('pitch_file_id', flat=True).distinct())
+        rows.update(symbol=None)
+    # Bars were only built under the empty symbol from executions of orders
+    # without one, which no longer count
+    for name in ('pricebar', 'symbol'):
+        rows = apps.get_model('pitch_api', name).objects.filter(symbol=ticker)
+        files.update(rows.values_list('pitch_file_id', flat=True).distinct())
+        rows.delete()
+    ticker.delete()
+    PitchFile = apps.get_model('pitch_api', 'PitchFile')
+    aliases = PitchFile.objects.filter(alias_of__in=files).values_list('pk', flat=True)
+    invalidate_responses(sorted(files) + list(aliases))
+
+
+def restore_empty_symbol(apps, schema_editor):
+    """Point lifecycles without a symbol at the empty ticker, as the column requires"""
+    Ticker = apps.get_model('pitch_api', 'Ticker')
+    OrderLifecycle = apps.get_model('pitch_api', 'orderlifecycle')
+    if OrderLifecycle.objects.filter(symbol=None).exists():
+        ticker, _ = Ticker.objects.get_or_create(symbol='')
+        OrderLifecycle.objects.filter(symbol=None).update(symbol=ticker)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pitch_api', '0020_nanosecond_timestamps'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='orderlifecycle',
+            name='symbol',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='pitch_api.ticker'),
+        ),
+        migrations.RunPython(clear_empty_symbol, restore_empty_symbol),
+    ]
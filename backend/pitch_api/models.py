@@ -1,8 +1,39 @@
+import os
+import uuid
+
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
+
+# Prices are stored as integer multiples of 1/PRICE_SCALE, as the feed sends them
+PRICE_SCALE = 10000
+
+class PitchFileQuerySet(models.QuerySet):
+    def visible(self):
+        """Files that have not been deleted"""
+        return self.filter(deleted_at__isnull=True)
 
 class PitchFile(models.Model):
     """Model for storing uploaded PITCH files"""
+    STATUS_UPLOADING = 'uploading'
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_UPLOADING, 'Uploading'),
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    STORAGE_DATABASE = 'database'
+    STORAGE_COLUMNS = 'columns'
+    STORAGE_CHOICES = [
+        (STORAGE_DATABASE, 'Message tables'),
+        (STORAGE_COLUMNS, 'Column store'),
+    ]
+
     file_name = models.CharField(max_length=255)
     uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
@@ -11,10 +42,70 @@ class PitchFile(models.Model):
     unique_symbols_count = models.IntegerField()
     unique_order_ids_count = models.IntegerField()
     unique_execution_ids_count = models.IntegerField()
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING, help_text="Processing state of the upload")
+    storage = models.CharField(max_length=16, choices=STORAGE_CHOICES, default=STORAGE_DATABASE, help_text="Where the parsed messages are kept")
+    content_sha256 = models.CharField(max_length=64, blank=True, default='', db_index=True, help_text="SHA-256 digest of the uploaded bytes")
+    alias_of = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='aliases', help_text="Earlier upload of the same bytes whose stored messages this file shares")
+    message_table_counts = models.JSONField(default=dict, blank=True, help_text="Messages stored per message table, counted during the ingest")
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True, help_text="When the file was deleted; its rows are purged in the background")
+
+    objects = PitchFileQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.file_name} ({self.uploaded_at.strftime('%Y-%m-%d %H:%M')})"
 
+    @property
+    def message_source(self):
+        """The file the stored messages of this upload belong to"""
+        return self.alias_of if self.alias_of_id else self
+
+class IngestJob(models.Model):
+    """Background ingest of an uploaded PITCH file"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    pitch_file = models.OneToOneField(PitchFile, on_delete=models.CASCADE, related_name='job')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    total_bytes = models.BigIntegerField(default=0, help_text="Size of the uploaded file in bytes")
+    chunked = models.BooleanField(default=False, help_text="Whether the file is sent in numbered chunks")
+    received_chunks = models.IntegerField(default=0, help_text="Chunks of a chunked upload acknowledged so far")
+    received_bytes = models.BigIntegerField(default=0)
+    processed_bytes = models.BigIntegerField(default=0, help_text="Bytes of the file parsed so far")
+    lines_processed = models.BigIntegerField(default=0)
+    total_records = models.BigIntegerField(default=0, help_text="Messages to store once parsing has finished")
+    records_written = models.BigIntegerField(default=0)
+    peak_memory_bytes = models.BigIntegerField(null=True, blank=True, help_text="Peak resident memory of the worker during the ingest")
+    result = models.JSONField(null=True, blank=True, help_text="Message counts, summary and symbols of the finished ingest")
+    error = models.TextField(blank=True, default='')
+
+    def __str__(self):
+        return f"Ingest of {self.pitch_file.file_name}: {self.state}"
+
+    @property
+    def state(self):
+        return self.pitch_file.status
+
+    @property
+    def upload_path(self):
+        """Location the upload is spooled to until it has been ingested"""
+        return os.path.join(settings.PITCH_UPLOAD_DIR, str(self.id))
+
+    @property
+    def percent_complete(self):
+        """Messages are stored as the file is parsed, so parsed bytes measure progress"""
+        if self.state == PitchFile.STATUS_COMPLETED:
+            return 100.0
+        parsed = self.processed_bytes / self.total_bytes if self.total_bytes else 0.0
+        # The summary is still to be saved once every byte has been parsed
+        return round(min(parsed * 100.0, 99.9), 1)
+
+    @property
+    def lines_per_second(self):
+        if self.started_at is None:
+            return 0.0
+        elapsed = ((self.finished_at or timezone.now()) - self.started_at).total_seconds()
+        return round(self.lines_processed / elapsed, 1) if elapsed > 0 else 0.0
+
 class MessageType(models.Model):
     """Model for storing message types and their counts"""
     pitch_file = models.ForeignKey(PitchFile, on_delete=models.CASCADE, related_name='message_types')
@@ -24,13 +115,50 @@ class MessageType(models.Model):
     def __str__(self):
         return f"{self.message_type}: {self.count}"
         
+class Ticker(models.Model):
+    """
+    Entry of the symbol dictionary shared by all PITCH files.
+
+    Messages, lifecycles and bars refer to their symbol by the integer ID of
+    its entry. Entries are never deleted, so their IDs can be cached.
+    """
+    id = models.AutoField(primary_key=True)
+    symbol = models.CharField(max_length=16, unique=True)
+
+    def __str__(self):
+        return self.symbol
+
 class Symbol(models.Model):
     """Model for storing symbols found in PITCH files"""
     pitch_file = models.ForeignKey(PitchFile, on_delete=models.CASCADE, related_name='symbols')
-    symbol = models.CharField(max_length=16)
+    symbol = models.ForeignKey(Ticker, on_delete=models.PROTECT, related_name='+', db_index=False)
     
     def __str__(self):
-        return self.symbol
+        return str(self.symbol)
+
+class DistinctSketch(models.Model):
+    """HyperLogLog sketch of the distinct values of a field in a PITCH file"""
+    FIELD_SYMBOL = 'symbol'
+    FIELD_ORDER_ID = 'order_id'
+    FIELD_EXECUTION_ID = 'execution_id'
+    FIELD_CHOICES = [
+        (FIELD_SYMBOL, 'Symbols'),
+        (FIELD_ORDER_ID, 'Order IDs'),
+        (FIELD_EXECUTION_ID, 'Execution IDs'),
+    ]
+
+    pitch_file = models.ForeignKey(PitchFile, on_delete=models.CASCADE, related_name='sketches')
+    field = models.CharField(max_length=16, choices=FIELD_CHOICES)
+    precision = models.PositiveSmallIntegerField(help_text="The sketch has 2 ** precision registers")
+    registers = models.BinaryField(help_text="One byte per register")
+
+    def __str__(self):
+        return f"{self.get_field_display()} sketch of {self.pitch_file_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['pitch_file', 'field'], name='unique_distinct_sketch'),
+        ]
 
 # New message-specific models
 
@@ -39,14 +167,20 @@ class MessageBase(models.Model):
     pitch_file = models.ForeignKey(PitchFile, on_delete=models.CASCADE, related_name='%(class)s_messages')
     message_type = models.CharField(max_length=50, default='')
     timestamp = models.BigIntegerField(default=0, help_text="Time the message was generated (nanoseconds)")
-    order_id = models.CharField(max_length=50, null=True, blank=True, help_text="Unique ID for orders (if applicable)")
-    symbol = models.CharField(max_length=16, null=True, blank=True, help_text="Stock symbol (if applicable)")
-    price = models.DecimalField(max_digits=19, decimal_places=8, null=True, blank=True, help_text="Price of the order or trade")
+    order_id = models.BigIntegerField(null=True, blank=True, help_text="Unique ID for orders (if applicable), decoded from base 36")
+    # Messages are found by symbol through (pitch_file, symbol, timestamp, id)
+    # indexes, which also list them in time order, and tickers are never
+    # deleted, so the key needs no index of its own
+    symbol = models.ForeignKey(Ticker, on_delete=models.PROTECT, null=True, blank=True, related_name='+', db_index=False,
+                               help_text="Stock symbol (if applicable)")
+    price = models.BigIntegerField(null=True, blank=True, help_text="Price of the order or trade, in 1/10,000ths")
     quantity = models.IntegerField(null=True, blank=True, help_text="Number of shares in the order/trade")
     participant_id = models.CharField(max_length=16, null=True, blank=True, help_text="Market participant identifier (if applicable)")
     
     class Meta:
         abstract = True
+        # Every message table is also indexed on (pitch_file, timestamp, id),
+        # the key messages are listed and paginated by
 
 class AddOrderMessage(MessageBase):
     """Model for Add Order message type"""
@@ -57,8 +191,9 @@ class AddOrderMessage(MessageBase):
     
     class Meta:
         indexes = [
-            models.Index(fields=['pitch_file', 'order_id']),
-            models.Index(fields=['pitch_file', 'symbol']),
+            models.Index(fields=['pitch_file', 'timestamp', 'id']),
+            models.Index(fields=['pitch_file', 'order_id', 'timestamp', 'id']),
+            models.Index(fields=['pitch_file', 'symbol', 'timestamp', 'id']),
         ]
 
 class ModifyOrderMessage(MessageBase):
@@ -70,6 +205,7 @@ class ModifyOrderMessage(MessageBase):
     
     class Meta:
         indexes = [
+            models.Index(fields=['pitch_file', 'timestamp', 'id']),
             models.Index(fields=['pitch_file', 'order_id']),
         ]
 
@@ -82,7 +218,8 @@ class CancelOrderMessage(MessageBase):
     
     class Meta:
         indexes = [
-            models.Index(fields=['pitch_file', 'order_id']),
+            models.Index(fields=['pitch_file', 'timestamp', 'id']),
+            models.Index(fields=['pitch_file', 'order_id', 'timestamp', 'id']),
         ]
 
 class DeleteOrderMessage(MessageBase):
@@ -93,12 +230,13 @@ class DeleteOrderMessage(MessageBase):
     
     class Meta:
         indexes = [
+            models.Index(fields=['pitch_file', 'timestamp', 'id']),
             models.Index(fields=['pitch_file', 'order_id']),
         ]
 
 class TradeMessage(MessageBase):
     """Model for Trade message type"""
-    trade_id = models.CharField(max_length=50, default='', help_text="Unique trade ID")
+    trade_id = models.BigIntegerField(null=True, blank=True, help_text="Unique trade ID, decoded from base 36")
     executed_shares = models.IntegerField(default=0, help_text="Number of shares traded")
     
     def __str__(self):
@@ -106,33 +244,37 @@ class TradeMessage(MessageBase):
     
     class Meta:
         indexes = [
+            models.Index(fields=['pitch_file', 'timestamp', 'id']),
             models.Index(fields=['pitch_file', 'trade_id']),
-            models.Index(fields=['pitch_file', 'order_id']),
+            models.Index(fields=['pitch_file', 'order_id', 'timestamp', 'id']),
+            models.Index(fields=['pitch_file', 'symbol', 'timestamp', 'id']),
         ]
 
 class TradeBreakMessage(MessageBase):
     """Model for Trade Break message type"""
-    trade_id = models.CharField(max_length=50, default='', help_text="ID of the trade being broken")
+    trade_id = models.BigIntegerField(null=True, blank=True, help_text="ID of the trade being broken, decoded from base 36")
     
     def __str__(self):
         return f"Trade Break: {self.trade_id} - {self.symbol}"
     
     class Meta:
         indexes = [
+            models.Index(fields=['pitch_file', 'timestamp', 'id']),
             models.Index(fields=['pitch_file', 'trade_id']),
         ]
 
 class AuctionMessage(MessageBase):
     """Model for Auction message type"""
     auction_type = models.CharField(max_length=1, default='O', help_text="Type of auction")
-    reference_price = models.DecimalField(max_digits=19, decimal_places=8, default=0.0, help_text="Reference price of the auction")
+    reference_price = models.BigIntegerField(default=0, help_text="Reference price of the auction, in 1/10,000ths")
     
     def __str__(self):
         return f"Auction: {self.symbol} - Type: {self.auction_type} - Ref Price: {self.reference_price}"
     
     class Meta:
         indexes = [
-            models.Index(fields=['pitch_file', 'symbol']),
+            models.Index(fields=['pitch_file', 'timestamp', 'id']),
+            models.Index(fields=['pitch_file', 'symbol', 'timestamp', 'id']),
         ]
 
 class SystemEventMessage(MessageBase):
@@ -144,5 +286,64 @@ class SystemEventMessage(MessageBase):
     
     class Meta:
         indexes = [
+            models.Index(fields=['pitch_file', 'timestamp', 'id']),
             models.Index(fields=['pitch_file', 'event_code']),
-        ] 
\ No newline at end of file
+        ]
+
+class OrderLifecycle(models.Model):
+    """Life of an order, from its Add Order message to the last message about it"""
+    pitch_file = models.ForeignKey(PitchFile, on_delete=models.CASCADE, related_name='order_lifecycles')
+    order_id = models.BigIntegerField(help_text="Order ID, decoded from base 36")
+    symbol = models.ForeignKey(Ticker, on_delete=models.PROTECT, null=True, blank=True, related_name='+', db_index=False)
+    side = models.CharField(max_length=1, choices=[('B', 'Buy'), ('S', 'Sell')], default='B', help_text="'B' = Buy, 'S' = Sell")
+    quantity = models.IntegerField(default=0, help_text="Shares the order was added with")
+    executed_shares = models.IntegerField(default=0, help_text="Shares executed in total")
+    canceled_shares = models.IntegerField(default=0, help_text="Shares canceled in total")
+    remaining_shares = models.IntegerField(default=0, help_text="Shares still resting at the end of the file")
+    first_timestamp = models.BigIntegerField(default=0, help_text="Timestamp of the Add Order message (nanoseconds)")
+    last_timestamp = models.BigIntegerField(default=0, help_text="Timestamp of the last message about the order (nanoseconds)")
+
+    def __str__(self):
+        return f"Order {self.order_id}: {self.symbol} - {self.side} - {self.executed_shares}/{self.quantity} executed"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['pitch_file', 'order_id'], name='unique_order_lifecycle'),
+        ]
+
+class PriceBar(models.Model):
+    """Open/high/low/close/volume bar of the trades of a symbol over an interval"""
+    pitch_file = models.ForeignKey(PitchFile, on_delete=models.CASCADE, related_name='price_bars')
+    symbol = models.ForeignKey(Ticker, on_delete=models.PROTECT, related_name='+', db_index=False)
+    interval = models.CharField(max_length=8, help_text="Length of the bar, e.g. '1s', '1m' or '5m'")
+    start = models.BigIntegerField(help_text="Timestamp the bar starts at (nanoseconds)")
+    open = models.DecimalField(max_digits=19, decimal_places=8)
+    high = models.DecimalField(max_digits=19, decimal_places=8)
+    low = models.DecimalField(max_digits=19, decimal_places=8)
+    close = models.DecimalField(max_digits=19, decimal_places=8)
+    volume = models.BigIntegerField(default=0, help_text="Shares traded")
+    vwap = models.DecimalField(max_digits=19, decimal_places=8, help_text="Volume-weighted average price")
+    trades = models.IntegerField(default=0, help_text="Number of trades and executions")
+
+    def __str__(self):
+        return f"{self.symbol} {self.interval} bar at {self.start}: {self.open}/{self.high}/{self.low}/{self.close} x {self.volume}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['pitch_file', 'symbol', 'interval', 'start'], name='unique_price_bar'),
+        ]
+
+# Model receiving each record kind produced by the parser
+MESSAGE_MODELS = {
+    'add_order': AddOrderMessage,
+    'modify_order': ModifyOrderMessage,
+    'cancel_order': CancelOrderMessage,
+    'delete_order': DeleteOrderMessage,
+    'trade': TradeMessage,
+    'trade_break': TradeBreakMessage,
+    'auction': AuctionMessage,
+    'system_event': SystemEventMessage,
+}
+
+# Tables derived from the messages of a file while it is ingested
+DERIVED_MODELS = [OrderLifecycle, PriceBar]
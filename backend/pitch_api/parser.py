@@ -0,0 +1,353 @@
+"""
+Table-driven parser for CBOE PITCH (ASCII) data.
+
+Every message type is described once in ``LAYOUTS`` as a list of fixed-width
+fields with precomputed offsets and converters, so decoding a line is a single
+dict lookup followed by a handful of slices. Order and execution IDs are
+decoded into integers by ``ids.parse_id``. The module has no Django
+dependencies and can be used from views, management commands and benchmarks.
+"""
+import re
+from collections import namedtuple
+
+from .ids import parse_id
+
+# Define CBOE PITCH message types based on the specification
+MESSAGE_TYPES = {
+    'A': 'Add Order (short)',
+    'd': 'Add Order (long)',
+    '1': 'Add Order (extended)',
+    'E': 'Order Executed',
+    'X': 'Order Cancel',
+    'P': 'Trade (short)',
+    'r': 'Trade (long)',
+    '2': 'Trade (extended)',
+    'B': 'Trade Break',
+    'H': 'Trading Status',
+    'I': 'Auction Update',
+    '3': 'Auction Update (extended)',
+    'J': 'Auction Summary',
+    '4': 'Auction Summary (extended)',
+    'R': 'Retail Price Improvement',
+    's': 'Symbol Clear'
+}
+
+# Record kinds, one per message table
+MESSAGE_KINDS = (
+    'add_order', 'modify_order', 'cancel_order', 'delete_order',
+    'trade', 'trade_break', 'auction', 'system_event',
+)
+
+UNCATEGORIZED_FORMAT = 'Uncategorized Format'
+
+# Lines shorter than this carry no message type
+TIMESTAMP_LENGTH = 8
+
+# Timestamps count milliseconds in hexadecimal; they are stored in
+# nanoseconds, as those of binary captures are
+TIMESTAMP_SCALE = 1_000_000
+
+# Patterns used to recover IDs and symbols from non-standard lines
+ORDER_ID_PATTERN = re.compile(r'[A-Z0-9]{6,12}')
+SYMBOL_PATTERN = re.compile(r'[A-Z0-9]{3,8}')
+
+
+def _text(value):
+    return value.strip()
+
+
+def _char(value):
+    return value
+
+
+def _id(value):
+    """Order and execution IDs are base-36 numbers"""
+    return parse_id(value.strip())
+
+
+def _int(value):
+    value = value.strip()
+    try:
+        return int(value) if value else 0
+    except ValueError:
+        return 0
+
+
+def _price(value):
+    """Prices are sent with four implied decimal places and kept as such"""
+    value = value.strip()
+    try:
+        return int(value) if value else 0
+    except ValueError:
+        return 0
+
+
+def _side(value):
+    return value if value in ('B', 'S') else 'B'
+
+
+Field = namedtuple('Field', ['name', 'start', 'end', 'convert', 'default'])
+
+
+class MessageLayout:
+    """Fixed-width layout of a single PITCH message type"""
+
+    def __init__(self, code, kind, fields, copy=None, fallback=None):
+        self.code = code
+        self.name = MESSAGE_TYPES[code]
+        self.kind = kind
+        self.fields = tuple(Field(*field) for field in fields)
+        # Fields that repeat the value of another field, e.g. executed_shares
+        self.copy = tuple((copy or {}).items())
+        self.fallback = fallback
+        # A field is only read when the line extends past its end offset
+        self.min_length = max(field.end for field in self.fields) + 1
+
+    def decode(self, line, timestamp):
+        """Decode a line into a dict of model field values"""
+        record = {'message_type': self.name, 'timestamp': timestamp}
+        if len(line) >= self.min_length:
+            for name, start, end, convert, default in self.fields:
+                record[name] = convert(line[start:end])
+        else:
+            length = len(line)
+            for name, start, end, convert, default in self.fields:
+                record[name] = convert(line[start:end]) if length > end else default
+        for target, source in self.copy:
+            record[target] = record[source]
+        if self.fallback is not None:
+            self.fallback(line, record)
+        return record
+
+
+def _add_order_fallback(line, record):
+    """Recover order IDs and symbols from non-standard Add Order lines"""
+    if record['order_id'] is None:
+        match = ORDER_ID_PATTERN.search(line)
+        if match:
+            record['order_id'] = parse_id(match.group())
+    if not record['symbol'] and len(line) > 30:
+        match = SYMBOL_PATTERN.search(line, 21)
+        if match:
+            record['symbol'] = match.group()
+
+
+_ADD_ORDER_SHORT = (
+    ('order_id', 9, 21, _id, None),
+    ('side', 21, 22, _side, 'B'),
+    ('symbol', 28, 34, _text, ''),
+    ('price', 34, 44, _price, 0),
+    ('quantity', 44, 54, _int, 0),
+)
+
+_ADD_ORDER_LONG = (
+    ('order_id', 9, 21, _id, None),
+    ('side', 21, 22, _side, 'B'),
+    ('symbol', 28, 36, _text, ''),
+    ('price', 36, 50, _price, 0),
+    ('quantity', 50, 60, _int, 0),
+)
+
+_ORDER_EXECUTED = (
+    ('order_id', 9, 21, _id, None),
+    ('executed_shares', 21, 27, _int, 0),
+    ('trade_id', 27, 39, _id, None),
+)
+
+_ORDER_CANCEL = (
+    ('order_id', 9, 21, _id, None),
+    ('canceled_shares', 21, 27, _int, 0),
+)
+
+_TRADE_SHORT = (
+    ('order_id', 9, 21, _id, None),
+    ('quantity', 22, 28, _int, 0),
+    ('symbol', 28, 34, _text, ''),
+    ('price', 34, 44, _price, 0),
+    ('trade_id', 44, 56, _id, None),
+)
+
+_TRADE_LONG = (
+    ('order_id', 9, 21, _id, None),
+    ('quantity', 22, 28, _int, 0),
+    ('symbol', 28, 36, _text, ''),
+    ('price', 36, 50, _price, 0),
+    ('trade_id', 50, 62, _id, None),
+)
+
+_TRADE_BREAK = (
+    ('trade_id', 9, 21, _id, None),
+)
+
+_AUCTION_UPDATE = (
+    ('symbol', 9, 17, _text, ''),
+    ('auction_type', 17, 18, _char, 'O'),
+    ('reference_price', 50, 60, _price, 0),
+)
+
+_AUCTION_SUMMARY = (
+    ('symbol', 9, 17, _text, ''),
+    ('auction_type', 17, 18, _char, 'O'),
+    ('reference_price', 30, 40, _price, 0),
+)
+
+_SYSTEM_EVENT = (
+    ('symbol', 9, 17, _text, ''),
+    ('event_code', 17, 18, _char, 'S'),
+)
+
+_TRADE_COPY = {'executed_shares': 'quantity'}
+
+LAYOUTS = {
+    layout.code: layout for layout in (
+        MessageLayout('A', 'add_order', _ADD_ORDER_SHORT, fallback=_add_order_fallback),
+        MessageLayout('d', 'add_order', _ADD_ORDER_LONG, fallback=_add_order_fallback),
+        MessageLayout('1', 'add_order', _ADD_ORDER_LONG, fallback=_add_order_fallback),
+        MessageLayout('E', 'trade', _ORDER_EXECUTED),
+        MessageLayout('X', 'cancel_order', _ORDER_CANCEL),
+        MessageLayout('P', 'trade', _TRADE_SHORT, copy=_TRADE_COPY),
+        MessageLayout('r', 'trade', _TRADE_LONG, copy=_TRADE_COPY),
+        MessageLayout('2', 'trade', _TRADE_LONG, copy=_TRADE_COPY),
+        MessageLayout('B', 'trade_break', _TRADE_BREAK),
+        MessageLayout('I', 'auction', _AUCTION_UPDATE),
+        MessageLayout('3', 'auction', _AUCTION_UPDATE),
+        MessageLayout('J', 'auction', _AUCTION_SUMMARY),
+        MessageLayout('4', 'auction', _AUCTION_SUMMARY),
+        MessageLayout('H', 'system_event', _SYSTEM_EVENT),
+        MessageLayout('R', 'system_event', _SYSTEM_EVENT),
+        MessageLayout('s', 'system_event', _SYSTEM_EVENT),
+    )
+}
+
+
+def parse_timestamp(value):
+    """Hexadecimal milliseconds, in nanoseconds; anything else decodes to 0"""
+    value = value.strip()
+    try:
+        return int(value, 16) * TIMESTAMP_SCALE if value else 0
+    except ValueError:
+        return 0
+
+
+def parse_line(line):
+    """
+    Parse a single stripped PITCH line.
+
+    Returns a ``(type_name, kind, record)`` tuple. ``kind`` and ``record`` are
+    None for message types that are counted but not stored. Lines too short to
+    carry a message type return ``(UNCATEGORIZED_FORMAT, None, None)``.
+    """
+    if len(line) <= TIMESTAMP_LENGTH:
+        return UNCATEGORIZED_FORMAT, None, None
+    message_type = line[8]
+    layout = LAYOUTS.get(message_type)
+    if layout is None:
+        return MESSAGE_TYPES.get(message_type, f"Uncategorized ({message_type})"), None, None
+    return layout.name, layout.kind, layout.decode(line, parse_timestamp(line[:8]))
+
+
+class PitchParser:
+    """
+    Accumulates message counts, unique IDs and decoded records across lines.
+    """
+
+    # Wire format the records were decoded from
+    format = 'ascii'
+
+    # Collects distinct order and execution IDs: a set, or anything with the
+    # same add/update/|=/len interface such as a HyperLogLog sketch
+    distinct = set
+
+    def __init__(self):
+        self.line_count = 0
+        self.message_counts = {}
+        self.symbols = set()
+        self.order_ids = self.distinct()
+        self.execution_ids = self.distinct()
+        self.records = {kind: [] for kind in MESSAGE_KINDS}
+        self.record_counts = dict.fromkeys(MESSAGE_KINDS, 0)
+
+    def feed(self, line):
+        """Parse one raw line (str or bytes)"""
+        self.line_count += 1
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        line = line.strip()
+        if not line:
+            return
+        type_name, kind, record = parse_line(line)
+        counts = self.message_counts
+        counts[type_name] = counts.get(type_name, 0) + 1
+        if record is None:
+            return
+        self.records[kind].append(record)
+        self.track(record)
+
+    def track(self, record):
+        """Record the order ID, symbol and execution ID of a decoded message"""
+        value = record.get('order_id')
+        if value is not None:
+            self.order_ids.add(value)
+        value = record.get('symbol')
+        if value:
+            self.symbols.add(value)
+        value = record.get('trade_id')
+        if value is not None:
+            self.execution_ids.add(value)
+
+    def feed_lines(self, lines):
+        for line in lines:
+            self.feed(line)
+        return self
+
+    def merge(self, other):
+        """Append the results of a parser that read the lines following ours"""
+        self.line_count += other.line_count
+        counts = self.message_counts
+        for type_name, count in other.message_counts.items():
+            counts[type_name] = counts.get(type_name, 0) + count
+        self.symbols |= other.symbols
+        self.order_ids |= other.order_ids
+        self.execution_ids |= other.execution_ids
+        for kind, count in other.record_counts.items():
+            self.record_counts[kind] += count
+        for kind, records in other.records.items():
+            self.records[kind].extend(records)
+        return self
+
+    def drop_records(self):
+        """Forget the decoded records once they are stored, counting them per kind"""
+        for kind, records in self.records.items():
+            self.record_counts[kind] += len(records)
+        self.records = {}
+
+    def summary(self):
+        return {
+            "total_lines": self.line_count,
+            "unique_symbols": len(self.symbols),
+            "unique_order_ids": len(self.order_ids),
+            "unique_execution_ids": len(self.execution_ids)
+        }
+
+
+def extract_fallback_order_ids(lines):
+    """
+    Scan raw lines for anything that looks like an order ID.
+
+    Used when a file yielded no order IDs through the regular layouts.
+    """
+    order_ids = set()
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        for potential_id in ORDER_ID_PATTERN.findall(line.strip()):
+            if not potential_id.isalpha():
+                order_ids.add(parse_id(potential_id))
+    return order_ids
+
+
+def parse_file(path):
+    """Parse a PITCH file from disk and return the populated parser"""
+    # Universal newlines split lines the same way as iterating an upload
+    with open(path, 'r', encoding='utf-8', errors='replace', newline=None) as file:
+        return PitchParser().feed_lines(file)
@@ -0,0 +1,88 @@
+"""
+Purge of deleted files.
+
+Deleting a file only marks it deleted, which hides it from the API at once.
+Its rows are removed afterwards by ``purge_deleted_files`` on the ingest
+worker pool. Every message and derived table is emptied of the file's rows
+with raw range deletes of at most ``PITCH_PURGE_BATCH_SIZE`` rows, each
+committed on its own, so the database is never locked for long and no rows
+are loaded into memory. The file row and its summary rows go last.
+
+A deleted file whose messages are shared by aliases keeps them until its
+last alias is deleted as well. Files still being ingested are purged once
+their ingest has finished; chunked uploads still being received are purged
+under the lock their chunks are parsed under.
+"""
+import logging
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.db import connection
+
+from .chunked import discard_upload, upload_lock
+from .columns import discard_columns
+from .models import PitchFile, IngestJob, MESSAGE_MODELS, DERIVED_MODELS
+
+logger = logging.getLogger(__name__)
+
+
+def _purge_table(model, pitch_file_id, size):
+    """Delete the rows of a file from the table of ``model``, ``size`` at a time"""
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    column = quote(model._meta.get_field('pitch_file').column)
+    pk = quote(model._meta.pk.column)
+    deleted = 0
+    with connection.cursor() as cursor:
+        while True:
+            # The last row of the next batch bounds a range delete over the
+            # pitch_file index, which holds the rows of a file in pk order
+            cursor.execute(
+                f'SELECT {pk} FROM {table} WHERE {column} = %s ORDER BY {pk} LIMIT 1 OFFSET %s',
+                [pitch_file_id, size - 1],
+            )
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute(f'DELETE FROM {table} WHERE {column} = %s', [pitch_file_id])
+                return deleted + cursor.rowcount
+            cursor.execute(f'DELETE FROM {table} WHERE {column} = %s AND {pk} <= %s', [pitch_file_id, row[0]])
+            deleted += cursor.rowcount
+
+
+def purge_file(pitch_file):
+    """Delete a deleted file and everything stored for it"""
+    size = settings.PITCH_PURGE_BATCH_SIZE
+    deleted = 0
+    job = IngestJob.objects.filter(pitch_file=pitch_file).first()
+    # Chunks of an upload are parsed and stored under its lock; a parse that
+    # waits for it finds the job gone
+    receiving = job is not None and job.chunked and pitch_file.status == PitchFile.STATUS_UPLOADING
+    with upload_lock(job) if receiving else nullcontext():
+        for model in [*MESSAGE_MODELS.values(), *DERIVED_MODELS]:
+            deleted += _purge_table(model, pitch_file.pk, size)
+        discard_columns(pitch_file.pk)
+        # Only the summary rows are left for the cascade
+        pitch_file.delete()
+    if job is not None:
+        discard_upload(job)
+    logger.info(f"Purged {pitch_file.file_name}: {deleted} rows")
+    return deleted
+
+
+def purgeable_files():
+    """Deleted files that neither an alias nor a running ingest still needs"""
+    return PitchFile.objects.filter(deleted_at__isnull=False, aliases__isnull=True).exclude(
+        status__in=(PitchFile.STATUS_PENDING, PitchFile.STATUS_PROCESSING)
+    ).order_by('pk')
+
+
+def purge_deleted_files():
+    """Purge deleted files until none is left to purge; returns how many were"""
+    purged = 0
+    while True:
+        # Purging the last alias of a file makes the file purgeable
+        pitch_file = purgeable_files().first()
+        if pitch_file is None:
+            return purged
+        purge_file(pitch_file)
+        purged += 1
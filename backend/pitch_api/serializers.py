@@ -1,12 +1,19 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import (
-    PitchFile, MessageType, Symbol, AddOrderMessage, ModifyOrderMessage,
+    PitchFile, IngestJob, MessageType, Symbol, AddOrderMessage, ModifyOrderMessage,
     CancelOrderMessage, DeleteOrderMessage, TradeMessage, TradeBreakMessage, 
-    AuctionMessage, SystemEventMessage
+    AuctionMessage, SystemEventMessage, OrderLifecycle, PriceBar, PRICE_SCALE
 )
+from .ids import format_id
+from .symbols import symbol_name
 
 class FileUploadSerializer(serializers.Serializer):
     file = serializers.FileField()
+
+class ChunkedUploadInitSerializer(serializers.Serializer):
+    file_name = serializers.CharField(max_length=255)
+    file_size = serializers.IntegerField(min_value=0, help_text="Total size of the file in bytes")
     
 class MessageCountSerializer(serializers.Serializer):
     message_counts = serializers.DictField(
@@ -14,7 +21,48 @@ class MessageCountSerializer(serializers.Serializer):
         help_text="Count of each message type"
     )
 
+class SymbolField(serializers.Field):
+    """
+    Symbol of a row, looked up in the symbol dictionary by its ID.
+
+    Messages read from the column store are dicts carrying the symbol itself.
+    """
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        if isinstance(instance, dict):
+            return instance.get(self.source)
+        return symbol_name(getattr(instance, f'{self.source}_id'))
+
+    def to_representation(self, value):
+        return value
+
+class IdField(serializers.Field):
+    """Order or execution ID, rendered in base 36 as the feed sends it"""
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return format_id(value)
+
+class PriceField(serializers.Field):
+    """Price stored in ticks of 1/PRICE_SCALE, rendered as a decimal string"""
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        sign = '-' if value < 0 else ''
+        whole, fraction = divmod(abs(value), PRICE_SCALE)
+        # Eight decimal places, as when prices were stored as decimals
+        return f'{sign}{whole}.{fraction * (10 ** 8 // PRICE_SCALE):08d}'
+
 class SymbolSerializer(serializers.ModelSerializer):
+    symbol = SymbolField()
+
     class Meta:
         model = Symbol
         fields = ['symbol']
@@ -31,7 +79,7 @@ class PitchFileSerializer(serializers.ModelSerializer):
             'id', 'file_name', 'uploaded_at', 'file_size', 
             'total_lines', 'unique_symbols_count', 
             'unique_order_ids_count', 'unique_execution_ids_count',
-            'uploaded_by'
+            'uploaded_by', 'status', 'storage', 'content_sha256', 'alias_of'
         ]
 
 class PitchFileDetailSerializer(serializers.ModelSerializer):
@@ -44,7 +92,8 @@ class PitchFileDetailSerializer(serializers.ModelSerializer):
             'id', 'file_name', 'uploaded_at', 'file_size', 
             'total_lines', 'unique_symbols_count', 
             'unique_order_ids_count', 'unique_execution_ids_count',
-            'uploaded_by', 'message_counts', 'symbols'
+            'uploaded_by', 'status', 'storage', 'content_sha256', 'alias_of',
+            'message_counts', 'symbols'
         ]
     
     def get_message_counts(self, obj):
@@ -53,10 +102,46 @@ class PitchFileDetailSerializer(serializers.ModelSerializer):
     
     def get_symbols(self, obj):
         symbols = obj.symbols.all()[:100]  # Limit to 100 symbols
-        return [symbol.symbol for symbol in symbols]
+        return [symbol_name(symbol.symbol_id) for symbol in symbols]
+
+class IngestJobSerializer(serializers.ModelSerializer):
+    file_id = serializers.IntegerField(source='pitch_file_id', read_only=True)
+    state = serializers.CharField(read_only=True)
+    percent_complete = serializers.FloatField(read_only=True)
+    lines_per_second = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = IngestJob
+        fields = [
+            'id', 'file_id', 'state', 'percent_complete', 'lines_processed',
+            'lines_per_second', 'total_bytes', 'processed_bytes',
+            'total_records', 'records_written', 'peak_memory_bytes',
+            'created_at', 'started_at', 'finished_at', 'result', 'error'
+        ]
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    file_id = serializers.IntegerField(source='pitch_file_id', read_only=True)
+    file_name = serializers.CharField(source='pitch_file.file_name', read_only=True)
+    state = serializers.CharField(read_only=True)
+    next_chunk = serializers.IntegerField(source='received_chunks', read_only=True)
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = IngestJob
+        fields = [
+            'id', 'file_id', 'file_name', 'state', 'total_bytes',
+            'received_bytes', 'next_chunk', 'chunk_size'
+        ]
+
+    def get_chunk_size(self, obj):
+        return settings.PITCH_UPLOAD_CHUNK_SIZE
 
 # Message-specific serializers
 class AddOrderMessageSerializer(serializers.ModelSerializer):
+    order_id = IdField()
+    symbol = SymbolField()
+    price = PriceField()
+
     class Meta:
         model = AddOrderMessage
         fields = [
@@ -65,6 +150,10 @@ class AddOrderMessageSerializer(serializers.ModelSerializer):
         ]
 
 class ModifyOrderMessageSerializer(serializers.ModelSerializer):
+    order_id = IdField()
+    symbol = SymbolField()
+    price = PriceField()
+
     class Meta:
         model = ModifyOrderMessage
         fields = [
@@ -73,6 +162,10 @@ class ModifyOrderMessageSerializer(serializers.ModelSerializer):
         ]
 
 class CancelOrderMessageSerializer(serializers.ModelSerializer):
+    order_id = IdField()
+    symbol = SymbolField()
+    price = PriceField()
+
     class Meta:
         model = CancelOrderMessage
         fields = [
@@ -81,6 +174,10 @@ class CancelOrderMessageSerializer(serializers.ModelSerializer):
         ]
 
 class DeleteOrderMessageSerializer(serializers.ModelSerializer):
+    order_id = IdField()
+    symbol = SymbolField()
+    price = PriceField()
+
     class Meta:
         model = DeleteOrderMessage
         fields = [
@@ -89,6 +186,11 @@ class DeleteOrderMessageSerializer(serializers.ModelSerializer):
         ]
 
 class TradeMessageSerializer(serializers.ModelSerializer):
+    order_id = IdField()
+    symbol = SymbolField()
+    price = PriceField()
+    trade_id = IdField()
+
     class Meta:
         model = TradeMessage
         fields = [
@@ -97,6 +199,11 @@ class TradeMessageSerializer(serializers.ModelSerializer):
         ]
 
 class TradeBreakMessageSerializer(serializers.ModelSerializer):
+    order_id = IdField()
+    symbol = SymbolField()
+    price = PriceField()
+    trade_id = IdField()
+
     class Meta:
         model = TradeBreakMessage
         fields = [
@@ -105,6 +212,11 @@ class TradeBreakMessageSerializer(serializers.ModelSerializer):
         ]
 
 class AuctionMessageSerializer(serializers.ModelSerializer):
+    order_id = IdField()
+    symbol = SymbolField()
+    price = PriceField()
+    reference_price = PriceField()
+
     class Meta:
         model = AuctionMessage
         fields = [
@@ -113,9 +225,41 @@ class AuctionMessageSerializer(serializers.ModelSerializer):
         ]
 
 class SystemEventMessageSerializer(serializers.ModelSerializer):
+    order_id = IdField()
+    symbol = SymbolField()
+    price = PriceField()
+
     class Meta:
         model = SystemEventMessage
         fields = [
             'id', 'message_type', 'timestamp', 'order_id', 'symbol',
             'price', 'quantity', 'event_code'
-        ] 
\ No newline at end of file
+        ]
+
+class OrderLifecycleSerializer(serializers.ModelSerializer):
+    order_id = IdField()
+    symbol = SymbolField()
+
+    class Meta:
+        model = OrderLifecycle
+        fields = [
+            'order_id', 'symbol', 'side', 'quantity', 'executed_shares',
+            'canceled_shares', 'remaining_shares', 'first_timestamp', 'last_timestamp'
+        ]
+
+class PriceBarSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PriceBar
+        fields = ['start', 'open', 'high', 'low', 'close', 'volume', 'vwap', 'trades']
+
+# Serializer of each message table, by record kind as in MESSAGE_MODELS
+MESSAGE_SERIALIZERS = {
+    'add_order': AddOrderMessageSerializer,
+    'modify_order': ModifyOrderMessageSerializer,
+    'cancel_order': CancelOrderMessageSerializer,
+    'delete_order': DeleteOrderMessageSerializer,
+    'trade': TradeMessageSerializer,
+    'trade_break': TradeBreakMessageSerializer,
+    'auction': AuctionMessageSerializer,
+    'system_event': SystemEventMessageSerializer,
+}
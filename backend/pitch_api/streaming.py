@@ -0,0 +1,55 @@
+"""
+Block-wise decoding of PITCH data read from a stream.
+
+The stream is consumed in blocks that end on a line (or sequenced unit)
+boundary and every block is decoded on its own, so only one block of the
+input is held in memory at a time. Blocks are read with ``read()`` rather
+than through a memory map, whose pages would stay resident for the whole
+file.
+"""
+from .binary import SNIFF_SIZE, complete_length, is_binary, parse_binary
+from .vectorized import parse_buffer
+
+
+def _line_length(block):
+    return block.rfind(b'\n') + 1
+
+
+def iter_blocks(stream, block_size, split, pending=b''):
+    """
+    Read ``stream`` in blocks of about ``block_size`` bytes.
+
+    ``split`` returns how many leading bytes of a block can be decoded on
+    their own; the rest is carried over to the next block. ``pending`` holds
+    bytes already read from the stream.
+    """
+    while True:
+        data = stream.read(block_size)
+        if not data:
+            break
+        pending += data
+        cut = split(pending)
+        if cut:
+            yield pending[:cut]
+            pending = pending[cut:]
+    if pending:
+        yield pending
+
+
+def parse_stream(stream, block_size, decode=parse_buffer):
+    """
+    Decode a PITCH stream block by block.
+
+    Both ASCII and binary captures are supported; the format is detected from
+    the first bytes. ASCII blocks are decoded with ``decode``. Yields a
+    ``PitchParser`` for every block, in stream order.
+    """
+    head = stream.read(SNIFF_SIZE)
+    if is_binary(head):
+        seconds = {}
+        blocks = iter_blocks(stream, block_size, complete_length, head)
+        decode = lambda block: parse_binary(block, seconds)
+    else:
+        blocks = iter_blocks(stream, block_size, _line_length, head)
+    for block in blocks:
+        yield decode(block)
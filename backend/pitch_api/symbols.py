@@ -0,0 +1,72 @@
+"""
+Global symbol dictionary.
+
+Every symbol is stored once, as a ``Ticker`` row shared by all files, and
+the message, lifecycle and bar tables hold the integer ID of its row. The
+dictionary only grows and its IDs never change, so each process interns
+the symbols it has seen in a dict: loading records looks their symbols up
+there and only goes to the database for new ones, and the API turns IDs
+back into symbols the same way.
+"""
+from django.db import transaction
+
+from .models import Ticker
+
+# Symbols added or looked up per query
+LOOKUP_BATCH_SIZE = 500
+
+_ids = {}
+_symbols = {}
+
+
+def _remember(entries):
+    for pk, symbol in entries:
+        _ids[symbol] = pk
+        _symbols[pk] = symbol
+
+
+def symbol_ids(symbols):
+    """
+    Map symbols to their dictionary IDs, adding those it does not hold yet.
+
+    Returns a dict holding at least the given symbols; None and empty
+    symbols have no ID and are left out. New entries are only
+    cached once the transaction that added them commits, so a rolled back
+    ingest leaves no IDs behind that the database does not know.
+    """
+    missing = [symbol for symbol in set(symbols) if symbol and symbol not in _ids]
+    if not missing:
+        return _ids
+    entries = []
+    for start in range(0, len(missing), LOOKUP_BATCH_SIZE):
+        batch = missing[start:start + LOOKUP_BATCH_SIZE]
+        Ticker.objects.bulk_create([Ticker(symbol=symbol) for symbol in batch], ignore_conflicts=True)
+        entries.extend(Ticker.objects.filter(symbol__in=batch).values_list('pk', 'symbol'))
+    transaction.on_commit(lambda: _remember(entries))
+    ids = dict(_ids)
+    ids.update((symbol, pk) for pk, symbol in entries)
+    return ids
+
+
+def symbol_id(symbol):
+    """ID of a symbol, or None if no file holds it"""
+    if not symbol:
+        return None
+    pk = _ids.get(symbol)
+    if pk is None:
+        pk = Ticker.objects.filter(symbol=symbol).values_list('pk', flat=True).first()
+        if pk is not None:
+            _remember([(pk, symbol)])
+    return pk
+
+
+def symbol_name(pk):
+    """The symbol of a dictionary ID"""
+    if pk is None:
+        return None
+    symbol = _symbols.get(pk)
+    if symbol is None:
+        # Entries of other processes: load the whole dictionary at once
+        _remember(Ticker.objects.values_list('pk', 'symbol'))
+        symbol = _symbols.get(pk)
+    return symbol
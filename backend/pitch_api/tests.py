@@ -0,0 +1,559 @@
+import os
+import random
+import struct
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from . import symbols
+from .binary import UNIT_HEADER, is_binary, parse_binary
+from .chunked import finish_upload
+from .ids import parse_id
+from .ingest import ingest_file
+from .models import (
+    DERIVED_MODELS, MESSAGE_MODELS, IngestJob, OrderLifecycle, PitchFile, PriceBar, SystemEventMessage, Ticker,
+)
+from .parser import LAYOUTS, MESSAGE_TYPES, PitchParser
+from .purge import purge_deleted_files
+from .sketches import HyperLogLog, relative_error, union
+from .vectorized import parse_buffer
+
+# 9:30 in milliseconds since midnight
+MARKET_OPEN = 34_200_000
+
+
+def trade_line(milliseconds, symbol, price, shares, trade_id):
+    """A Trade (short) message; prices are in ticks"""
+    return f'{milliseconds:08X}P{"0":>12}B{shares:06d}{symbol:<6}{price:010d}{trade_id:>12}'
+
+
+def add_order_line(milliseconds, order_id, side, symbol, price, quantity):
+    """An Add Order (short) message"""
+    return f'{milliseconds:08X}A{order_id:>12}{side}{0:06d}{symbol:<6}{price:010d}{quantity:010d}Y'
+
+
+def executed_line(milliseconds, order_id, shares, trade_id):
+    """An Order Executed message"""
+    return f'{milliseconds:08X}E{order_id:>12}{shares:06d}{trade_id:>12}Y'
+
+
+def cancel_line(milliseconds, order_id, shares):
+    """An Order Cancel message"""
+    return f'{milliseconds:08X}X{order_id:>12}{shares:06d}Y'
+
+
+def session_lines(count=300):
+    """
+    Orders on three symbols over a few minutes, each executed and canceled
+    in part a few messages later, with a trade every fifth order.
+    """
+    symbols = ['AAPL', 'MSFT', 'IBM']
+    lines = []
+    for i in range(count):
+        milliseconds = MARKET_OPEN + i * 700
+        symbol = symbols[i % len(symbols)]
+        lines.append(add_order_line(milliseconds, f'ORD{i:05d}', 'BS'[i % 2], symbol, 1_000_000 + i * 100, 500))
+        if i >= 2:
+            lines.append(executed_line(milliseconds, f'ORD{i - 2:05d}', 200, f'EXE{i:05d}'))
+        if i >= 3 and i % 3 == 0:
+            lines.append(cancel_line(milliseconds, f'ORD{i - 3:05d}', 100))
+        if i % 5 == 0:
+            lines.append(trade_line(milliseconds, symbol, 1_000_000 + i * 50, 300, f'TRD{i:05d}'))
+    return lines
+
+
+def new_file():
+    return PitchFile.objects.create(
+        file_name='test.txt', file_size=0, total_lines=0, unique_symbols_count=0,
+        unique_order_ids_count=0, unique_execution_ids_count=0,
+    )
+
+
+def ingest_lines(lines):
+    """Ingest ASCII lines as a new file and return it"""
+    pitch_file = new_file()
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as file:
+        file.write('\n'.join(lines) + '\n')
+    try:
+        ingest_file(pitch_file, file.name)
+    finally:
+        os.remove(file.name)
+    return pitch_file
+
+
+def derived_rows(pitch_file):
+    """The lifecycle and bar rows of a file, comparable across files"""
+    rows = {}
+    for model in (OrderLifecycle, PriceBar):
+        fields = [
+            'symbol__symbol' if field.name == 'symbol' else field.attname
+            for field in model._meta.concrete_fields if field.name not in ('id', 'pitch_file')
+        ]
+        rows[model.__name__] = sorted(model.objects.filter(pitch_file=pitch_file).values_list(*fields))
+    return rows
+
+
+class IngestTestCase(TestCase):
+    def setUp(self):
+        # The Ticker rows of earlier tests are rolled back, so forget their IDs
+        symbols._ids.clear()
+        symbols._symbols.clear()
+
+
+class PriceBarTests(IngestTestCase):
+    def test_ascii_trades_fall_into_minute_bars(self):
+        # A trade every 30 seconds for five minutes
+        lines = [
+            trade_line(MARKET_OPEN + i * 30_000, 'AAPL', 1_500_000 + i, 100, f'T{i:04d}')
+            for i in range(10)
+        ]
+        for threshold in (None, 1):
+            # Line by line and column-wise decoding
+            with self.subTest(vectorized_min_size=threshold), \
+                    override_settings(PITCH_VECTORIZED_MIN_SIZE=threshold):
+                pitch_file = ingest_lines(lines)
+                bars = PriceBar.objects.filter(pitch_file=pitch_file, interval='1m').order_by('start')
+                minute = 60 * 10**9
+                self.assertEqual(
+                    [bar.start for bar in bars],
+                    [MARKET_OPEN * 10**6 + i * minute for i in range(5)],
+                )
+                self.assertEqual([bar.trades for bar in bars], [2] * 5)
+                self.assertEqual(PriceBar.objects.filter(pitch_file=pitch_file, interval='5m').count(), 1)
+
+
+class EmptySymbolTests(IngestTestCase):
+    def test_messages_without_a_symbol_store_no_symbol_id(self):
+        lines = session_lines(10) + [
+            # An Add Order cut short before its symbol, then executed
+            add_order_line(MARKET_OPEN, 'NOSYM', 'B', 'AAPL', 1_000_000, 500)[:28],
+            executed_line(MARKET_OPEN, 'NOSYM', 100, 'EXENOSYM'),
+            # A Trading Status with a blank symbol
+            f'{MARKET_OPEN:08X}H{"":8}T',
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            for column_store in (False, True):
+                with self.subTest(column_store=column_store), \
+                        override_settings(PITCH_COLUMN_STORE=column_store, PITCH_COLUMN_STORE_DIR=directory):
+                    pitch_file = ingest_lines(lines)
+                    self.assertFalse(Ticker.objects.filter(symbol='').exists())
+                    lifecycle = OrderLifecycle.objects.get(pitch_file=pitch_file, order_id=parse_id('NOSYM'))
+                    self.assertIsNone(lifecycle.symbol_id)
+                    self.assertEqual(lifecycle.executed_shares, 100)
+        # Only the file kept in the message tables stores its Trading Status there
+        self.assertEqual(list(SystemEventMessage.objects.values_list('symbol_id', flat=True)), [None])
+
+
+@override_settings(PITCH_PARSE_WORKERS=1)
+class BlockMergeTests(IngestTestCase):
+    """Files parsed in many blocks give the results of a single pass"""
+
+    def setUp(self):
+        super().setUp()
+        self.lines = session_lines()
+        with override_settings(PITCH_PARSE_BLOCK_SIZE=1024 * 1024):
+            self.single = ingest_lines(self.lines)
+        self.single_rows = derived_rows(self.single)
+
+    def assertSameFile(self, pitch_file):
+        self.single.refresh_from_db()
+        pitch_file.refresh_from_db()
+        for field in ('total_lines', 'unique_symbols_count', 'unique_order_ids_count',
+                      'unique_execution_ids_count', 'message_table_counts'):
+            self.assertEqual(getattr(pitch_file, field), getattr(self.single, field), field)
+        self.assertEqual(
+            sorted(pitch_file.message_types.values_list('message_type', 'count')),
+            sorted(self.single.message_types.values_list('message_type', 'count')),
+        )
+        self.assertEqual(derived_rows(pitch_file), self.single_rows)
+
+    def test_blocks(self):
+        self.assertEqual(len(self.single_rows['OrderLifecycle']), 300)
+        self.assertTrue(self.single_rows['PriceBar'])
+        with override_settings(PITCH_PARSE_BLOCK_SIZE=1000):
+            self.assertSameFile(ingest_lines(self.lines))
+
+    def test_chunked_upload(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(PITCH_UPLOAD_DIR=directory, PITCH_PARSE_BLOCK_SIZE=1000):
+            pitch_file = new_file()
+            job = IngestJob.objects.create(pitch_file=pitch_file, chunked=True)
+            with open(job.upload_path, 'w') as file:
+                file.write('\n'.join(self.lines) + '\n')
+            size = os.path.getsize(job.upload_path)
+            IngestJob.objects.filter(pk=job.pk).update(total_bytes=size, received_bytes=size)
+            job.refresh_from_db()
+            finish_upload(pitch_file, job)
+            self.assertGreater(len(os.listdir(job.upload_path + '.parts')), 1)
+        self.assertSameFile(pitch_file)
+
+
+class TimelineTests(IngestTestCase):
+    def setUp(self):
+        super().setUp()
+        owner = User.objects.create_user('owner', password='secret')
+        self.pitch_file = ingest_lines(session_lines(60))
+        PitchFile.objects.filter(pk=self.pitch_file.pk).update(uploaded_by=owner)
+        self.client = APIClient()
+        self.client.force_authenticate(owner)
+
+    def pages(self, query):
+        """The pages of a timeline walked forward, then backward from its last page"""
+        url = f'/api/files/{self.pitch_file.pk}/timeline/?{query}'
+        forward, backward = [], []
+        while url is not None:
+            data = self.client.get(url).data
+            forward.append([(event['kind'], event['id']) for event in data['results']])
+            url, previous = data['next'], data['previous']
+        while previous is not None:
+            data = self.client.get(previous).data
+            backward.append([(event['kind'], event['id']) for event in data['results']])
+            previous = data['previous']
+        return forward, backward
+
+    def assertWalks(self, query, expected=None):
+        forward, backward = self.pages(query)
+        events = [event for page in forward for event in page]
+        self.assertEqual(len(events), len(set(events)))
+        if expected is not None:
+            self.assertEqual(events, expected)
+        # Walking back from the last page visits the same pages in reverse
+        self.assertEqual(backward, forward[-2::-1])
+        return events
+
+    def test_walks_visit_every_row_once(self):
+        keys = []
+        for table, (kind, model) in enumerate(MESSAGE_MODELS.items()):
+            rows = model.objects.filter(pitch_file=self.pitch_file).values_list('timestamp', 'id')
+            keys += [(timestamp, table, pk, kind) for timestamp, pk in rows]
+        expected = [(kind, pk) for timestamp, table, pk, kind in sorted(keys)]
+        self.assertGreater(len(expected), 100)
+        self.assertWalks('limit=7', expected)
+
+    def test_symbol_walks_visit_every_row_once(self):
+        everything = set(self.assertWalks('limit=7'))
+        events = self.assertWalks('limit=5&symbol=AAPL')
+        self.assertTrue(events)
+        self.assertLess(set(events), everything)
+
+
+class ColumnStoreTests(IngestTestCase):
+    def test_messages_are_read_back_from_the_column_store(self):
+        lines = session_lines(30)
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(PITCH_COLUMN_STORE=True, PITCH_COLUMN_STORE_DIR=directory):
+            pitch_file = ingest_lines(lines)
+            pitch_file.refresh_from_db()
+            self.assertEqual(pitch_file.storage, PitchFile.STORAGE_COLUMNS)
+            response = APIClient().get(f'/api/files/{pitch_file.pk}/add-orders/?limit=1000')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['count'], 30)
+            self.assertEqual(
+                sorted(message['order_id'] for message in response.data['results']),
+                [f'ORD{i:05d}'.rjust(12, '0') for i in range(30)],
+            )
+
+
+class ExportTests(IngestTestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user('owner', password='secret')
+        self.pitch_file = ingest_lines(session_lines(30))
+        PitchFile.objects.filter(pk=self.pitch_file.pk).update(uploaded_by=self.owner)
+        self.url = f'/api/files/{self.pitch_file.pk}/add-orders/export/?format=ndjson'
+
+    def test_owner_downloads_every_message(self):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        response = client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 30)
+
+    def test_anonymous_and_other_users_are_refused(self):
+        self.assertIn(APIClient().get(self.url).status_code, (401, 403))
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('other', password='secret'))
+        self.assertEqual(client.get(self.url).status_code, 403)
+
+
+class VectorizedParserTests(TestCase):
+    """Column-wise decoding gives the records and counts of line by line parsing"""
+
+    def assertSameParse(self, data):
+        expected = PitchParser().feed_lines(data.splitlines())
+        parser = parse_buffer(data)
+        self.assertEqual(parser.records, expected.records)
+        for name in ('line_count', 'message_counts', 'symbols', 'order_ids', 'execution_ids'):
+            self.assertEqual(getattr(parser, name), getattr(expected, name), name)
+
+    def test_well_formed_lines(self):
+        self.assertSameParse('\n'.join(session_lines(50)).encode() + b'\n')
+
+    def test_mixed_and_truncated_lines(self):
+        rng = random.Random(5)
+        alphabet = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ abcxyz.-'
+        lines = []
+        for code in [*LAYOUTS, 'Z', 'T']:
+            for length in range(0, 72, 3):
+                timestamp = f'{rng.randrange(1 << 32):08X}' if rng.random() < 0.8 else 'NOTAHEX!'
+                body = ''.join(rng.choice(alphabet) for _ in range(64))
+                lines.append((timestamp + code + body)[:length])
+        lines += ['', '   ', 'S0000000', '28800000AORDER1']
+        rng.shuffle(lines)
+        self.assertSameParse('\n'.join(lines).encode())
+        self.assertSameParse('\r\n'.join(lines).encode() + b'\r\n')
+
+
+def binary_message(code, fmt, *values):
+    """A binary message: length and type bytes, then ``values`` packed as ``fmt``"""
+    body = struct.pack('<' + fmt, *values)
+    return bytes([len(body) + 2, code]) + body
+
+
+def sequenced_unit(messages, unit=1, sequence=1):
+    payload = b''.join(messages)
+    return UNIT_HEADER.pack(UNIT_HEADER.size + len(payload), len(messages), unit, sequence) + payload
+
+
+def time_message(seconds):
+    return binary_message(0x20, 'I', seconds)
+
+
+class BinaryDecoderTests(TestCase):
+    # 9:30 in seconds and nanoseconds since midnight
+    SECONDS = 34_200
+    BASE = SECONDS * 10**9
+
+    def test_message_layouts(self):
+        data = sequenced_unit([
+            time_message(self.SECONDS),
+            binary_message(0x21, 'IQBI6sQ', 100, 1001, ord('S'), 300, b'AAPL  ', 1_502_500),
+            binary_message(0x22, 'IQBH6sH', 200, 1002, ord('B'), 100, b'MSFT  ', 4_210),
+            binary_message(0x23, 'IQIQ', 300, 1001, 50, 9001),
+            binary_message(0x2A, 'IQxI6sQQ', 400, 0, 25, b'IBM   ', 1_234_500, 9002),
+            binary_message(0x31, 'I8sB', 500, b'AAPL    ', ord('T')),
+            binary_message(0x95, 'I8sBQ', 600, b'MSFT    ', ord('O'), 4_200_000),
+            binary_message(0x96, 'I8sBQ', 700, b'MSFT    ', ord('C'), 4_215_000),
+            binary_message(0x98, 'I8sB', 800, b'IBM     ', ord('B')),
+        ])
+        self.assertTrue(is_binary(data))
+        parser = parse_binary(data)
+        self.assertEqual(parser.line_count, 9)
+        self.assertEqual(parser.records['add_order'], [
+            {'timestamp': self.BASE + 100, 'order_id': 1001, 'side': 'S', 'quantity': 300,
+             'symbol': 'AAPL', 'price': 1_502_500, 'message_type': MESSAGE_TYPES['d']},
+            # Short prices carry two decimal places
+            {'timestamp': self.BASE + 200, 'order_id': 1002, 'side': 'B', 'quantity': 100,
+             'symbol': 'MSFT', 'price': 421_000, 'message_type': MESSAGE_TYPES['A']},
+        ])
+        self.assertEqual(parser.records['trade'], [
+            {'timestamp': self.BASE + 300, 'order_id': 1001, 'executed_shares': 50, 'trade_id': 9001,
+             'message_type': MESSAGE_TYPES['E']},
+            {'timestamp': self.BASE + 400, 'order_id': 0, 'quantity': 25, 'symbol': 'IBM',
+             'price': 1_234_500, 'trade_id': 9002, 'message_type': MESSAGE_TYPES['r'], 'executed_shares': 25},
+        ])
+        self.assertEqual(parser.records['auction'], [
+            {'timestamp': self.BASE + 600, 'symbol': 'MSFT', 'auction_type': 'O',
+             'reference_price': 4_200_000, 'message_type': MESSAGE_TYPES['I']},
+            {'timestamp': self.BASE + 700, 'symbol': 'MSFT', 'auction_type': 'C',
+             'reference_price': 4_215_000, 'message_type': MESSAGE_TYPES['J']},
+        ])
+        self.assertEqual(parser.records['system_event'], [
+            {'timestamp': self.BASE + 500, 'symbol': 'AAPL', 'event_code': 'T', 'message_type': MESSAGE_TYPES['H']},
+            {'timestamp': self.BASE + 800, 'symbol': 'IBM', 'event_code': 'B', 'message_type': MESSAGE_TYPES['R']},
+        ])
+        self.assertEqual(parser.message_counts['Time'], 1)
+        self.assertEqual(parser.order_ids, {1001, 1002, 0})
+        self.assertEqual(parser.execution_ids, {9001, 9002})
+        self.assertEqual(parser.symbols, {'AAPL', 'MSFT', 'IBM'})
+
+    def test_units_keep_their_time_reference(self):
+        first = sequenced_unit([time_message(100), binary_message(0x29, 'IQ', 5, 1)], unit=1) + \
+            sequenced_unit([time_message(200), binary_message(0x29, 'IQ', 6, 2)], unit=2, sequence=1)
+        # Later units without a Time message, decoded as a separate piece
+        second = sequenced_unit([binary_message(0x29, 'IQ', 7, 3)], unit=2, sequence=3) + \
+            sequenced_unit([binary_message(0x29, 'IQ', 8, 4)], unit=1, sequence=3)
+        seconds = {}
+        records = parse_binary(first, seconds).records['delete_order'] + \
+            parse_binary(second, seconds).records['delete_order']
+        self.assertEqual(
+            [(record['order_id'], record['timestamp']) for record in records],
+            [(1, 100 * 10**9 + 5), (2, 200 * 10**9 + 6), (3, 200 * 10**9 + 7), (4, 100 * 10**9 + 8)],
+        )
+
+    def test_short_messages_are_counted_not_decoded(self):
+        data = sequenced_unit([
+            time_message(self.SECONDS),
+            # An Add Order cut before its price
+            binary_message(0x21, 'IQBI6s', 100, 1001, ord('B'), 300, b'AAPL  '),
+            binary_message(0x29, 'IQ', 200, 1001),
+        ])
+        parser = parse_binary(data)
+        self.assertEqual(parser.records['add_order'], [])
+        self.assertEqual(len(parser.records['delete_order']), 1)
+        self.assertEqual(parser.message_counts, {'Time': 1, 'Uncategorized (0x21)': 1, 'Delete Order': 1})
+
+    def test_is_binary(self):
+        data = sequenced_unit([time_message(self.SECONDS), binary_message(0x29, 'IQ', 5, 1)])
+        self.assertTrue(is_binary(data))
+        # A unit running past the sniffed bytes
+        unit = sequenced_unit([
+            binary_message(0x21, 'IQBI6sQ', i, i, ord('B'), 100, b'AAPL  ', 1_500_000) for i in range(200)
+        ])
+        self.assertTrue(is_binary(unit[:4096]))
+        self.assertFalse(is_binary('\n'.join(session_lines(20)).encode()))
+        self.assertFalse(is_binary(data[:UNIT_HEADER.size]))
+        # A header whose length does not match its messages
+        self.assertFalse(is_binary(UNIT_HEADER.pack(len(data) + 4, 2, 1, 1) + data[UNIT_HEADER.size:]))
+
+
+class HyperLogLogTests(TestCase):
+    def assertEstimates(self, sketch, count):
+        # Four standard errors, and one for rounding small counts
+        self.assertLessEqual(abs(len(sketch) - count), max(4 * relative_error(sketch.precision) * count, 1))
+
+    def test_estimates_are_within_the_expected_error(self):
+        for count in (100, 10_000, 200_000):
+            with self.subTest(count=count):
+                self.assertEstimates(HyperLogLog.of(range(1, count + 1), 14), count)
+                self.assertEstimates(HyperLogLog.of([f'SYM{i}' for i in range(count)], 12), count)
+
+    def test_union_equals_sketch_of_combined_values(self):
+        first, second = range(1, 60_001), range(40_001, 100_001)
+        combined = HyperLogLog.of([*first, *second], 14)
+        merged = union([HyperLogLog.of(first, 14), HyperLogLog.of(second, 14)])
+        self.assertEqual(merged.registers.tolist(), combined.registers.tolist())
+        self.assertEstimates(merged, 100_000)
+        # Sketches of different precision merge at the lowest one
+        merged = union([HyperLogLog.of(first, 14), HyperLogLog.of(second, 12)])
+        self.assertEqual(merged.precision, 12)
+        self.assertEqual(merged.registers.tolist(), HyperLogLog.of([*first, *second], 12).registers.tolist())
+
+    def test_bytes_round_trip(self):
+        sketch = HyperLogLog.of(range(1, 5_001), 10)
+        copy = HyperLogLog.from_bytes(sketch.to_bytes(), 10)
+        self.assertEqual(copy.registers.tolist(), sketch.registers.tolist())
+        self.assertEqual(len(copy), len(sketch))
+
+
+class UniqueCountsTests(IngestTestCase):
+    def test_counts_merge_the_sketches_of_files(self):
+        user = User.objects.create_user('trader', password='secret')
+        # Orders ORD00000 to ORD00149, of which the first 100 are in both
+        # files, and order 0 of their trades
+        files = [ingest_lines(session_lines(100)), ingest_lines(session_lines(150))]
+        PitchFile.objects.filter(pk__in=[pitch_file.pk for pitch_file in files]).update(
+            uploaded_by=user, status=PitchFile.STATUS_COMPLETED
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get('/api/files/unique-counts/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['files'], sorted(pitch_file.pk for pitch_file in files))
+        self.assertEqual(response.data['unique_symbols'], 3)
+        self.assertEqual(response.data['unique_order_ids'], 151)
+        response = client.get(f'/api/files/unique-counts/?ids={files[0].pk}')
+        self.assertEqual(response.data['unique_order_ids'], 101)
+
+
+@override_settings(PITCH_INGEST_WORKERS=0)
+class UploadTestCase(IngestTestCase):
+    """Uploads through the API, ingested right away"""
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        upload_dir = override_settings(PITCH_UPLOAD_DIR=directory.name)
+        upload_dir.enable()
+        self.addCleanup(upload_dir.disable)
+        self.content = ('\n'.join(session_lines(40)) + '\n').encode()
+
+    def client_of(self, username):
+        client = APIClient()
+        client.force_authenticate(User.objects.get_or_create(username=username)[0])
+        return client
+
+    def upload(self, client, name='session.txt'):
+        return client.post('/api/upload/', {'file': SimpleUploadedFile(name, self.content)}, format='multipart')
+
+    def stored_rows(self, pitch_file_id):
+        return sum(
+            model.objects.filter(pitch_file_id=pitch_file_id).count()
+            for model in [*MESSAGE_MODELS.values(), *DERIVED_MODELS]
+        )
+
+
+class DedupTests(UploadTestCase):
+    def test_repeat_upload_returns_the_first_job(self):
+        client = self.client_of('trader')
+        first = self.upload(client)
+        self.assertEqual(first.status_code, 202)
+        second = self.upload(client, 'again.txt')
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data['id'], first.data['id'])
+        self.assertEqual(PitchFile.objects.count(), 1)
+
+    @override_settings(PITCH_DEDUP_SCOPE='global')
+    def test_upload_of_another_user_is_an_alias(self):
+        first = self.upload(self.client_of('trader'))
+        client = self.client_of('analyst')
+        second = self.upload(client, 'copy.txt')
+        self.assertEqual(second.status_code, 200)
+        source = PitchFile.objects.get(pk=first.data['file_id'])
+        alias = PitchFile.objects.get(pk=second.data['file_id'])
+        self.assertEqual(alias.alias_of, source)
+        self.assertEqual(alias.message_source, source)
+        self.assertEqual(alias.total_lines, source.total_lines)
+        self.assertEqual(self.stored_rows(alias.pk), 0)
+        response = client.get(f'/api/files/{alias.pk}/add-orders/?limit=1000')
+        self.assertEqual(response.data['count'], 40)
+        self.assertEqual(len(response.data['results']), 40)
+
+    @override_settings(PITCH_DEDUP_SCOPE='global')
+    def test_messages_are_purged_with_their_last_alias(self):
+        owner, other = self.client_of('trader'), self.client_of('analyst')
+        source = self.upload(owner).data['file_id']
+        alias = self.upload(other, 'copy.txt').data['file_id']
+        rows = self.stored_rows(source)
+        self.assertEqual(owner.delete(f'/api/files/{source}/').status_code, 204)
+        # The alias still reads the messages of the deleted file
+        self.assertEqual(self.stored_rows(source), rows)
+        self.assertEqual(other.get(f'/api/files/{alias}/add-orders/').data['count'], 40)
+        self.assertEqual(other.delete(f'/api/files/{alias}/').status_code, 204)
+        self.assertEqual(self.stored_rows(source), 0)
+        self.assertFalse(PitchFile.objects.filter(pk__in=[source, alias]).exists())
+
+
+class PurgeTests(UploadTestCase):
+    def test_delete_hides_the_file_and_purge_removes_its_rows(self):
+        client = self.client_of('trader')
+        file_id = self.upload(client).data['file_id']
+        rows = self.stored_rows(file_id)
+        self.assertGreater(rows, 0)
+        with mock.patch('pitch_api.views.submit_purge'):
+            self.assertEqual(client.delete(f'/api/files/{file_id}/').status_code, 204)
+        # Hidden at once, purged later
+        self.assertEqual(client.get(f'/api/files/{file_id}/').status_code, 404)
+        self.assertNotIn(file_id, [pitch_file['id'] for pitch_file in client.get('/api/files/').data])
+        self.assertEqual(self.stored_rows(file_id), rows)
+        with override_settings(PITCH_PURGE_BATCH_SIZE=7):
+            self.assertEqual(purge_deleted_files(), 1)
+        self.assertEqual(self.stored_rows(file_id), 0)
+        self.assertFalse(PitchFile.objects.filter(pk=file_id).exists())
+
+
+class IngestFailureTests(UploadTestCase):
+    def test_failed_ingest_leaves_no_rows(self):
+        # Fail once every message and aggregate is stored
+        with mock.patch('pitch_api.ingest.store_summary', side_effect=ValueError('broken')), \
+                self.assertLogs('pitch_api.jobs', 'ERROR'):
+            response = self.upload(self.client_of('trader'))
+        job = IngestJob.objects.get(pk=response.data['id'])
+        self.assertIn('broken', job.error)
+        self.assertEqual(job.pitch_file.status, PitchFile.STATUS_FAILED)
+        self.assertEqual(self.stored_rows(job.pitch_file_id), 0)
@@ -0,0 +1,153 @@
+"""
+Timeline of a file.
+
+Messages are stored in one table per record kind. The timeline puts them
+back into a single sequence, oldest first: every table is read in
+(timestamp, id) order through a cursor of its own, and the cursors are
+merged with a heap. A page of N events reads at most N + 1 rows from each
+table, however deep it is. Messages sharing a timestamp follow the order of
+their tables in ``MESSAGE_MODELS``, then their ids; events are keyed by
+``(timestamp, table, id)``, with the position of their table in ``KINDS``.
+
+For a symbol, the condition selecting its messages is pushed down into every
+cursor. Adds, trades, auctions and system events carry the symbol. Order
+executions, modifies, cancels and deletes do not, and are matched to the
+symbol through the lifecycle of their order; trade breaks through the trade
+they break.
+"""
+import heapq
+from itertools import islice
+
+import numpy as np
+from django.db.models import Exists, OuterRef, Q
+
+from .columns import ColumnStore
+from .models import PitchFile, MESSAGE_MODELS, OrderLifecycle, TradeMessage
+from .symbols import symbol_id
+
+KINDS = list(MESSAGE_MODELS)
+
+# Bound for keys sorting after every row of a timestamp
+LAST_ID = (1 << 63) - 1
+
+
+def _bound(cursor, table):
+    """
+    The ``(timestamp, id)`` key of ``table`` separating its rows before the
+    event keyed ``cursor`` from those after it.
+    """
+    timestamp, kind, pk = cursor
+    if table < kind:
+        return timestamp, LAST_ID
+    if table > kind:
+        return timestamp, 0
+    return timestamp, pk
+
+
+def _tagged(messages, table, kind):
+    for message in messages:
+        if isinstance(message, dict):
+            yield message['timestamp'], table, message['id'], kind, message
+        else:
+            yield message.timestamp, table, message.pk, kind, message
+
+
+def _database_conditions(pitch_file, ticker):
+    """Condition on every table selecting the messages about the symbol ``ticker``"""
+    # Rows are matched one at a time, as the cursors reach them, through the
+    # unique order ID of the lifecycles and the trade ID index
+    about = Q(symbol_id=ticker)
+    orders = Exists(OrderLifecycle.objects.filter(pitch_file=pitch_file, order_id=OuterRef('order_id'), symbol_id=ticker))
+    trades = Exists(TradeMessage.objects.filter(about | orders, pitch_file=pitch_file, trade_id=OuterRef('trade_id')))
+    return {
+        'add_order': about,
+        'modify_order': orders,
+        'cancel_order': orders,
+        'delete_order': orders,
+        'trade': about | orders,
+        'trade_break': trades,
+        'auction': about,
+        'system_event': about,
+    }
+
+
+def _database_streams(pitch_file, symbol, cursor, size, reverse):
+    conditions = _database_conditions(pitch_file, symbol_id(symbol)) if symbol is not None else {}
+    streams = []
+    for table, kind in enumerate(KINDS):
+        queryset = MESSAGE_MODELS[kind].objects.filter(pitch_file=pitch_file)
+        if kind in conditions:
+            queryset = queryset.filter(conditions[kind])
+        if cursor is not None:
+            timestamp, pk = _bound(cursor, table)
+            if reverse:
+                queryset = queryset.filter(timestamp__lte=timestamp).exclude(timestamp=timestamp, id__gte=pk)
+            else:
+                queryset = queryset.filter(timestamp__gte=timestamp).exclude(timestamp=timestamp, id__lte=pk)
+        order = ('-timestamp', '-id') if reverse else ('timestamp', 'id')
+        streams.append(_tagged(queryset.order_by(*order)[:size].iterator(chunk_size=size), table, kind))
+    return streams
+
+
+def _column_tables(pitch_file, symbol):
+    """The column store tables of a file, narrowed down to ``symbol``"""
+    store = ColumnStore(pitch_file.pk)
+    tables = {kind: store.table(kind) for kind in KINDS}
+    if symbol is None:
+        return tables
+
+    def known(values):
+        return values[values != np.iinfo(values.dtype).min]
+
+    masks = {kind: tables[kind].mask([('symbol', 'exact', symbol)]) for kind in ('add_order', 'trade', 'auction', 'system_event')}
+    orders = np.array(
+        OrderLifecycle.objects.filter(pitch_file=pitch_file, symbol_id=symbol_id(symbol)).values_list('order_id', flat=True),
+        dtype=np.int64,
+    )
+    for kind in ('modify_order', 'cancel_order', 'delete_order'):
+        masks[kind] = tables[kind].mask([('order_id', 'in', orders)])
+    masks['trade'] |= tables['trade'].mask([('order_id', 'in', orders)])
+    trades = known(tables['trade'].column('trade_id')[masks['trade']])
+    masks['trade_break'] = tables['trade_break'].mask([('trade_id', 'in', trades)])
+    return {kind: tables[kind].select(masks[kind]) for kind in KINDS}
+
+
+def _column_streams(pitch_file, symbol, cursor, size, reverse):
+    streams = []
+    for table, (kind, messages) in enumerate(_column_tables(pitch_file, symbol).items()):
+        if not len(messages):
+            continue
+        # Tables are ordered newest first; positions count the rows after a key
+        if cursor is not None and reverse:
+            start = messages.position(*_bound(cursor, table), inclusive=True)
+            rows = messages.newest_first(slice(start, start + size))
+        else:
+            end = len(messages) if cursor is None else messages.position(*_bound(cursor, table))
+            rows = messages.newest_first(slice(max(end - size, 0), end))[::-1]
+        streams.append(_tagged(messages.records(rows), table, kind))
+    return streams
+
+
+def timeline_page(pitch_file, symbol, cursor, size, reverse=False):
+    """
+    Up to ``size`` events of the timeline of a file, oldest first, and
+    whether there are more.
+
+    The page holds the events after the ``(timestamp, table, id)`` key
+    ``cursor``, or before it if ``reverse``; without a cursor it starts at
+    the beginning of the file. Events are ``(timestamp, table, id, kind,
+    message)`` tuples. Only the messages about ``symbol`` are read unless it
+    is None.
+    """
+    source = pitch_file.message_source
+    if symbol is not None and symbol_id(symbol) is None:
+        return [], False
+    if source.storage == PitchFile.STORAGE_COLUMNS:
+        streams = _column_streams(source, symbol, cursor, size + 1, reverse)
+    else:
+        streams = _database_streams(source, symbol, cursor, size + 1, reverse)
+    events = list(islice(heapq.merge(*streams, reverse=reverse), size + 1))
+    page = events[:size]
+    if reverse:
+        page.reverse()
+    return page, len(events) > size
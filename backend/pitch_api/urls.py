@@ -1,13 +1,24 @@
 from django.urls import path
-from .views import PitchFileUploadView, PitchFileListView, PitchFileDetailView
+from .views import (
+    PitchFileUploadView, IngestJobView, ChunkedUploadView, ChunkedUploadDetailView,
+    ChunkedUploadChunkView, ChunkedUploadCommitView, PitchFileListView, PitchFileDetailView,
+    UniqueCountsView
+)
 from .message_views import (
     MessageBaseView, AddOrderMessageView, TradeMessageView, CancelOrderMessageView,
-    AuctionMessageView, SystemEventMessageView
+    AuctionMessageView, SystemEventMessageView, OrderBookView, OrderLifecycleView,
+    PriceBarView, TimelineView, MessageExportView
 )
 
 urlpatterns = [
     path('upload/', PitchFileUploadView.as_view(), name='pitch-file-upload'),
+    path('upload/chunked/', ChunkedUploadView.as_view(), name='chunked-upload'),
+    path('upload/chunked/<uuid:upload_id>/', ChunkedUploadDetailView.as_view(), name='chunked-upload-detail'),
+    path('upload/chunked/<uuid:upload_id>/chunks/<int:index>/', ChunkedUploadChunkView.as_view(), name='chunked-upload-chunk'),
+    path('upload/chunked/<uuid:upload_id>/commit/', ChunkedUploadCommitView.as_view(), name='chunked-upload-commit'),
+    path('jobs/<uuid:job_id>/', IngestJobView.as_view(), name='ingest-job-detail'),
     path('files/', PitchFileListView.as_view(), name='pitch-file-list'),
+    path('files/unique-counts/', UniqueCountsView.as_view(), name='pitch-file-unique-counts'),
     path('files/<int:file_id>/', PitchFileDetailView.as_view(), name='pitch-file-detail'),
     
     # Message-specific endpoints
@@ -16,4 +27,13 @@ urlpatterns = [
     path('files/<int:file_id>/cancel-orders/', CancelOrderMessageView.as_view(), name='cancel-order-messages'),
     path('files/<int:file_id>/auctions/', AuctionMessageView.as_view(), name='auction-messages'),
     path('files/<int:file_id>/system-events/', SystemEventMessageView.as_view(), name='system-event-messages'),
+    path('files/<int:file_id>/add-orders/export/', MessageExportView.as_view(message_view=AddOrderMessageView), name='add-order-export'),
+    path('files/<int:file_id>/trades/export/', MessageExportView.as_view(message_view=TradeMessageView), name='trade-export'),
+    path('files/<int:file_id>/cancel-orders/export/', MessageExportView.as_view(message_view=CancelOrderMessageView), name='cancel-order-export'),
+    path('files/<int:file_id>/auctions/export/', MessageExportView.as_view(message_view=AuctionMessageView), name='auction-export'),
+    path('files/<int:file_id>/system-events/export/', MessageExportView.as_view(message_view=SystemEventMessageView), name='system-event-export'),
+    path('files/<int:file_id>/timeline/', TimelineView.as_view(), name='timeline'),
+    path('files/<int:file_id>/book/', OrderBookView.as_view(), name='order-book'),
+    path('files/<int:file_id>/orders/<str:order_id>/', OrderLifecycleView.as_view(), name='order-lifecycle'),
+    path('files/<int:file_id>/bars/', PriceBarView.as_view(), name='price-bars'),
 ] 
\ No newline at end of file
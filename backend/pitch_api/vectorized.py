@@ -0,0 +1,225 @@
+"""
+Vectorized decoding of ASCII PITCH data with NumPy.
+
+The whole file is viewed as a uint8 array, rows are grouped by their message
+type byte and every group is gathered into a 2-D matrix using the offsets in
+``parser.LAYOUTS``. Timestamps, base-36 IDs, share counts and prices are then
+decoded column-wise. Rows that the fixed-width path cannot decode exactly (short
+lines, padded numbers, non-ASCII bytes, Add Orders needing pattern fallbacks)
+are handed to ``parser.parse_line`` so the output matches ``PitchParser``
+record for record.
+"""
+from itertools import repeat
+
+import numpy as np
+
+from .parser import (
+    LAYOUTS, MESSAGE_TYPES, UNCATEGORIZED_FORMAT, TIMESTAMP_LENGTH, TIMESTAMP_SCALE,
+    PitchParser, parse_line, _text, _char, _id, _int, _price, _side,
+)
+
+# Bytes stripped by str.strip() from ASCII text
+_WHITESPACE = np.zeros(256, dtype=bool)
+_WHITESPACE[[9, 10, 11, 12, 13, 28, 29, 30, 31, 32]] = True
+
+# Bytes that prevent a row from being decoded column-wise
+_UNSAFE = np.zeros(256, dtype=bool)
+_UNSAFE[0] = True
+_UNSAFE[128:] = True
+
+_HEX = np.full(256, -1, dtype=np.int64)
+_HEX[np.frombuffer(b'0123456789', dtype=np.uint8)] = np.arange(10)
+_HEX[np.frombuffer(b'ABCDEF', dtype=np.uint8)] = np.arange(10, 16)
+_HEX[np.frombuffer(b'abcdef', dtype=np.uint8)] = np.arange(10, 16)
+
+_DIGIT = np.full(256, -1, dtype=np.int64)
+_DIGIT[np.frombuffer(b'0123456789', dtype=np.uint8)] = np.arange(10)
+
+_BASE36 = np.full(256, -1, dtype=np.int64)
+_BASE36[np.frombuffer(b'0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ', dtype=np.uint8)] = np.arange(36)
+_BASE36[np.frombuffer(b'abcdefghijklmnopqrstuvwxyz', dtype=np.uint8)] = np.arange(10, 36)
+
+_BUY, _SELL = ord('B'), ord('S')
+
+
+def _trim(buf, starts, ends):
+    """Move line boundaries past surrounding whitespace, like str.strip()"""
+    # Each pass only looks at the rows the previous one trimmed
+    rows = np.flatnonzero(ends > starts)
+    while len(rows):
+        rows = rows[_WHITESPACE[buf[ends[rows] - 1]]]
+        ends[rows] -= 1
+        rows = rows[ends[rows] > starts[rows]]
+    rows = np.flatnonzero(ends > starts)
+    while len(rows):
+        rows = rows[_WHITESPACE[buf[starts[rows]]]]
+        starts[rows] += 1
+        rows = rows[ends[rows] > starts[rows]]
+
+
+def _numbers(matrix, table):
+    """Decode a block of digit columns; rows with other bytes are flagged in ``bad``"""
+    values = table[matrix]
+    bad = (values < 0).any(axis=1)
+    base = int(table.max()) + 1
+    weights = base ** np.arange(matrix.shape[1] - 1, -1, -1, dtype=np.int64)
+    return values @ weights, bad
+
+
+def _strings(matrix):
+    width = matrix.shape[1]
+    column = np.ascontiguousarray(matrix).view(f'S{width}').ravel()
+    return np.char.strip(column.astype(f'U{width}')).tolist()
+
+
+def _decode_fields(layout, present, matrix):
+    """
+    Decode rows of one message type that all carry the same fields.
+
+    Returns the column lists and a mask of rows that must be re-parsed
+    through the scalar path.
+    """
+    timestamps, retry = _numbers(matrix[:, :TIMESTAMP_LENGTH], _HEX)
+    columns = [(timestamps * TIMESTAMP_SCALE).tolist()]
+    text_columns = []
+    for field, available in zip(layout.fields, present):
+        name, start, end, convert, default = field
+        block = matrix[:, start:end]
+        if not available:
+            column = repeat(default)
+        elif convert is _text:
+            column = _strings(block)
+            text_columns.append(column)
+        elif convert is _id:
+            # Twelve base-36 digits stay below 2 ** 63; padded IDs are retried
+            values, bad = _numbers(block, _BASE36)
+            retry |= bad
+            column = values.tolist()
+        elif convert is _char:
+            column = np.char.decode(block.copy().view('S1').ravel(), 'ascii').tolist()
+        elif convert is _side:
+            side = block[:, 0]
+            side = np.where((side == _BUY) | (side == _SELL), side, _BUY).astype(np.uint8)
+            column = np.char.decode(side.view('S1'), 'ascii').tolist()
+        elif convert is _int or convert is _price:
+            values, bad = _numbers(block, _DIGIT)
+            retry |= bad
+            column = values.tolist()
+        else:
+            raise ValueError(f"No vectorized decoder for field {name}")
+        columns.append(column)
+    if layout.fallback is not None:
+        # Missing IDs and empty symbols trigger pattern matching in the
+        # scalar path; other missing fields just take their defaults
+        for column in text_columns:
+            retry |= np.array([not value for value in column], dtype=bool)
+        for field, available in zip(layout.fields, present):
+            if not available and field.convert in (_id, _text):
+                retry[:] = True
+    return columns, retry
+
+
+def parse_buffer(data):
+    """
+    Decode a complete ASCII PITCH file held in memory.
+
+    ``data`` may be any object exposing the buffer protocol, such as bytes or
+    a memoryview over a memory-mapped file; it is read in place. Returns a
+    populated ``PitchParser`` equivalent to feeding the same bytes line by
+    line.
+    """
+    parser = PitchParser()
+    buf = np.frombuffer(data, dtype=np.uint8)
+    returns = np.flatnonzero(buf == 13)
+    if len(returns) and (returns[-1] == len(buf) - 1 or (buf[returns + 1] != 10).any()):
+        # Bare carriage returns also end lines when iterating an upload
+        return parser.feed_lines(bytes(data).splitlines())
+
+    newlines = np.flatnonzero(buf == 10)
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.concatenate((newlines, [len(buf)]))
+    if len(buf) == 0 or buf[-1] == 10:
+        starts, ends = starts[:-1], ends[:-1]
+    parser.line_count = len(starts)
+    _trim(buf, starts, ends)
+    lengths = ends - starts
+
+    # Rows containing NUL or non-ASCII bytes go through the scalar path
+    scalar = np.zeros(len(starts), dtype=bool)
+    unsafe = np.flatnonzero(_UNSAFE[buf])
+    if len(unsafe):
+        scalar[np.unique(np.searchsorted(ends, unsafe, side='right'))] = True
+
+    counts = {}
+    first_seen = {}
+    chunks = {}
+    tracked = {'order_id': parser.order_ids, 'symbol': parser.symbols, 'trade_id': parser.execution_ids}
+
+    def count(name, rows):
+        if len(rows):
+            counts[name] = counts.get(name, 0) + len(rows)
+            first_seen[name] = min(first_seen.get(name, len(starts)), int(rows[0]))
+
+    count(UNCATEGORIZED_FORMAT, np.flatnonzero(~scalar & (lengths > 0) & (lengths <= TIMESTAMP_LENGTH)))
+    typed = np.flatnonzero(~scalar & (lengths > TIMESTAMP_LENGTH))
+    types = buf[starts[typed] + TIMESTAMP_LENGTH]
+
+    for code in np.unique(types).tolist():
+        message_type = chr(code)
+        layout = LAYOUTS.get(message_type)
+        if layout is None:
+            count(MESSAGE_TYPES.get(message_type, f"Uncategorized ({message_type})"), typed[types == code])
+            continue
+        names = ['message_type', 'timestamp'] + [field.name for field in layout.fields]
+        field_ends = np.array([field.end for field in layout.fields])
+        layout_rows = typed[types == code]
+        # Fields are only read when the line extends past their end offset,
+        # so rows are decoded in groups sharing the same set of fields
+        present = lengths[layout_rows, None] > field_ends
+        groups = present @ (1 << np.arange(len(field_ends)))
+        for group in np.unique(groups).tolist():
+            rows = layout_rows[groups == group]
+            mask = present[groups == group][0].tolist()
+            width = max([TIMESTAMP_LENGTH] + [end for end, available in zip(field_ends.tolist(), mask) if available])
+            matrix = buf[starts[rows, None] + np.arange(width)]
+            columns, retry = _decode_fields(layout, mask, matrix)
+            if retry.any():
+                keep = np.flatnonzero(~retry)
+                columns = [
+                    column if isinstance(column, repeat) else [column[i] for i in keep.tolist()]
+                    for column in columns
+                ]
+                scalar[rows[retry]] = True
+                rows = rows[keep]
+            if not len(rows):
+                continue
+            for name, column, available in zip(names[2:], columns[1:], mask):
+                if available and name in tracked:
+                    tracked[name].update(column)
+            records = [dict(zip(names, values)) for values in zip(repeat(layout.name), *columns)]
+            for target, source in layout.copy:
+                for record in records:
+                    record[target] = record[source]
+            count(layout.name, rows)
+            chunks.setdefault(layout.kind, []).append((rows, records))
+
+    for values in tracked.values():
+        values.discard('')
+
+    for row in np.flatnonzero(scalar & (lengths > 0)).tolist():
+        line = buf[starts[row]:ends[row]].tobytes().decode('utf-8', errors='replace').strip()
+        if not line:
+            continue
+        type_name, kind, record = parse_line(line)
+        count(type_name, [row])
+        if record is not None:
+            parser.track(record)
+            chunks.setdefault(kind, []).append((np.array([row]), [record]))
+
+    # Present counts and records in file order, as the line parser does
+    parser.message_counts = {name: counts[name] for name in sorted(counts, key=first_seen.get)}
+    for kind, parts in chunks.items():
+        rows = np.concatenate([part[0] for part in parts])
+        records = [record for part in parts for record in part[1]]
+        parser.records[kind] = [records[i] for i in np.argsort(rows, kind='stable').tolist()]
+    return parser
@@ -17,6 +17,17 @@ interface ApiResponse {
   symbols?: string[];
 }
 
+interface IngestJob {
+  id: string;
+  state: 'pending' | 'processing' | 'completed' | 'failed';
+  percent_complete: number;
+  lines_per_second: number;
+  result: ApiResponse | null;
+  error: string;
+}
+
+const JOB_POLL_INTERVAL_MS = 1000;
+
 export default function UploadPage() {
   const [isLoading, setIsLoading] = useState(false);
   const [messageCounts, setMessageCounts] = useState<Record<string, number> | null>(null);
@@ -24,6 +35,7 @@ export default function UploadPage() {
   const [symbols, setSymbols] = useState<string[]>([]);
   const [errorMsg, setErrorMsg] = useState<string | null>(null);
   const [successMsg, setSuccessMsg] = useState<string | null>(null);
+  const [progress, setProgress] = useState<number | null>(null);
   const [processingStats, setProcessingStats] = useState<{
     startTime: number;
     endTime: number;
@@ -47,6 +59,7 @@ export default function UploadPage() {
     setSymbols([]);
     setErrorMsg(null);
     setSuccessMsg(null);
+    setProgress(null);
     
     const formData = new FormData();
     formData.append('file', file);
@@ -58,16 +71,31 @@ export default function UploadPage() {
       const url = `${apiUrl.endsWith('/') ? apiUrl.slice(0, -1) : apiUrl}/api/upload/`;
       console.log('API URL:', url);
       
+      const headers = {
+        'Authorization': `Bearer ${localStorage.getItem('accessToken')}`
+      };
       const response = await axios.post(url, formData, {
-        headers: {
-          'Content-Type': 'multipart/form-data',
-          'Authorization': `Bearer ${localStorage.getItem('accessToken')}`
-        }
+        headers: { ...headers, 'Content-Type': 'multipart/form-data' }
       });
       
+      // The file is processed in the background; poll its job until it finishes
+      const jobUrl = `${apiUrl.endsWith('/') ? apiUrl.slice(0, -1) : apiUrl}/api/jobs/${response.data.id}/`;
+      let job = response.data as IngestJob;
+      while (job.state === 'pending' || job.state === 'processing') {
+        setProgress(job.percent_complete);
+        await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+        job = (await axios.get(jobUrl, { headers })).data as IngestJob;
+      }
+      setProgress(null);
+      
+      if (job.state === 'failed') {
+        setErrorMsg(job.error || 'Failed to process file. Please try again.');
+        return;
+      }
+      
       const uploadEndTime = performance.now();
       
-      const data = response.data as ApiResponse;
+      const data = (job.result || {}) as ApiResponse;
       console.log('File processing result:', data);
       
       if (data.message_counts) {
@@ -94,6 +122,8 @@ export default function UploadPage() {
     } catch (error: any) {
       console.error('Error uploading file:', error);
       
+      setProgress(null);
+      
       if (error.response?.data?.detail) {
         setErrorMsg(error.response.data.detail);
       } else if (error.message) {
@@ -148,6 +178,9 @@ export default function UploadPage() {
       <div className="mb-8">
         <h2 className="text-lg font-semibold mb-4 text-[var(--accent-color)]">Upload PITCH File</h2>
         <FileUpload onUpload={handleFileUpload} isLoading={isLoading} />
+        {progress !== null && (
+          <p className="mt-2 text-sm text-gray-600">Processing... {progress.toFixed(1)}% complete</p>
+        )}
       </div>
       
       {summary && (
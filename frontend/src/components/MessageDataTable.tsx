@@ -30,7 +30,9 @@ export default function MessageDataTable({ fileId, messageType }: MessageDataTab
   const [messages, setMessages] = useState<MessageData[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
-  const [page, setPage] = useState(1);
+  // Cursor of the page to load; null for the newest messages
+  const [cursor, setCursor] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [hasMore, setHasMore] = useState(true);
   const itemsPerPage = 25;
 
@@ -71,7 +73,7 @@ export default function MessageDataTable({ fileId, messageType }: MessageDataTab
           return;
         }
         
-        const url = `${apiUrl.endsWith('/') ? apiUrl.slice(0, -1) : apiUrl}/api/files/${fileId}/${endpoint}/?page=${page}&limit=${itemsPerPage}`;
+        const url = `${apiUrl.endsWith('/') ? apiUrl.slice(0, -1) : apiUrl}/api/files/${fileId}/${endpoint}/?limit=${itemsPerPage}${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`;
         console.log('Fetching message data from:', url);
         
         const response = await axios.get(url, {
@@ -81,8 +83,10 @@ export default function MessageDataTable({ fileId, messageType }: MessageDataTab
         });
         
         if (response.data && Array.isArray(response.data.results)) {
-          setMessages(prev => page === 1 ? response.data.results : [...prev, ...response.data.results]);
-          setHasMore(!!response.data.next);
+          setMessages(prev => cursor === null ? response.data.results : [...prev, ...response.data.results]);
+          const next = response.data.next ? new URL(response.data.next).searchParams.get('cursor') : null;
+          setNextCursor(next);
+          setHasMore(next !== null);
         } else {
           setMessages([]);
           setHasMore(false);
@@ -96,11 +100,11 @@ export default function MessageDataTable({ fileId, messageType }: MessageDataTab
     };
     
     fetchMessages();
-  }, [apiUrl, fileId, messageType, page]);
+  }, [apiUrl, fileId, messageType, cursor]);
 
   const loadMore = () => {
     if (!loading && hasMore) {
-      setPage(prev => prev + 1);
+      setCursor(nextCursor);
     }
   };
 